@@ -0,0 +1,171 @@
+import os
+import random
+
+from PIL import Image, ImageDraw
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+"""Directory of the generated benchmark PDFs."""
+
+__PAGE_WIDTH = 612
+__PAGE_HEIGHT = 792
+
+
+def write_pdf(path: str, contents: list[bytes]) -> None:
+    """Write a PDF with one page per content stream, text uses Helvetica.
+
+    Args:
+        path (str): Path of the PDF.
+        contents (list[bytes]): Content streams of the pages.
+    """
+    pages_id = 2
+    font_id = 3
+    first_page_id = 4
+
+    objects = {
+        1: f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode(),
+        font_id: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+
+    for index, content in enumerate(contents):
+        page_id = first_page_id + 2 * index
+        content_id = page_id + 1
+        kids.append(f"{page_id} 0 R")
+
+        objects[page_id] = (
+            f"<< /Type /Page /Parent {pages_id} 0 R "
+            f"/MediaBox [0 0 {__PAGE_WIDTH} {__PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> "
+            f"/Contents {content_id} 0 R >>"
+        ).encode()
+        objects[content_id] = (
+            f"<< /Length {len(content)} >>\nstream\n".encode()
+            + content
+            + b"\nendstream"
+        )
+
+    objects[pages_id] = (
+        f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    ).encode()
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+
+    for object_id in sorted(objects):
+        offsets[object_id] = len(data)
+        data += f"{object_id} 0 obj\n".encode() + objects[object_id] + b"\nendobj\n"
+
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for object_id in sorted(objects):
+        data += f"{offsets[object_id]:010d} 00000 n \n".encode()
+
+    data += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def text_page(rng: random.Random, lines: int = 60) -> bytes:
+    """Create a page of dense text.
+
+    Args:
+        rng (random.Random): Random number generator.
+        lines (int, optional): Number of lines. Defaults to 60.
+
+    Returns:
+        bytes: Content stream.
+    """
+    words = ["paper", "thumbnail", "render", "latency", "graph", "model", "data"]
+    content = ["BT /F1 10 Tf 12 TL 50 760 Td"]
+
+    for _ in range(lines):
+        line = " ".join(rng.choice(words) for _ in range(14))
+        content.append(f"({line}) Tj T*")
+
+    content.append("ET")
+    return "\n".join(content).encode()
+
+
+def vector_page(rng: random.Random, shapes: int = 20_000) -> bytes:
+    """Create a page of many stroked lines and filled rectangles.
+
+    Args:
+        rng (random.Random): Random number generator.
+        shapes (int, optional): Number of shapes. Defaults to 20_000.
+
+    Returns:
+        bytes: Content stream.
+    """
+    content = ["0.2 w"]
+
+    for _ in range(shapes):
+        x, y = rng.uniform(0, __PAGE_WIDTH), rng.uniform(0, __PAGE_HEIGHT)
+        r, g, b = rng.random(), rng.random(), rng.random()
+
+        if rng.random() < 0.5:
+            dx, dy = rng.uniform(-40, 40), rng.uniform(-40, 40)
+            content.append(
+                f"{r:.2f} {g:.2f} {b:.2f} RG {x:.1f} {y:.1f} m "
+                f"{x + dx:.1f} {y + dy:.1f} l S"
+            )
+        else:
+            w, h = rng.uniform(1, 20), rng.uniform(1, 20)
+            content.append(
+                f"{r:.2f} {g:.2f} {b:.2f} rg {x:.1f} {y:.1f} {w:.1f} {h:.1f} re f"
+            )
+
+    return "\n".join(content).encode()
+
+
+def write_scan_pdf(path: str, rng: random.Random) -> None:
+    """Write a PDF of one scanned page, a large embedded raster.
+
+    Args:
+        path (str): Path of the PDF.
+        rng (random.Random): Random number generator.
+    """
+    image = Image.new("RGB", (2550, 3300), "white")
+    draw = ImageDraw.Draw(image)
+
+    for _ in range(3000):
+        x, y = rng.randrange(2550), rng.randrange(3300)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.rectangle((x, y, x + rng.randrange(80), y + rng.randrange(20)), color)
+
+    image.save(path, "PDF", resolution=300)
+
+
+def ensure_corpus() -> list[str]:
+    """Generate the benchmark corpus unless it exists.
+
+    The corpus covers a text page, a long document, a vector-heavy page and
+    a scanned page.
+
+    Returns:
+        list[str]: Paths of the PDFs.
+    """
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+
+    generators = {
+        "text-1p.pdf": lambda path, rng: write_pdf(path, [text_page(rng)]),
+        "text-40p.pdf": lambda path, rng: write_pdf(
+            path, [text_page(rng) for _ in range(40)]
+        ),
+        "vector-1p.pdf": lambda path, rng: write_pdf(path, [vector_page(rng)]),
+        "scan-1p.pdf": write_scan_pdf,
+    }
+
+    paths = []
+    for name, generate in generators.items():
+        path = os.path.join(CORPUS_DIR, name)
+        if not os.path.exists(path):
+            # Seeded per file, so every file is the same on every machine
+            generate(path, random.Random(name))
+        paths.append(path)
+
+    return paths
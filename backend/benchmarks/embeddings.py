@@ -0,0 +1,164 @@
+"""Benchmark the embedding index on generated vectors.
+
+Usage:
+    python -m benchmarks.embeddings [--vectors N] [--dimensions N]
+        [--clusters N] [--probes N] [--queries N] [--seed SEED] [--json FILE]
+
+Vectors are drawn around random topics, like embeddings of papers are, and
+added to an index in a temporary directory. Reported are the time to add and
+train them, the size on disk, and the latency and recall@10 against an exact
+search of similar paper and taste queries, the mean of ten liked papers.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.render import percentile
+from src.papers.embedding_index import EmbeddingIndex, normalize
+
+
+def generate_vectors(
+    size: int, dimensions: int, clusters: int, seed: int
+) -> np.ndarray:
+    """Generate unit vectors scattered around random topics.
+
+    Args:
+        size (int): Number of vectors.
+        dimensions (int): Dimensions of the vectors.
+        clusters (int): Number of topics.
+        seed (int): Random seed.
+
+    Returns:
+        np.ndarray: Matrix of unit row vectors.
+    """
+    rng = np.random.default_rng(seed)
+    topics = normalize(rng.standard_normal((clusters, dimensions)))
+    vectors = np.empty((size, dimensions), dtype=np.float32)
+
+    for start in range(0, size, 100_000):
+        stop = min(start + 100_000, size)
+        noise = rng.standard_normal((stop - start, dimensions), dtype=np.float32)
+        members = topics[rng.integers(clusters, size=stop - start)]
+        vectors[start:stop] = normalize(members + 0.06 * noise)
+
+    return vectors
+
+
+def bench_queries(
+    index: EmbeddingIndex,
+    vectors: np.ndarray,
+    queries: list[tuple[np.ndarray, list[str]]],
+) -> dict:
+    """Time queries and compare them to an exact search.
+
+    Args:
+        index (EmbeddingIndex): Index.
+        vectors (np.ndarray): Indexed vectors, in the order of their rows.
+        queries (list[tuple[np.ndarray, list[str]]]): Query vectors and the
+            paper IDs to leave out.
+
+    Returns:
+        dict: Measurements.
+    """
+    latencies, recalls = [], []
+
+    for query, exclude in queries:
+        start = time.perf_counter()
+        found = index.search(query, 10, exclude=exclude)
+        latencies.append(time.perf_counter() - start)
+
+        scores = vectors @ normalize(query)
+        scores[[int(paper_id[5:]) for paper_id in exclude]] = -np.inf
+        exact = np.argpartition(-scores, 10)[:10]
+        recalls.append(len({f"paper{i}" for i in exact} & {p for p, _ in found}) / 10)
+
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "recall_at_10": sum(recalls) / len(recalls),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    rng = np.random.default_rng(args.seed)
+    vectors = generate_vectors(args.vectors, args.dimensions, args.clusters, args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = EmbeddingIndex(directory, args.dimensions, args.probes, 20_000)
+        index.open()
+
+        # Batches the size of the ones fetched from Semantic Scholar
+        start = time.perf_counter()
+        for batch in range(0, args.vectors, 100):
+            stop = min(batch + 100, args.vectors)
+            index.add([f"paper{i}" for i in range(batch, stop)], vectors[batch:stop])
+        add_s = time.perf_counter() - start
+
+        # The last training runs in the background, wait for it
+        start = time.perf_counter()
+        if index._training is not None:
+            index._training.join()
+        index.search(vectors[0], 10)
+        train_wait_s = time.perf_counter() - start
+
+        similar = []
+        for i in rng.choice(args.vectors, args.queries, replace=False):
+            similar.append((vectors[i], [f"paper{i}"]))
+
+        taste = []
+        for _ in range(args.queries):
+            liked = rng.choice(args.vectors, 10, replace=False)
+            taste.append((vectors[liked].mean(axis=0), [f"paper{i}" for i in liked]))
+
+        results = {
+            "vectors": args.vectors,
+            "add_s": add_s,
+            "train_wait_s": train_wait_s,
+            "lists": len(index._lists),
+            "disk_mb": sum(
+                os.path.getsize(os.path.join(directory, name))
+                for name in os.listdir(directory)
+            )
+            / 2**20,
+            "similar": bench_queries(index, vectors, similar),
+            "taste": bench_queries(index, vectors, taste),
+        }
+        index.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--probes", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="file to write the results to")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    print(
+        f"added {results['vectors']} vectors in {results['add_s']:.1f}s, "
+        f"training finished {results['train_wait_s']:.1f}s later: "
+        f"{results['lists']} lists, {results['disk_mb']:.0f} MB on disk"
+    )
+    print(f"{'query':<10}{'p50 ms':>9}{'p95 ms':>9}{'recall@10':>11}")
+    for name in ["similar", "taste"]:
+        r = results[name]
+        print(
+            f"{name:<10}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+            f"{r['recall_at_10']:>11.3f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
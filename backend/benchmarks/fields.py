@@ -0,0 +1,172 @@
+"""Benchmark the Semantic Scholar field profiles.
+
+Usage:
+    python -m benchmarks.fields [--ids ID ...] [--iterations N]
+        [--records FILE] [--json FILE]
+
+Every profile requests the same papers with one batch request to the
+configured API. Reported are the response bytes, the p50 of the JSON parse
+and of building the paper objects, and the bytes saved against the largest
+profile. With --records, a JSON list of full paper records, for example
+exported from the paper cache, is projected to every profile instead, so no
+API is needed.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from semanticscholar.Paper import Paper
+
+from benchmarks.render import percentile
+from src.adapters import http_client
+from src.adapters.semantic_scholar_adapter import FIELD_PROFILES, SCHOLAR
+
+
+DEFAULT_IDS = [
+    "204e3073870fae3d05bcbc2f6a8e263d9b72e776",
+    "df2b0e26d0599ce3e70df8a9da02e51594e0e992",
+    "2c03df8b48bf3fa39054345bafabfeff15bfd11d",
+]
+"""Widely cited papers, with long author lists and many external IDs."""
+
+
+async def fetch(paper_ids: list[str], fields: list[str]) -> bytes:
+    """Fetch papers with one batch request, bypassing all caches.
+
+    Args:
+        paper_ids (list[str]): Paper IDs.
+        fields (list[str]): Fields to request.
+
+    Returns:
+        bytes: Response body.
+    """
+    client = await http_client.get_client()
+    response = await client.post(
+        SCHOLAR.api_url + SCHOLAR.BASE_PATH_GRAPH + "/paper/batch",
+        params={"fields": ",".join(fields)},
+        headers=SCHOLAR.auth_header,
+        json={"ids": paper_ids},
+    )
+    response.raise_for_status()
+    return response.content
+
+
+def project(records: list[dict], fields: list[str]) -> bytes:
+    """Serialize records with only the fields of a profile.
+
+    Args:
+        records (list[dict]): Full paper records.
+        fields (list[str]): Fields to keep.
+
+    Returns:
+        bytes: Records as the API would return them.
+    """
+    return json.dumps(
+        [{field: record.get(field) for field in fields} for record in records]
+    ).encode()
+
+
+def bench(body: bytes, iterations: int) -> dict:
+    """Parse a response body repeatedly.
+
+    Args:
+        body (bytes): Response body.
+        iterations (int): Measured parses.
+
+    Returns:
+        dict: Measurements.
+    """
+    parse_latencies, build_latencies = [], []
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        data = json.loads(body)
+        parsed = time.perf_counter()
+        [Paper(item) for item in data if item is not None]
+
+        parse_latencies.append(parsed - start)
+        build_latencies.append(time.perf_counter() - parsed)
+
+    return {
+        "bytes": len(body),
+        "papers": len(data),
+        "parse_p50_ms": percentile(parse_latencies, 50) * 1000,
+        "build_p50_ms": percentile(build_latencies, 50) * 1000,
+    }
+
+
+async def run(
+    paper_ids: list[str], records: list[dict] | None, iterations: int
+) -> list[dict]:
+    """Benchmark every field profile.
+
+    Args:
+        paper_ids (list[str]): Paper IDs to fetch.
+        records (list[dict] | None): Full records to project instead.
+        iterations (int): Measured parses per profile.
+
+    Returns:
+        list[dict]: One result per profile.
+    """
+    results = []
+
+    try:
+        for profile, fields in FIELD_PROFILES.items():
+            if records is None:
+                body = await fetch(paper_ids, fields)
+            else:
+                body = project(records, fields)
+
+            results.append({"profile": profile} | bench(body, iterations))
+    finally:
+        await http_client.close()
+
+    largest = max(r["bytes"] for r in results)
+    for r in results:
+        r["saved_bytes"] = largest - r["bytes"]
+
+    return results
+
+
+def print_table(results: list[dict]) -> None:
+    """Print the results as a table.
+
+    Args:
+        results (list[dict]): Benchmark results.
+    """
+    print(
+        f"{'profile':<10}{'papers':>8}{'bytes':>10}{'saved':>10}"
+        f"{'parse ms':>10}{'build ms':>10}"
+    )
+
+    for r in results:
+        print(
+            f"{r['profile']:<10}{r['papers']:>8}{r['bytes']:>10}"
+            f"{r['saved_bytes']:>10}{r['parse_p50_ms']:>10.2f}"
+            f"{r['build_p50_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ids", nargs="+", default=DEFAULT_IDS)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument(
+        "--records", help="JSON file of full paper records instead of the API"
+    )
+    parser.add_argument("--json", help="file to write the results to")
+    args = parser.parse_args()
+
+    records = None
+    if args.records:
+        with open(args.records) as file:
+            records = json.load(file)
+
+    results = asyncio.run(run(args.ids, records, args.iterations))
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
@@ -0,0 +1,220 @@
+"""Benchmark building a page of papers from upstream JSON into a response.
+
+Usage:
+    python -m benchmarks.papers [--papers N] [--iterations N]
+        [--records FILE] [--json FILE]
+
+The slim path decodes paper records and serializes them straight into the
+response. The legacy path builds `semanticscholar.Paper` objects, validates
+them into `PaperResponse` models and validates the page again as the
+response model, as the API did before. Reported are the p50 CPU time and the
+memory allocated per page, and whether both paths produce the same JSON.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from pydantic import TypeAdapter
+from semanticscholar.Paper import Paper
+from starlette.responses import JSONResponse
+
+from benchmarks.render import percentile
+from src.adapters.semantic_scholar_adapter import build_paper
+from src.models import PaginatedResponse
+from src.papers.models import (
+    ExternalIds,
+    PaperResponse,
+    PublicationType,
+    Venue,
+)
+
+
+def sample_records(count: int) -> list[dict]:
+    """Build card records typical of well-cited papers.
+
+    Args:
+        count (int): Number of records.
+
+    Returns:
+        list[dict]: Raw paper records.
+    """
+    return [
+        {
+            "paperId": f"{i:040x}",
+            "title": f"Attention Is All You Need, Part {i}",
+            "abstract": "The dominant sequence transduction models are based on "
+            "complex recurrent or convolutional neural networks. " * 8,
+            "authors": [
+                {"authorId": str(i * 10 + a), "name": f"Author {a} Lastname"}
+                for a in range(8)
+            ],
+            "year": 2017,
+            "publicationDate": "2017-06-12",
+            "publicationTypes": ["JournalArticle", "Conference"],
+            "citationCount": 1000 + i,
+            "externalIds": {
+                "DBLP": f"journals/corr/paper{i}",
+                "MAG": str(2963403868 + i),
+                "ArXiv": f"1706.{i:05d}",
+                "CorpusId": 13756489 + i,
+            },
+            "openAccessPdf": None,
+            "publicationVenue": {
+                "id": "d9720b90-d60b-48bc-9df8-87a30b9a60dd",
+                "name": "Neural Information Processing Systems",
+                "type": "conference",
+                "alternate_names": ["NeurIPS", "NIPS"],
+                "url": "http://neurips.cc/",
+            },
+            "citationStyles": {
+                "bibtex": f"@Article{{paper{i},\n author = {{Author 0 Lastname}},"
+                "\n title = {Attention Is All You Need},\n year = {2017}\n}\n"
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_page(records: list[dict]) -> bytes:
+    """Build a response page the way the API did before the slim records.
+
+    Args:
+        records (list[dict]): Raw paper records.
+
+    Returns:
+        bytes: Response body.
+    """
+    responses = []
+
+    for record in records:
+        p = Paper(record)
+
+        # The former sanitizing of papers
+        if not p.openAccessPdf and p.externalIds and p.externalIds.get("ArXiv"):
+            p._openAccessPdf = {
+                "url": f"https://arxiv.org/pdf/{p.externalIds['ArXiv']}"
+            }
+
+        v = p.publicationVenue
+        responses.append(
+            PaperResponse(
+                id=p.paperId,
+                external_ids=ExternalIds(**p.externalIds),
+                title=p.title,
+                published_at=p.publicationDate,
+                authors=[a.name for a in p.authors],
+                publication_types=[
+                    PublicationType(pt) for pt in p.publicationTypes or []
+                ],
+                abstract=p.abstract,
+                citations=p.citationCount,
+                likes=0,
+                open_pdf_url=p.openAccessPdf["url"] if p.openAccessPdf else None,
+                venue=(
+                    Venue(
+                        id=v.id,
+                        name=v.name,
+                        alternate_names=v.alternate_names or [],
+                        alternate_urls=v.alternate_urls or [],
+                        issn=v.issn,
+                        type=v.type,
+                        url=v.url,
+                    )
+                    if v
+                    else None
+                ),
+                bibtex=p.citationStyles["bibtex"] if p.citationStyles else None,
+            )
+        )
+
+    page = PaginatedResponse[PaperResponse](data=responses, total=len(responses))
+
+    # FastAPI validates the returned page against the response model again
+    adapter = TypeAdapter(PaginatedResponse[PaperResponse])
+    content = adapter.dump_python(
+        adapter.validate_python(page, from_attributes=True), mode="json"
+    )
+    return JSONResponse(content).body
+
+
+def slim_page(records: list[dict]) -> bytes:
+    """Build a response page from slim paper records.
+
+    Args:
+        records (list[dict]): Raw paper records.
+
+    Returns:
+        bytes: Response body.
+    """
+    papers = [PaperResponse.serialize(build_paper(r), 0, None) for r in records]
+    return JSONResponse({"data": papers, "total": len(papers)}).body
+
+
+def bench(build, records: list[dict], iterations: int) -> dict:
+    """Build a page repeatedly.
+
+    Args:
+        build (Callable[[list[dict]], bytes]): Page builder.
+        records (list[dict]): Raw paper records, decoded from JSON.
+        iterations (int): Measured builds, after one warm-up build.
+
+    Returns:
+        dict: Measurements.
+    """
+    body = build(records)
+    cpu_times = []
+
+    for _ in range(iterations):
+        # Every page is decoded anew, as it would be from the upstream response
+        raw = json.dumps(records)
+        start = time.process_time()
+        build(json.loads(raw))
+        cpu_times.append(time.process_time() - start)
+
+    tracemalloc.start()
+    build(json.loads(raw))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cpu_p50_ms": percentile(cpu_times, 50) * 1000,
+        "peak_kb": peak / 1024,
+        "bytes": len(body),
+        "body": body,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument(
+        "--records", help="JSON file of paper records instead of generated ones"
+    )
+    parser.add_argument("--json", help="file to write the results to")
+    args = parser.parse_args()
+
+    if args.records:
+        with open(args.records) as file:
+            records = json.load(file)[: args.papers]
+    else:
+        records = sample_records(args.papers)
+
+    results = {
+        "legacy": bench(legacy_page, records, args.iterations),
+        "slim": bench(slim_page, records, args.iterations),
+    }
+    same = json.loads(results["legacy"].pop("body")) == json.loads(
+        results["slim"].pop("body")
+    )
+
+    print(f"{'path':<8}{'cpu ms':>9}{'peak KB':>10}{'bytes':>10}")
+    for path, r in results.items():
+        print(f"{path:<8}{r['cpu_p50_ms']:>9.2f}{r['peak_kb']:>10.1f}{r['bytes']:>10}")
+    print(f"same response: {same}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results | {"same_response": same}, file, indent=2)
@@ -0,0 +1,151 @@
+"""Benchmark the co-like recommender on generated likes.
+
+Usage:
+    python -m benchmarks.recommender [--users N] [--papers N] [--likes N]
+        [--queries N] [--seed SEED] [--json FILE]
+
+Users like papers with a long-tailed popularity, like a community does.
+Reported are the time to build the co-like matrix and its size, the latency
+of recommendations for the 50 most recent likes of random users, served from
+the matrix alone and with pending increments, and the cost of a new like.
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from benchmarks.render import percentile
+from src.config import CONFIG
+from src.likes.recommender import CoLikeRecommender
+
+
+def generate_likes(
+    users: int, papers: int, likes: int, seed: int
+) -> list[tuple[str, str]]:
+    """Generate likes with a Zipf-like paper popularity.
+
+    Args:
+        users (int): Number of users.
+        papers (int): Number of papers.
+        likes (int): Number of likes, duplicates included.
+        seed (int): Random seed.
+
+    Returns:
+        list[tuple[str, str]]: User and paper IDs of the likes.
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, papers + 1)
+    user_codes = rng.integers(users, size=likes)
+    paper_codes = rng.choice(papers, size=likes, p=weights / weights.sum())
+
+    return [(f"user{u}", f"paper{p}") for u, p in zip(user_codes, paper_codes)]
+
+
+def bench_queries(
+    recommender: CoLikeRecommender,
+    user_likes: dict[str, list[str]],
+    queries: int,
+    rng: random.Random,
+) -> dict:
+    """Time recommendations for random users.
+
+    Args:
+        recommender (CoLikeRecommender): Recommender.
+        user_likes (dict[str, list[str]]): Liked papers of every user.
+        queries (int): Number of recommendations.
+        rng (random.Random): Random number generator.
+
+    Returns:
+        dict: Measurements.
+    """
+    users = list(user_likes)
+    latencies, counts = [], []
+
+    for _ in range(queries):
+        user = rng.choice(users)
+        start = time.perf_counter()
+        recommended = recommender.recommend(user, user_likes[user][-50:], 10)
+        latencies.append(time.perf_counter() - start)
+        counts.append(len(recommended))
+
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "mean_recommendations": sum(counts) / len(counts),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    likes = generate_likes(args.users, args.papers, args.likes, args.seed)
+    user_likes: dict[str, list[str]] = {}
+    for user, paper in likes:
+        user_likes.setdefault(user, []).append(paper)
+
+    recommender = CoLikeRecommender()
+    start = time.perf_counter()
+    recommender.load(likes)
+    build_s = time.perf_counter() - start
+    co_likes = recommender._co_likes
+
+    results = {
+        "likes": len(likes),
+        "build_s": build_s,
+        "co_likes": co_likes.nnz,
+        "matrix_mb": (co_likes.data.nbytes + co_likes.indices.nbytes) / 2**20,
+        "queries": bench_queries(recommender, user_likes, args.queries, rng),
+    }
+
+    # New likes stay increments until the threshold, none are merged here
+    CONFIG.recommender.merge_threshold = 2**62
+    latencies = []
+
+    for i in range(args.queries):
+        user, paper = rng.choice(likes)[0], f"paper{rng.randrange(args.papers)}"
+        start = time.perf_counter()
+        recommender.add(user, paper)
+        latencies.append(time.perf_counter() - start)
+
+    results["add_p50_ms"] = percentile(latencies, 50) * 1000
+    results["pending_increments"] = recommender._delta_size
+    results["queries_with_increments"] = bench_queries(
+        recommender, user_likes, args.queries, rng
+    )
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--papers", type=int, default=100_000)
+    parser.add_argument("--likes", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="file to write the results to")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    print(
+        f"built from {results['likes']} likes in {results['build_s']:.2f}s: "
+        f"{results['co_likes']} co-likes, {results['matrix_mb']:.1f} MB"
+    )
+    print(f"new like p50: {results['add_p50_ms']:.3f} ms")
+    print(f"{'served from':<26}{'p50 ms':>9}{'p95 ms':>9}{'found':>8}")
+    for name, key in [
+        ("matrix", "queries"),
+        (f"+{results['pending_increments']} increments", "queries_with_increments"),
+    ]:
+        r = results[key]
+        print(
+            f"{name:<26}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+            f"{r['mean_recommendations']:>8.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
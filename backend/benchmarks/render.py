@@ -0,0 +1,177 @@
+"""Benchmark the thumbnail render engines.
+
+Usage:
+    python -m benchmarks.render [--engines NAME ...] [--iterations N]
+        [--corpus DIR] [--json FILE]
+
+Every engine renders every PDF of the corpus into the configured renditions
+in a fresh process. Reported are the p50/p95 latency, the p50 of the
+rasterization alone, the CPU time including child processes like poppler, the
+peak memory of the process and its children and the encoded bytes of all
+renditions.
+"""
+
+import argparse
+import glob
+import json
+import math
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.corpus import ensure_corpus
+from src.papers.render import encode_renditions, get_renditions
+from src.papers.render_engines import ENGINES, get_engine
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Get a percentile with the nearest-rank method.
+
+    Args:
+        values (list[float]): Values.
+        percent (float): Percentile between 0 and 100.
+
+    Returns:
+        float: Percentile.
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def __cpu_time() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def bench(engine: str, pdf_path: str, iterations: int) -> dict:
+    """Render a PDF repeatedly, runs in a fresh process per engine and PDF.
+
+    Args:
+        engine (str): Engine name.
+        pdf_path (str): Path of the PDF.
+        iterations (int): Measured renders, after one warm-up render.
+
+    Returns:
+        dict: Measurements.
+    """
+    renditions = get_renditions()
+    render_engine = get_engine(engine)
+    width = max(r.width for r in renditions.values())
+
+    # Warm-up, loads libraries and fills file system caches
+    encode_renditions(render_engine.rasterize(pdf_path, width), renditions)
+
+    latencies, raster_latencies, cpu_times = [], [], []
+    output_bytes = 0
+
+    # Same steps as render_first_page, timed separately because encoding
+    # costs the same with every engine
+    for _ in range(iterations):
+        cpu_start = __cpu_time()
+        start = time.perf_counter()
+
+        page = render_engine.rasterize(pdf_path, width)
+        rasterized = time.perf_counter()
+        encoded = encode_renditions(page, renditions)
+
+        latencies.append(time.perf_counter() - start)
+        raster_latencies.append(rasterized - start)
+        cpu_times.append(__cpu_time() - cpu_start)
+        output_bytes = sum(len(data) for data in encoded.values())
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "raster_p50_ms": percentile(raster_latencies, 50) * 1000,
+        "cpu_ms": sum(cpu_times) / len(cpu_times) * 1000,
+        "peak_mb": peak_kb / 1024,
+        "output_bytes": output_bytes,
+    }
+
+
+def run(engines: list[str], pdf_paths: list[str], iterations: int) -> list[dict]:
+    """Benchmark every engine on every PDF.
+
+    Args:
+        engines (list[str]): Engine names.
+        pdf_paths (list[str]): Paths of the PDFs.
+        iterations (int): Measured renders per engine and PDF.
+
+    Returns:
+        list[dict]: One result per engine and PDF, with an error if the
+            engine is not installed or failed.
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+
+    for engine in engines:
+        for pdf_path in pdf_paths:
+            result = {"engine": engine, "pdf": os.path.basename(pdf_path)}
+
+            # A fresh process keeps the peak memory of one run from leaking
+            # into the next
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                try:
+                    result |= pool.submit(bench, engine, pdf_path, iterations).result()
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+
+            results.append(result)
+
+    return results
+
+
+def print_table(results: list[dict]) -> None:
+    """Print the results as a table.
+
+    Args:
+        results (list[dict]): Benchmark results.
+    """
+    header = f"{'engine':<12}{'pdf':<16}{'p50 ms':>9}{'p95 ms':>9}{'raster':>9}"
+    header += f"{'cpu ms':>9}{'peak MB':>9}{'bytes':>10}"
+    print(header)
+
+    for r in results:
+        row = f"{r['engine']:<12}{r['pdf']:<16}"
+
+        if "error" in r:
+            print(row + r["error"])
+            continue
+
+        row += f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['raster_p50_ms']:>9.1f}"
+        row += f"{r['cpu_ms']:>9.1f}"
+        row += f"{r['peak_mb']:>9.1f}{r['output_bytes']:>10}"
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES))
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument(
+        "--corpus", help="directory of PDFs instead of the generated corpus"
+    )
+    parser.add_argument("--json", help="file to write the results to")
+    args = parser.parse_args()
+
+    if args.corpus:
+        pdf_paths = sorted(glob.glob(os.path.join(args.corpus, "*.pdf")))
+    else:
+        pdf_paths = ensure_corpus()
+
+    results = run(args.engines, pdf_paths, args.iterations)
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
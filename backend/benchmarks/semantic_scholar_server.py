@@ -0,0 +1,456 @@
+"""Local stand-in for the Semantic Scholar API.
+
+Usage:
+    python -m benchmarks.semantic_scholar_server [--port PORT] [--papers N]
+        [--profile NAME] [--latency MS] [--jitter MS] [--error-rate RATE]
+        [--rate RPS] [--seed SEED] [--export FILE]
+
+Serves paper search, batch lookups, single paper lookups, autocomplete and
+recommendations from a generated corpus, and a one-page PDF for every open
+access paper. Papers with similar titles get similar embeddings. Point the
+backend at it with SEMANTIC_SCHOLAR__API_URL=http://localhost:8001. Latency,
+server errors and throttling follow a profile, single values can be
+overridden. With --export, the corpus is written to a file instead, to be
+imported into the local corpus with `python -m src.papers.import_corpus`.
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import random
+import sys
+from datetime import date, timedelta
+from typing import NamedTuple
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse
+
+from benchmarks.corpus import ensure_corpus
+
+
+class Profile(NamedTuple):
+    # mean and standard deviation of the latency in milliseconds
+    latency: float
+    jitter: float
+    # share of requests answered with 500
+    error_rate: float
+    # requests per second before requests are answered with 429, 0 is unlimited
+    rate: float
+
+
+PROFILES = {
+    "fast": Profile(latency=0, jitter=0, error_rate=0, rate=0),
+    "realistic": Profile(latency=150, jitter=80, error_rate=0.01, rate=100),
+    "degraded": Profile(latency=800, jitter=400, error_rate=0.1, rate=10),
+}
+"""Upstream behaviors, realistic is close to the public API."""
+
+FIELDS_OF_STUDY = [
+    "Computer Science",
+    "Medicine",
+    "Chemistry",
+    "Biology",
+    "Materials Science",
+    "Physics",
+    "Geology",
+    "Psychology",
+    "Art",
+    "History",
+    "Geography",
+    "Sociology",
+    "Business",
+    "Political Science",
+    "Economics",
+    "Philosophy",
+    "Mathematics",
+    "Engineering",
+    "Environmental Science",
+    "Agricultural and Food Sciences",
+    "Education",
+    "Law",
+    "Linguistics",
+]
+
+PUBLICATION_TYPES = ["JournalArticle", "Conference", "Review", "Study", "Book"]
+
+VENUES = [
+    ("Neural Information Processing Systems", "conference", "NeurIPS"),
+    ("International Conference on Machine Learning", "conference", "ICML"),
+    ("Nature", "journal", "Nat."),
+    ("Physical Review Letters", "journal", "PRL"),
+    ("The Lancet", "journal", "Lancet"),
+]
+
+WORDS = (
+    "learning neural network attention graph model deep language protein "
+    "quantum cell cancer market climate optimization inference robust "
+    "transformer diffusion causal sparse efficient scalable genome brain "
+    "vision reinforcement federated contrastive representation dynamics"
+).split()
+
+EMBEDDING_DIMENSIONS = 768
+"""Dimensions of SPECTER embeddings."""
+
+LAST_NAMES = "Smith Chen Garcia Müller Rossi Kim Nguyen Ivanova Okafor Silva".split()
+
+
+def generate_corpus(size: int, seed: int, public_url: str) -> list[dict]:
+    """Generate paper records with every field the backend may request.
+
+    Args:
+        size (int): Number of papers.
+        seed (int): Random seed, the same seed gives the same corpus.
+        public_url (str): URL of this server, open access PDFs point to it.
+
+    Returns:
+        list[dict]: Raw paper records.
+    """
+    rng = random.Random(seed)
+    papers = []
+
+    for index in range(size):
+        paper_id = hashlib.sha1(f"{seed}:{index}".encode()).hexdigest()
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 10)))
+        published = date(2000, 1, 1) + timedelta(days=rng.randrange(9500))
+        venue, venue_type, venue_short = rng.choice(VENUES)
+        authors = [
+            {
+                "authorId": str(rng.randrange(10**9)),
+                "name": f"{chr(65 + rng.randrange(26))}. {rng.choice(LAST_NAMES)}",
+            }
+            for _ in range(rng.randint(1, 12))
+        ]
+        fields = rng.sample(FIELDS_OF_STUDY, rng.randint(1, 2))
+        arxiv = f"{published:%y%m}.{index:05d}" if rng.random() < 0.4 else None
+        open_access = rng.random() < 0.5
+
+        papers.append(
+            {
+                "paperId": paper_id,
+                "corpusId": index,
+                "url": f"https://www.semanticscholar.org/paper/{paper_id}",
+                "title": title.capitalize(),
+                "abstract": " ".join(rng.choice(WORDS) for _ in range(150)),
+                "venue": venue,
+                "publicationVenue": {
+                    "id": hashlib.md5(venue.encode()).hexdigest(),
+                    "name": venue,
+                    "type": venue_type,
+                    "alternate_names": [venue_short],
+                    "url": "https://example.org/venue",
+                },
+                "year": published.year,
+                "publicationDate": published.isoformat(),
+                "publicationTypes": rng.sample(PUBLICATION_TYPES, 1),
+                "journal": {"name": venue, "volume": str(rng.randint(1, 60))},
+                "authors": authors,
+                "citationCount": int(rng.paretovariate(1.2)) - 1,
+                "influentialCitationCount": rng.randrange(10),
+                "referenceCount": rng.randrange(80),
+                "isOpenAccess": open_access,
+                "openAccessPdf": (
+                    {"url": f"{public_url}/pdf/{paper_id}.pdf", "status": "GREEN"}
+                    if open_access
+                    else None
+                ),
+                "externalIds": {
+                    "CorpusId": index,
+                    **({"ArXiv": arxiv} if arxiv else {}),
+                    "DOI": f"10.5555/{index}",
+                },
+                "fieldsOfStudy": fields,
+                "s2FieldsOfStudy": [
+                    {"category": field, "source": "s2-fos-model"} for field in fields
+                ],
+                "citationStyles": {
+                    "bibtex": f"@Article{{{authors[0]['name'].split()[-1]}"
+                    f"{published.year},\n title = {{{title}}},\n"
+                    f" year = {{{published.year}}}\n}}\n"
+                },
+            }
+        )
+
+    return papers
+
+
+def project(paper: dict, fields: str | None) -> dict:
+    """Keep the requested fields of a paper, like the API does.
+
+    Args:
+        paper (dict): Raw paper record.
+        fields (str | None): Comma separated fields, nested fields like
+            "authors.name" return the whole top-level field.
+
+    Returns:
+        dict: Paper with paperId and the requested fields.
+    """
+    if not fields:
+        return {"paperId": paper["paperId"], "title": paper["title"]}
+
+    fields = fields.split(",")
+    names = {field.split(".")[0] for field in fields}
+    projected = {"paperId": paper["paperId"]} | {
+        name: paper.get(name) for name in names if name in paper
+    }
+
+    if "embedding" in names:
+        model = next(f for f in fields if f.startswith("embedding")).split(".")
+        projected["embedding"] = {
+            "model": model[1] if len(model) > 1 else "specter_v1",
+            "vector": get_embedding(paper),
+        }
+
+    return projected
+
+
+@functools.lru_cache(maxsize=1024)
+def get_word_vector(word: str) -> np.ndarray:
+    """Get a random vector that is the same for a word on every run.
+
+    Args:
+        word (str): Word.
+
+    Returns:
+        np.ndarray: Vector.
+    """
+    seed = int.from_bytes(hashlib.sha1(word.encode()).digest()[:8], "big")
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSIONS)
+
+
+def get_embedding(paper: dict) -> list[float]:
+    """Get the embedding of a paper, the mean of the vectors of its title words.
+
+    Args:
+        paper (dict): Raw paper record.
+
+    Returns:
+        list[float]: Embedding, with a little noise of its own.
+    """
+    words = paper["title"].lower().split()
+    vector = sum(get_word_vector(word) for word in words) / len(words)
+    vector += 0.1 * get_word_vector(paper["paperId"])
+
+    return np.round(vector, 4).tolist()
+
+
+class Upstream:
+    """Simulated behavior of the upstream, shared by all endpoints."""
+
+    def __init__(self, profile: Profile, seed: int) -> None:
+        self._profile = profile
+        self._rng = random.Random(seed)
+        self._tokens = profile.rate
+        self._updated_at = 0.0
+
+    async def respond(self) -> JSONResponse | None:
+        """Wait for the simulated latency and maybe fail the request.
+
+        Returns:
+            JSONResponse | None: Error response, None to answer normally.
+        """
+        profile = self._profile
+
+        if profile.rate:
+            now = asyncio.get_running_loop().time()
+            self._tokens = min(
+                profile.rate, self._tokens + (now - self._updated_at) * profile.rate
+            )
+            self._updated_at = now
+
+            if self._tokens < 1:
+                return JSONResponse(
+                    {"message": "Too Many Requests"},
+                    status_code=429,
+                    headers={"Retry-After": "1"},
+                )
+            self._tokens -= 1
+
+        latency = max(0, self._rng.gauss(profile.latency, profile.jitter))
+        await asyncio.sleep(latency / 1000)
+
+        if self._rng.random() < profile.error_rate:
+            return JSONResponse({"message": "Internal Server Error"}, status_code=500)
+
+        return None
+
+
+def create_app(papers: list[dict], upstream: Upstream) -> FastAPI:
+    """Create the API over a corpus.
+
+    Args:
+        papers (list[dict]): Raw paper records.
+        upstream (Upstream): Simulated upstream behavior.
+
+    Returns:
+        FastAPI: Application.
+    """
+    app = FastAPI(title="Semantic Scholar stand-in")
+    by_id = {paper["paperId"]: paper for paper in papers}
+    by_citations = sorted(papers, key=lambda p: -p["citationCount"])
+    pdf_path = ensure_corpus()[0]
+
+    def matches(paper: dict, params: dict) -> bool:
+        if params.get("fieldsOfStudy"):
+            wanted = set(params["fieldsOfStudy"].split(","))
+            if not wanted & set(paper["fieldsOfStudy"]):
+                return False
+
+        if params.get("minCitationCount"):
+            if paper["citationCount"] < int(params["minCitationCount"]):
+                return False
+
+        if "openAccessPdf" in params and not paper["openAccessPdf"]:
+            return False
+
+        if params.get("publicationTypes"):
+            wanted = set(params["publicationTypes"].split(","))
+            if not wanted & set(paper["publicationTypes"]):
+                return False
+
+        if params.get("venue"):
+            if paper["venue"] not in params["venue"].split(","):
+                return False
+
+        if params.get("publicationDateOrYear"):
+            start, _, end = params["publicationDateOrYear"].partition(":")
+            if start and paper["publicationDate"] < start:
+                return False
+            if end and paper["publicationDate"] > end:
+                return False
+
+        text = f"{paper['title']} {paper['abstract']}".lower()
+        return all(word in text for word in params.get("query", "").lower().split())
+
+    @app.middleware("http")
+    async def simulate(request: Request, call_next):
+        if request.url.path.startswith("/pdf/"):
+            return await call_next(request)
+
+        return await upstream.respond() or await call_next(request)
+
+    @app.get("/graph/v1/paper/search")
+    async def search(request: Request):
+        params = dict(request.query_params)
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+
+        found = [paper for paper in by_citations if matches(paper, params)]
+        page = found[offset : offset + limit]
+
+        return {
+            "total": len(found),
+            "offset": offset,
+            "next": offset + len(page),
+            "data": [project(paper, params.get("fields")) for paper in page],
+        }
+
+    @app.get("/graph/v1/paper/autocomplete")
+    async def autocomplete(query: str):
+        prefix = " ".join(query.lower().split())
+
+        def title_matches(paper: dict) -> bool:
+            words = paper["title"].lower().split()
+            return any(
+                " ".join(words[i:]).startswith(prefix) for i in range(len(words))
+            )
+
+        found = [paper for paper in by_citations if title_matches(paper)][:10]
+
+        return {
+            "matches": [
+                {
+                    "id": paper["paperId"],
+                    "title": paper["title"],
+                    "authorsYear": f"{paper['authors'][0]['name'].split()[-1]}"
+                    f" et al., {paper['year']}",
+                }
+                for paper in found
+            ]
+        }
+
+    @app.post("/graph/v1/paper/batch")
+    async def batch(request: Request, fields: str | None = None):
+        ids = (await request.json())["ids"]
+
+        if len(ids) > 500:
+            return JSONResponse({"error": "Too many ids"}, status_code=400)
+
+        return [
+            project(by_id[paper_id], fields) if paper_id in by_id else None
+            for paper_id in ids
+        ]
+
+    @app.get("/graph/v1/paper/{paper_id}")
+    async def paper(paper_id: str, fields: str | None = None):
+        if paper_id not in by_id:
+            return JSONResponse({"error": "Paper not found"}, status_code=404)
+
+        return project(by_id[paper_id], fields)
+
+    @app.post("/recommendations/v1/papers/")
+    async def recommendations(
+        request: Request, fields: str | None = None, limit: int = 100
+    ):
+        positive = set((await request.json())["positivePaperIds"])
+        wanted = {
+            field
+            for paper_id in positive
+            if paper_id in by_id
+            for field in by_id[paper_id]["fieldsOfStudy"]
+        }
+
+        found = [
+            paper
+            for paper in by_citations
+            if paper["paperId"] not in positive and wanted & set(paper["fieldsOfStudy"])
+        ][:limit]
+
+        return {"recommendedPapers": [project(paper, fields) for paper in found]}
+
+    @app.get("/pdf/{name}")
+    async def pdf(name: str):
+        return FileResponse(pdf_path, media_type="application/pdf")
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--papers", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", choices=PROFILES, default="fast")
+    parser.add_argument("--latency", type=float, help="mean latency in ms")
+    parser.add_argument("--jitter", type=float, help="latency deviation in ms")
+    parser.add_argument("--error-rate", type=float, help="share of 500 responses")
+    parser.add_argument("--rate", type=float, help="requests per second, 0 is any")
+    parser.add_argument("--public-url", help="URL of this server for PDF links")
+    parser.add_argument(
+        "--export", help="write the corpus as JSON lines to this file and exit"
+    )
+    args = parser.parse_args()
+
+    overrides = {
+        field: getattr(args, field)
+        for field in Profile._fields
+        if getattr(args, field) is not None
+    }
+    profile = PROFILES[args.profile]._replace(**overrides)
+    public_url = args.public_url or f"http://localhost:{args.port}"
+
+    papers = generate_corpus(args.papers, args.seed, public_url)
+
+    if args.export:
+        with open(args.export, "w") as file:
+            file.writelines(json.dumps(paper) + "\n" for paper in papers)
+        sys.exit()
+
+    app = create_app(papers, Upstream(profile, args.seed))
+
+    print(f"Serving {len(papers)} papers with {profile}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,215 @@
+"""Load test the Semantic Scholar client against the stand-in server.
+
+Usage:
+    SEMANTIC_SCHOLAR__API_URL=http://localhost:8001 \\
+        python -m benchmarks.upstream [--scenarios NAME ...]
+        [--concurrency N] [--requests N] [--seed SEED] [--json FILE]
+
+Start the server first with `python -m benchmarks.semantic_scholar_server`.
+Every scenario runs the adapter calls behind one backend path with a fixed
+number of concurrent callers: search pages, library pages (batch lookups),
+feeds (recommendations) and autocomplete. Reported are throughput, latency
+percentiles and errors, and the retries and throttling seen by the client. The
+client honors the SEMANTIC_SCHOLAR__* settings, raise SEMANTIC_SCHOLAR__RATE
+to measure beyond the production quota.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.render import percentile
+from benchmarks.semantic_scholar_server import WORDS
+from src.adapters import http_client
+from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.config import CONFIG
+from src.monitoring.metrics import METRICS
+
+
+async def collect_ids(count: int) -> list[str]:
+    """Collect paper IDs of the stand-in corpus.
+
+    Args:
+        count (int): Number of IDs, at most 1000.
+
+    Returns:
+        list[str]: Paper IDs.
+    """
+    ids = []
+
+    while len(ids) < count:
+        papers, total = await ss_adapter.find_many(
+            "", limit=100, offset=len(ids), profile="id-only"
+        )
+        ids += [paper.paperId for paper in papers]
+
+        if len(ids) >= total or not papers:
+            break
+
+    return ids
+
+
+def get_scenarios(ids: list[str]) -> dict:
+    """Get the calls of every scenario.
+
+    Args:
+        ids (list[str]): Paper IDs of the corpus.
+
+    Returns:
+        dict: Scenario names and calls taking a random number generator.
+    """
+    return {
+        "search": lambda rng: ss_adapter.find_many(
+            " ".join(rng.sample(WORDS, rng.randint(1, 2))),
+            limit=10,
+            offset=rng.choice([0, 0, 0, 10, 20]),
+        ),
+        "library": lambda rng: ss_adapter.find_many_by_ids(rng.sample(ids, 20)),
+        "feed": lambda rng: ss_adapter.get_recommendations(
+            rng.sample(ids, 5), limit=10
+        ),
+        "autocomplete": lambda rng: ss_adapter.get_autocomplete(
+            rng.choice(WORDS)[: rng.randint(2, 5)]
+        ),
+    }
+
+
+async def run_scenario(call, concurrency: int, requests: int, seed: int) -> dict:
+    """Run a scenario with concurrent callers.
+
+    Args:
+        call (Callable): Call taking a random number generator.
+        concurrency (int): Concurrent callers.
+        requests (int): Calls in total.
+        seed (int): Random seed.
+
+    Returns:
+        dict: Measurements.
+    """
+    latencies, errors = [], {}
+    remaining = requests
+
+    async def caller(rng: random.Random) -> None:
+        nonlocal remaining
+
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+
+            try:
+                await call(rng)
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(caller(random.Random(f"{seed}:{i}")) for i in range(concurrency))
+    )
+    duration = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 95) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+    }
+
+
+def get_client_counters(before: dict) -> dict:
+    """Sum the Semantic Scholar client counters since a snapshot.
+
+    Args:
+        before (dict): Metrics snapshot taken before the scenario.
+
+    Returns:
+        dict: Upstream requests, retries, failures and 429 responses.
+    """
+    after = METRICS.snapshot()
+    totals = {"upstream": 0, "retries": 0, "failures": 0, "throttled": 0}
+    suffixes = {
+        ".requests": "upstream",
+        ".retries": "retries",
+        ".failures": "failures",
+        ".status.429": "throttled",
+    }
+
+    for name, value in after.items():
+        if not name.startswith("semantic_scholar."):
+            continue
+
+        for suffix, total in suffixes.items():
+            if name.endswith(suffix):
+                totals[total] += value - before.get(name, 0)
+
+    return totals
+
+
+async def main(args: argparse.Namespace) -> list[dict]:
+    ids = await collect_ids(1000)
+    scenarios = get_scenarios(ids)
+    results = []
+
+    try:
+        for name in args.scenarios:
+            before = METRICS.snapshot()
+            result = await run_scenario(
+                scenarios[name], args.concurrency, args.requests, args.seed
+            )
+            results.append({"scenario": name} | result | get_client_counters(before))
+    finally:
+        await http_client.close()
+
+    return results
+
+
+def print_table(results: list[dict]) -> None:
+    """Print the results as a table.
+
+    Args:
+        results (list[dict]): Benchmark results.
+    """
+    print(
+        f"{'scenario':<14}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'upstream':>10}{'retries':>9}{'429s':>6}  errors"
+    )
+
+    for r in results:
+        latencies = "".join(
+            f"{r[key]:>9.1f}" if r[key] is not None else f"{'-':>9}"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        )
+        print(
+            f"{r['scenario']:<14}{r['throughput']:>8.1f}{latencies}"
+            f"{r['upstream']:>10}{r['retries']:>9}{r['throttled']:>6}  "
+            f"{r['errors'] or ''}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=["search", "library", "feed", "autocomplete"],
+    )
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="file to write the results to")
+    args = parser.parse_args()
+
+    if CONFIG.semantic_scholar.api_url is None:
+        parser.error("set SEMANTIC_SCHOLAR__API_URL to the stand-in server")
+
+    results = asyncio.run(main(args))
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
@@ -0,0 +1,248 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+
+from httpx import Response
+
+from src.config import CONFIG, FetchHostLimit
+from src.monitoring.metrics import METRICS
+
+
+THROTTLED_STATUS_CODES = (429, 503)
+"""Status codes of hosts asking to slow down."""
+
+MAX_RETRY_AFTER = 300
+"""Longest pause in seconds a Retry-After header may request."""
+
+
+class HostPausedError(Exception):
+    """Raised instead of waiting for a host that asked to slow down."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        super().__init__(f"{host} is paused for {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class FetchSlot:
+    """Slot of a scheduled fetch, reports the response back to the scheduler."""
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.status_code: int | None = None
+        self.retry_after: float | None = None
+        self.latency: float | None = None
+
+    def report(self, response: Response) -> None:
+        """Report the response headers of the fetch.
+
+        Args:
+            response (Response): Response of the fetch.
+        """
+        self.status_code = response.status_code
+        self.latency = time.monotonic() - self.started_at
+
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            self.retry_after = min(float(retry_after), MAX_RETRY_AFTER)
+
+
+class HostState:
+    """Adaptive concurrency and rate limit of a single host."""
+
+    def __init__(self, limits: FetchHostLimit) -> None:
+        self.limits = limits
+        self.concurrency = float(limits.initial_concurrency)
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.next_start = 0.0
+        # monotonic time until which the host asked to be left alone
+        self.paused_until = 0.0
+        self.latency: float | None = None
+        self.requests = 0
+        self.throttled = 0
+        self.slow = 0
+
+    def has_capacity(self) -> bool:
+        return self.in_flight < int(self.concurrency)
+
+    def get_pause(self) -> float:
+        return max(self.paused_until - time.monotonic(), 0)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": int(self.concurrency),
+            "in_flight": self.in_flight,
+            "waiting": len(self.waiters),
+            "latency": self.latency,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "slow": self.slow,
+        }
+
+
+class FetchScheduler:
+    """Process-wide scheduler of outbound fetches with per-host limits.
+
+    Every host gets a concurrency limit and a minimum interval between
+    request starts. Fetches waiting for a host are served first come, first
+    served. The concurrency limit grows by one slot per round of fast
+    responses and shrinks by the backoff factor on 429/503 responses and slow
+    hosts (AIMD), throttling responses also pause the host. Fetches of a
+    paused host fail right away, waiting ones included, so callers can
+    reschedule them instead of holding a worker for the pause.
+    """
+
+    def __init__(self) -> None:
+        self._hosts: dict[str, HostState] = {}
+
+        METRICS.register_gauge(
+            "fetch.hosts",
+            lambda: {host: state.stats() for host, state in self._hosts.items()},
+        )
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[FetchSlot]:
+        """Wait for a slot to fetch a URL.
+
+        Args:
+            url (str): URL to fetch.
+
+        Yields:
+            FetchSlot: Slot to report the response to.
+
+        Raises:
+            HostPausedError: If the host is paused, before or after waiting.
+        """
+        host = urlsplit(url).hostname or ""
+        state = self._get_state(host)
+
+        if state.get_pause() > 0:
+            raise HostPausedError(host, state.get_pause())
+
+        await self._acquire(state)
+
+        try:
+            if state.get_pause() > 0:
+                raise HostPausedError(host, state.get_pause())
+
+            await self._wait_for_rate(state)
+        except BaseException:
+            self._release(state)
+            raise
+
+        slot = FetchSlot()
+        state.requests += 1
+
+        try:
+            yield slot
+        finally:
+            self._adapt(state, slot)
+            self._release(state)
+
+    def get_pause(self, url: str) -> float:
+        """Get the seconds until the host of a URL may be fetched again.
+
+        Args:
+            url (str): URL to fetch.
+
+        Returns:
+            float: Seconds of the pause left, 0 if the host is not paused.
+        """
+        state = self._hosts.get(urlsplit(url).hostname or "")
+        return 0 if state is None else state.get_pause()
+
+    def _get_state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+
+        if state is None:
+            if len(self._hosts) >= CONFIG.fetch.max_hosts:
+                self._prune()
+
+            limits = CONFIG.fetch.hosts.get(host, CONFIG.fetch.default)
+            state = self._hosts[host] = HostState(limits)
+
+        return state
+
+    def _prune(self) -> None:
+        for host, state in list(self._hosts.items()):
+            if state.in_flight == 0 and not state.waiters and not state.get_pause():
+                del self._hosts[host]
+
+    async def _acquire(self, state: HostState) -> None:
+        if state.has_capacity() and not state.waiters:
+            state.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over right before the cancellation
+                self._release(state)
+            else:
+                state.waiters.remove(waiter)
+            raise
+
+    async def _wait_for_rate(self, state: HostState) -> None:
+        now = time.monotonic()
+        start = max(now, state.next_start)
+        state.next_start = start + state.limits.min_interval
+
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def _release(self, state: HostState) -> None:
+        state.in_flight -= 1
+
+        while state.waiters and state.has_capacity():
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                state.in_flight += 1
+                waiter.set_result(None)
+
+    def _adapt(self, state: HostState, slot: FetchSlot) -> None:
+        limits = state.limits
+
+        if slot.latency is not None:
+            state.latency = (
+                slot.latency
+                if state.latency is None
+                else 0.8 * state.latency + 0.2 * slot.latency
+            )
+
+        if slot.status_code in THROTTLED_STATUS_CODES:
+            state.throttled += 1
+            METRICS.increment("fetch.throttled")
+            state.concurrency = max(
+                limits.min_concurrency, state.concurrency * CONFIG.fetch.backoff
+            )
+
+            pause = (
+                CONFIG.fetch.throttle_pause
+                if slot.retry_after is None
+                else slot.retry_after
+            )
+            state.paused_until = max(state.paused_until, time.monotonic() + pause)
+            state.next_start = max(state.next_start, state.paused_until)
+
+        elif slot.latency is not None and slot.latency > CONFIG.fetch.slow_response:
+            state.slow += 1
+            METRICS.increment("fetch.slow")
+            state.concurrency = max(
+                limits.min_concurrency, state.concurrency * CONFIG.fetch.backoff
+            )
+
+        elif slot.status_code is not None and slot.status_code < 500:
+            state.concurrency = min(
+                limits.max_concurrency, state.concurrency + 1 / state.concurrency
+            )
+
+
+FETCH_SCHEDULER = FetchScheduler()
+"""Global fetch scheduler."""
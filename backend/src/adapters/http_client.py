@@ -0,0 +1,119 @@
+from asyncio import Lock
+from collections import Counter
+
+from httpx import AsyncClient, AsyncHTTPTransport, Limits, Request, Response, Timeout
+
+from src.config import CONFIG
+from src.monitoring.metrics import METRICS
+
+
+__client: AsyncClient | None = None
+__transport: AsyncHTTPTransport | None = None
+__lock: Lock | None = None
+
+
+async def start() -> None:
+    """Open the HTTP client shared by all outbound requests."""
+    global __client, __transport
+
+    async with __get_lock():
+        if __client is not None:
+            return
+
+        __transport = AsyncHTTPTransport(
+            http2=CONFIG.http.http2,
+            limits=Limits(
+                max_connections=CONFIG.http.max_connections,
+                max_keepalive_connections=CONFIG.http.max_keepalive_connections,
+                keepalive_expiry=CONFIG.http.keepalive_expiry,
+            ),
+            retries=CONFIG.http.connect_retries,
+        )
+        __client = AsyncClient(
+            transport=__transport,
+            timeout=Timeout(CONFIG.http.timeout, connect=CONFIG.http.connect_timeout),
+            event_hooks={"request": [__on_request], "response": [__on_response]},
+        )
+
+
+async def close() -> None:
+    """Close the HTTP client and its connection pool."""
+    global __client, __transport, __lock
+
+    async with __get_lock():
+        if __client is not None:
+            await __client.aclose()
+
+        __client = None
+        __transport = None
+
+    __lock = None
+
+
+async def get_client() -> AsyncClient:
+    """Get the shared HTTP client, opening it on first use.
+
+    Returns:
+        AsyncClient: Shared HTTPX Async Client.
+    """
+    if __client is None:
+        await start()
+
+    return __client
+
+
+def __get_lock() -> Lock:
+    global __lock
+
+    if __lock is None:
+        __lock = Lock()
+
+    return __lock
+
+
+async def __on_request(request: Request) -> None:
+    METRICS.increment("http.requests")
+
+
+async def __on_response(response: Response) -> None:
+    METRICS.increment(f"http.responses.{response.status_code // 100}xx")
+
+    if response.http_version == "HTTP/2":
+        METRICS.increment("http.responses.http2")
+
+
+def __pool_stats() -> dict:
+    limits = {
+        "max_connections": CONFIG.http.max_connections,
+        "max_keepalive_connections": CONFIG.http.max_keepalive_connections,
+    }
+
+    if __transport is None:
+        return {**limits, "connections": 0, "idle": 0, "active": 0, "hosts": {}}
+
+    # httpx exposes no pool statistics, so the private httpcore pool is
+    # inspected. If an upgrade changes it, only the limits are reported, the
+    # request and response counters are exported anyway.
+    try:
+        connections = list(getattr(__transport, "_pool").connections)
+        hosts = Counter(
+            str(origin.host, "ascii")
+            for origin in (
+                getattr(connection, "_origin", None) for connection in connections
+            )
+            if origin is not None
+        )
+        idle = sum(1 for connection in connections if connection.is_idle())
+    except Exception:
+        return limits
+
+    return {
+        **limits,
+        "connections": len(connections),
+        "idle": idle,
+        "active": len(connections) - idle,
+        "hosts": dict(hosts),
+    }
+
+
+METRICS.register_gauge("http.pool", __pool_stats)
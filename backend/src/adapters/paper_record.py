@@ -0,0 +1,43 @@
+class PaperRecord:
+    """Paper decoded straight from a raw Semantic Scholar record.
+
+    Unlike `semanticscholar.Paper`, no nested author, venue or journal
+    objects are built and dates are not parsed: fields reference the decoded
+    JSON and only author names are extracted. Attributes keep the upstream
+    names, so code reading `paper.paperId` or `paper.openAccessPdf` works
+    with both.
+    """
+
+    __slots__ = (
+        "raw_data",
+        "paperId",
+        "title",
+        "abstract",
+        "authors",
+        "year",
+        "publicationDate",
+        "publicationTypes",
+        "citationCount",
+        "externalIds",
+        "openAccessPdf",
+        "publicationVenue",
+        "citationStyles",
+    )
+
+    def __init__(self, data: dict) -> None:
+        self.raw_data = data
+        self.paperId: str | None = data.get("paperId")
+        self.title: str | None = data.get("title")
+        self.abstract: str | None = data.get("abstract")
+        self.authors: list[str] = [
+            author["name"] for author in data.get("authors") or [] if author.get("name")
+        ]
+        self.year: int | None = data.get("year")
+        # ISO date, for example "2017-06-12"
+        self.publicationDate: str | None = data.get("publicationDate")
+        self.publicationTypes: list[str] | None = data.get("publicationTypes")
+        self.citationCount: int | None = data.get("citationCount")
+        self.externalIds: dict | None = data.get("externalIds")
+        self.openAccessPdf: dict | None = data.get("openAccessPdf")
+        self.publicationVenue: dict | None = data.get("publicationVenue")
+        self.citationStyles: dict | None = data.get("citationStyles")
@@ -0,0 +1,146 @@
+import asyncio
+import random
+import time
+
+from src.monitoring.metrics import METRICS
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is known to be down."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"Circuit {name} is open, retry in {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+
+class UpstreamThrottledError(Exception):
+    """Raised when an upstream kept asking to slow down until retries ran out."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"{name} is throttling, retry in {retry_after:.0f}s.")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket rate limiter, callers wait in FIFO order for a token."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+        return now
+
+    async def acquire(self) -> None:
+        """Wait for a token."""
+        async with self._lock:
+            while True:
+                now = self._refill()
+
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep(
+                    max(self._paused_until - now, (1 - self._tokens) / self._rate)
+                )
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available without waiting.
+
+        Returns:
+            bool: True if a token was taken.
+        """
+        now = self._refill()
+
+        if self._lock.locked() or now < self._paused_until or self._tokens < 1:
+            return False
+
+        self._tokens -= 1
+        return True
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for a while, after the upstream asked to slow down.
+
+        Args:
+            seconds (float): Pause in seconds.
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """Circuit breaker that fails fast while an upstream is down.
+
+    The circuit opens after consecutive failures. While open, one probe
+    request per reset timeout is let through, and the first success closes
+    the circuit again. The state is exported as metric under
+    `circuit.<name>`.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+
+        METRICS.register_gauge(f"circuit.{name}.open", lambda: int(self.is_open))
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def check(self) -> None:
+        """Check if a request may be sent.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and no probe is due.
+        """
+        if self._opened_at is None:
+            return
+
+        waited = time.monotonic() - self._opened_at
+
+        if waited < self._reset_timeout:
+            METRICS.increment(f"circuit.{self._name}.rejected")
+            raise CircuitOpenError(self._name, self._reset_timeout - waited)
+
+        # Let this request probe the upstream, the others wait for its result
+        self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        """Record a successful request, closes the circuit."""
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Record a failed request, opens the circuit after too many."""
+        self._failures += 1
+
+        if self.is_open or self._failures >= self._failure_threshold:
+            if not self.is_open:
+                METRICS.increment(f"circuit.{self._name}.opened")
+            self._opened_at = time.monotonic()
+
+
+def get_backoff(attempt: int, base: float, maximum: float) -> float:
+    """Get the delay before a retry, exponential with full jitter.
+
+    Args:
+        attempt (int): Number of the failed attempt, starting at 0.
+        base (float): Delay in seconds after the first attempt.
+        maximum (float): Longest delay in seconds.
+
+    Returns:
+        float: Delay in seconds.
+    """
+    return random.uniform(0, min(maximum, base * 2**attempt))
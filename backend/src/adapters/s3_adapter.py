@@ -1,69 +1,126 @@
-import io
+from asyncio import Lock
+from contextlib import AsyncExitStack
 
-import boto3
-from botocore.exceptions import ClientError
-from PIL.Image import Image
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
 
+from src.cache import TTLCache
 from src.config import CONFIG
 
 
-__s3_client = boto3.client("s3")
-__s3 = boto3.resource("s3")
-__thumbnails_bucket = __s3.Bucket(CONFIG.s3.thumbnails_bucket)
+__session = get_session()
+__exit_stack: AsyncExitStack | None = None
+__s3_client = None
+__lock: Lock | None = None
+__presigned_urls: TTLCache[str, str] = TTLCache(
+    "s3.presigned_urls",
+    max_size=CONFIG.s3.presigned_url_cache_size,
+    ttl=CONFIG.s3.presigned_url_expiry - CONFIG.s3.presigned_url_safety_margin,
+)
 
 
-def upload_from_pil(paper_id: str, thumbnail: Image) -> None:
-    """Upload a thumbnail image to S3.
+async def start() -> None:
+    """Open the pooled S3 client shared by all requests."""
+    global __exit_stack, __s3_client
+
+    async with __get_lock():
+        if __s3_client is not None:
+            return
+
+        config = AioConfig(
+            max_pool_connections=CONFIG.s3.max_pool_connections,
+            connect_timeout=CONFIG.s3.connect_timeout,
+            read_timeout=CONFIG.s3.read_timeout,
+            retries={"max_attempts": CONFIG.s3.max_attempts, "mode": "standard"},
+        )
+
+        __exit_stack = AsyncExitStack()
+        __s3_client = await __exit_stack.enter_async_context(
+            __session.create_client(
+                "s3", endpoint_url=CONFIG.aws_endpoint_url, config=config
+            )
+        )
+
+
+async def close() -> None:
+    """Close the S3 client and its connection pool."""
+    global __exit_stack, __s3_client, __lock
+
+    async with __get_lock():
+        if __exit_stack is not None:
+            await __exit_stack.aclose()
+
+        __exit_stack = None
+        __s3_client = None
+
+    # A client opened later may run on another event loop
+    __lock = None
+
+
+def __get_lock() -> Lock:
+    global __lock
+
+    if __lock is None:
+        __lock = Lock()
+
+    return __lock
+
+
+async def __get_client():
+    if __s3_client is None:
+        await start()
+
+    return __s3_client
+
+
+async def upload(key: str, thumbnail: bytes, content_type: str) -> None:
+    """Upload an encoded thumbnail to S3.
 
     Args:
-        paper_id (str): Paper ID.
-        thumbnail (Image): Thumbnail PIL image.
+        key (str): Thumbnail key.
+        thumbnail (bytes): Encoded thumbnail.
+        content_type (str): MIME type of the thumbnail.
     """
-    file_obj = io.BytesIO()
-    thumbnail.save(file_obj, format=thumbnail.format)
-    file_obj.seek(0)
-    __thumbnails_bucket.upload_fileobj(
-        file_obj,
-        paper_id,
-        {"ContentType": CONFIG.s3.thumbnail_content_type},
+    client = await __get_client()
+    await client.put_object(
+        Bucket=CONFIG.s3.thumbnails_bucket,
+        Key=key,
+        Body=thumbnail,
+        ContentType=content_type,
+        CacheControl=CONFIG.s3.thumbnail_cache_control,
     )
 
 
-def get_presigned_url(paper_id) -> str:
-    """Get a presigned URL for the specified paper thumbnail.
+async def get_presigned_url(key: str) -> str:
+    """Get a presigned URL for the specified thumbnail.
+
+    URLs are reused until shortly before they expire, which keeps them stable
+    so browsers can cache the images. With a public bucket the plain object
+    URL is returned instead.
 
     Args:
-        paper_id (str): Paper ID.
+        key (str): Thumbnail key.
 
     Returns:
         str: Presigned URL.
     """
-    url: str = __s3_client.generate_presigned_url(
+    if CONFIG.s3.public_url is not None:
+        return f"{CONFIG.s3.public_url.rstrip('/')}/{key}"
+
+    url = __presigned_urls.get(key)
+    if url is not None:
+        return url
+
+    client = await __get_client()
+    url = await client.generate_presigned_url(
         ClientMethod="get_object",
-        Params={"Bucket": __thumbnails_bucket.name, "Key": paper_id},
+        Params={"Bucket": CONFIG.s3.thumbnails_bucket, "Key": key},
         ExpiresIn=CONFIG.s3.presigned_url_expiry,
     )
 
     if CONFIG.s3.dev_endpoint is not None:
         url = url.replace(CONFIG.aws_endpoint_url, CONFIG.s3.dev_endpoint)
 
-    return url
-
-
-def exists(paper_id: str) -> bool:
-    """Check if a thumbnail exists in S3.
-
-    Args:
-        paper_id (str): Paper ID.
+    __presigned_urls.set(key, url)
 
-    Returns:
-        bool: True if the thumbnail exists, False otherwise
-    """
-    try:
-        __s3_client.head_object(Bucket=__thumbnails_bucket.name, Key=paper_id)
-        return True
-    except ClientError as e:
-        if e.response["Error"]["Code"] == "404":
-            return False
-        else:
-            raise
+    return url
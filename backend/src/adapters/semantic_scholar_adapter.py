@@ -1,11 +1,35 @@
+import asyncio
+import re
+import time
 from datetime import datetime
+from typing import Literal
+from urllib.parse import urlsplit
+
+import httpx
 
 from semanticscholar import AsyncSemanticScholar
+from semanticscholar.ApiRequester import ApiRequester
 from semanticscholar.Paper import Paper
 from semanticscholar.PaginatedResults import PaginatedResults
-from semanticscholar.SemanticScholarException import ObjectNotFoundException
+from semanticscholar.SemanticScholarException import (
+    BadQueryParametersException,
+    GatewayTimeoutException,
+    InternalServerErrorException,
+    ObjectNotFoundException,
+)
 from semanticscholar.SemanticScholarObject import SemanticScholarObject
 
+from src.adapters import http_client
+from src.adapters.paper_record import PaperRecord
+from src.adapters.resilience import (
+    CircuitBreaker,
+    TokenBucket,
+    UpstreamThrottledError,
+    get_backoff,
+)
+from src.config import CONFIG
+from src.monitoring.metrics import METRICS
+from src.papers import corpus
 from src.users.models import UserFieldOfStudy
 
 
@@ -42,7 +66,274 @@ class Autocomplete(SemanticScholarObject):
         return self._authors_year
 
 
+FieldProfile = Literal["id-only", "pdf", "card", "detail"]
+
+FIELD_PROFILES: dict[FieldProfile, list[str]] = {
+    # existence checks
+    "id-only": ["paperId"],
+    # thumbnail generation
+    "pdf": ["paperId", "externalIds", "openAccessPdf"],
+    # everything PaperResponse and the autocomplete index read
+    "card": [
+        "paperId",
+        "abstract",
+        "authors",
+        "citationCount",
+        "citationStyles",
+        "externalIds",
+        "openAccessPdf",
+        "publicationDate",
+        "publicationTypes",
+        "publicationVenue",
+        "title",
+        "year",
+    ],
+    "detail": Paper.SEARCH_FIELDS,
+}
+"""Fields requested from Semantic Scholar by use of the papers."""
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+"""Status codes of requests that are worth retrying."""
+
+MAX_RETRY_AFTER = 60
+"""Longest pause in seconds a Retry-After header may request."""
+
+KNOWN_PATH_SEGMENTS = {
+    "author",
+    "authors",
+    "autocomplete",
+    "batch",
+    "bulk",
+    "citations",
+    "forpaper",
+    "match",
+    "paper",
+    "papers",
+    "references",
+    "search",
+}
+"""Path segments that name endpoints, all others are IDs."""
+
+
+MATCH_ALL_QUERY = "n"
+"""Query of searches for any paper, the search endpoint requires a query."""
+
+PAPER_ID_PATTERN = re.compile(r"[0-9a-f]{40}")
+"""Format of Semantic Scholar paper IDs."""
+
+EXTERNAL_ID_PATTERN = re.compile(r"(?i:corpusid|doi|arxiv|mag|acl|pmid|pmcid|url):\S+")
+"""Format of the prefixed external IDs that Semantic Scholar resolves."""
+
+
+def is_paper_id(id: str) -> bool:
+    """Check if a string is formatted like a paper ID Semantic Scholar accepts.
+
+    Besides its own paper IDs, the API resolves prefixed external IDs such
+    as "DOI:10.1145/3292500.3330701" or "arXiv:1705.10311".
+
+    Args:
+        id (str): String to check.
+
+    Returns:
+        bool: True if it may be a paper ID, False otherwise.
+    """
+    return (
+        PAPER_ID_PATTERN.fullmatch(id) is not None
+        or EXTERNAL_ID_PATTERN.fullmatch(id) is not None
+    )
+
+
+def get_endpoint(url: str) -> str:
+    """Get the metric name of a Semantic Scholar endpoint.
+
+    Args:
+        url (str): Request URL.
+
+    Returns:
+        str: Endpoint name, for example "graph.paper.search" or
+            "graph.paper.id" for a paper lookup.
+    """
+    api, _, *path = [part for part in urlsplit(url).path.split("/") if part]
+    path = [part if part in KNOWN_PATH_SEGMENTS else "id" for part in path]
+    return ".".join([api, *path])
+
+
+class ResilientApiRequester(ApiRequester):
+    """API requester that protects the app from an overloaded upstream.
+
+    Requests are sent over the shared HTTP client, instead of a new client
+    and TLS connection per request. They are rate limited by a token bucket
+    sized to the API quota and retried with jittered exponential backoff on
+    429, 5xx and connection errors. A circuit breaker fails fast while the
+    upstream is down, and slow requests can be hedged with a second one.
+    Requests, retries, failures and latency are exported as metrics under
+    `semantic_scholar.<endpoint>`.
+    """
+
+    def __init__(self, timeout: int, retry: bool = True) -> None:
+        super().__init__(timeout, retry)
+        settings = CONFIG.semantic_scholar
+
+        self._bucket = TokenBucket(settings.rate, settings.burst)
+        self._breaker = CircuitBreaker(
+            "semantic_scholar", settings.breaker_failures, settings.breaker_reset
+        )
+
+    async def get_data_async(
+        self, url: str, parameters: str, headers: dict, payload: dict = None
+    ) -> dict | list[dict]:
+        settings = CONFIG.semantic_scholar
+        metric = f"semantic_scholar.{get_endpoint(url)}"
+        attempts = settings.max_attempts if self.retry else 1
+
+        self._breaker.check()
+
+        for attempt in range(attempts):
+            await self._bucket.acquire()
+            METRICS.increment(f"{metric}.requests")
+            start = time.monotonic()
+
+            try:
+                r = await self._request(url, parameters, headers, payload, metric)
+            except httpx.TransportError as e:
+                error, retry_after, status_code = e, None, None
+            else:
+                status_code = r.status_code
+                METRICS.increment(f"{metric}.latency_seconds", time.monotonic() - start)
+                METRICS.increment(f"{metric}.status.{r.status_code}")
+
+                if r.status_code not in RETRY_STATUS_CODES:
+                    self._breaker.record_success()
+                    return self._parse(r)
+
+                retry_after = self._get_retry_after(r)
+                error = self._get_error(r, retry_after or settings.backoff)
+
+                if r.status_code == 429:
+                    # Every caller waits, not only the throttled one
+                    self._bucket.pause(retry_after or settings.backoff)
+
+            if attempt + 1 < attempts:
+                METRICS.increment(f"{metric}.retries")
+                await asyncio.sleep(
+                    retry_after
+                    or get_backoff(attempt, settings.backoff, settings.backoff_max)
+                )
+
+        METRICS.increment(f"{metric}.failures")
+
+        # Throttling means the upstream is up, it must not open the circuit
+        if status_code != 429:
+            self._breaker.record_failure()
+
+        raise error
+
+    async def _request(
+        self,
+        url: str,
+        parameters: str,
+        headers: dict,
+        payload: dict | None,
+        metric: str,
+    ) -> httpx.Response:
+        request = self._send(url, parameters, headers, payload)
+        hedge_after = CONFIG.semantic_scholar.hedge_after
+
+        if hedge_after is None:
+            return await request
+
+        tasks = {asyncio.ensure_future(request)}
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+
+            # Hedge only with a spare token, never beyond the quota
+            if not done and self._bucket.try_acquire():
+                METRICS.increment(f"{metric}.hedged")
+                tasks.add(
+                    asyncio.ensure_future(self._send(url, parameters, headers, payload))
+                )
+
+            # The first response wins, errors only once no request is left
+            pending = tasks
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    return task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _send(
+        self, url: str, parameters: str, headers: dict, payload: dict | None
+    ) -> httpx.Response:
+        parameters = parameters.lstrip("&")
+        method = "POST" if payload else "GET"
+
+        client = await http_client.get_client()
+        return await client.request(
+            method,
+            url,
+            params=parameters,
+            timeout=self._timeout,
+            headers=headers,
+            json=payload,
+        )
+
+    @staticmethod
+    def _parse(r: httpx.Response) -> dict | list[dict]:
+        data = {}
+        if r.status_code == 200:
+            data = r.json()
+            if len(data) == 1 and "error" in data:
+                data = {}
+        elif r.status_code == 400:
+            raise BadQueryParametersException(r.json()["error"])
+        elif r.status_code == 403:
+            raise PermissionError("HTTP status 403 Forbidden.")
+        elif r.status_code == 404:
+            raise ObjectNotFoundException(r.json()["error"])
+
+        return data
+
+    @staticmethod
+    def _get_error(r: httpx.Response, retry_after: float) -> Exception:
+        if r.status_code == 429:
+            return UpstreamThrottledError("semantic_scholar", retry_after)
+
+        try:
+            message = r.json()["message"]
+        except Exception:
+            message = f"HTTP status {r.status_code}."
+
+        if r.status_code == 504:
+            return GatewayTimeoutException(message)
+
+        return InternalServerErrorException(message)
+
+    @staticmethod
+    def _get_retry_after(r: httpx.Response) -> float | None:
+        retry_after = r.headers.get("Retry-After", "")
+
+        if not retry_after.isdigit():
+            return None
+
+        return min(float(retry_after), MAX_RETRY_AFTER)
+
+
 class CustomAsyncSemanticScholar(AsyncSemanticScholar):
+    def __init__(self) -> None:
+        super().__init__(
+            api_key=CONFIG.semantic_scholar.api_key,
+            api_url=CONFIG.semantic_scholar.api_url,
+        )
+        self._requester = ResilientApiRequester(self._timeout, self._retry)
+
     async def get_autocomplete(self, query: str) -> list[Autocomplete]:
         """Get autocomplete suggestions for a query.
 
@@ -70,67 +361,114 @@ class CustomAsyncSemanticScholar(AsyncSemanticScholar):
 SCHOLAR = CustomAsyncSemanticScholar()
 
 
-async def get_recommendations(ids: list[str], limit: int) -> list[Paper]:
+async def get_recommendations(
+    ids: list[str], limit: int, profile: FieldProfile = "card"
+) -> list[PaperRecord]:
     """Get recommendations for a list of IDs.
 
     Args:
         dois (list[str]): List of IDs.
         limit (int): Limit of recommendations.
+        profile (FieldProfile, optional): Fields to request. Defaults to "card".
 
     Returns:
-        list[Paper]: List of recommended papers.
+        list[PaperRecord]: List of recommended papers.
     """
-    papers = await SCHOLAR.get_recommended_papers_from_lists(ids, limit=limit)
-    return [__sanitize_paper(paper) for paper in papers]
+    url = SCHOLAR.api_url + SCHOLAR.BASE_PATH_RECOMMENDATIONS + "/papers/"
+    parameters = f"&fields={','.join(FIELD_PROFILES[profile])}&limit={limit}"
+    payload = {"positivePaperIds": ids, "negativePaperIds": None}
 
+    data = await SCHOLAR._requester.get_data_async(
+        url, parameters, SCHOLAR.auth_header, payload
+    )
 
-async def exists(id: str) -> bool:
-    """Check if a paper exists by ID.
+    return [build_paper(item) for item in data.get("recommendedPapers", [])]
+
+
+async def get_batch_data(
+    ids: list[str], profile: FieldProfile = "card", fields: list[str] | None = None
+) -> list[dict | None]:
+    """Get raw paper records with one batch request.
 
     Args:
-        id (str): Paper ID.
+        ids (list[str]): List of at most 500 paper IDs.
+        profile (FieldProfile, optional): Fields to request. Defaults to "card".
+        fields (list[str] | None, optional): Fields to request instead of the
+            profile. Defaults to None.
 
     Returns:
-        bool: True if paper exists, False otherwise.
+        list[dict | None]: Records in the order of the IDs, None for unknown
+            papers.
+
+    Raises:
+        Exception: If the response is not one record per ID.
     """
-    try:
-        await SCHOLAR.get_paper(id, fields=["paperId"])
-    except ObjectNotFoundException:
-        return False
+    url = SCHOLAR.api_url + SCHOLAR.BASE_PATH_GRAPH + "/paper/batch"
+    parameters = f"&fields={','.join(fields or FIELD_PROFILES[profile])}"
+
+    data = await SCHOLAR._requester.get_data_async(
+        url, parameters, SCHOLAR.auth_header, {"ids": ids}
+    )
 
-    return True
+    # Error bodies and unexpected statuses are returned as an empty dict,
+    # they must not read as papers that do not exist
+    if not isinstance(data, list) or len(data) != len(ids):
+        raise Exception("Unexpected response to paper batch request.")
 
+    return data
 
-async def find_by_id(id: str) -> Paper | None:
-    """Find a paper by ID.
+
+async def get_checked_batch_data(
+    ids: list[str], profile: FieldProfile = "card", fields: list[str] | None = None
+) -> list[dict | None]:
+    """Get raw paper records, IDs the API rejects are treated as unknown.
+
+    One malformed ID makes the API reject the whole batch, so a rejected
+    batch is split in halves until the malformed IDs are found.
 
     Args:
-        id (str): Paper ID.
+        ids (list[str]): List of at most 500 paper IDs.
+        profile (FieldProfile, optional): Fields to request. Defaults to "card".
+        fields (list[str] | None, optional): Fields to request instead of the
+            profile. Defaults to None.
 
     Returns:
-        Paper | None: Paper object if found, None otherwise.
+        list[dict | None]: Records in the order of the IDs, None for unknown
+            and malformed IDs.
     """
     try:
-        paper = await SCHOLAR.get_paper(id)
-    except ObjectNotFoundException:
-        return None
+        return await get_batch_data(ids, profile, fields)
+    except BadQueryParametersException:
+        if len(ids) == 1:
+            METRICS.increment("semantic_scholar.rejected_ids")
+            return [None]
+
+    METRICS.increment("semantic_scholar.split_batches")
+    middle = len(ids) // 2
+    halves = await asyncio.gather(
+        get_checked_batch_data(ids[:middle], profile, fields),
+        get_checked_batch_data(ids[middle:], profile, fields),
+    )
 
-    return __sanitize_paper(paper)
+    return halves[0] + halves[1]
 
 
 async def find_many_by_ids(
-    ids: list[str], fields: list[str] | None = None
-) -> list[Paper]:
+    ids: list[str], profile: FieldProfile = "card", fields: list[str] | None = None
+) -> list[PaperRecord]:
     """Find many papers by IDs.
 
     Args:
         ids (list[str]): List of paper IDs.
+        profile (FieldProfile, optional): Fields to request. Defaults to "card".
+        fields (list[str] | None, optional): Fields to request instead of the
+            profile, for partial updates. Defaults to None.
 
     Returns:
-        list[Paper]: List of papers.
+        list[PaperRecord]: Found papers, unknown papers are left out.
     """
-    papers = await SCHOLAR.get_papers(ids, fields=fields)
-    return [__sanitize_paper(paper) for paper in papers]
+    data = await get_batch_data(ids, profile, fields)
+    return [build_paper(item) for item in data if item is not None]
 
 
 async def find_many(
@@ -144,9 +482,13 @@ async def find_many(
     min_citation_count: int | None = None,
     limit: int = 100,
     offset: int = 0,
-) -> tuple[list[Paper], int]:
+    profile: FieldProfile = "card",
+) -> tuple[list[PaperRecord], int]:
     """Find many papers with pagination.
 
+    With the local corpus search mode, the imported corpus answers the search
+    and only searches without local match are sent upstream.
+
     Args:
         query (str): Query to search for.
         publication_types (list[str] | None, optional): Publication types. Defaults to None.
@@ -158,10 +500,33 @@ async def find_many(
         min_citation_count (int | None, optional): Minimum citation count. Defaults to None.
         limit (int, optional): Limit of results. Defaults to 100.
         offset (int, optional): Offset of results. Defaults to 0.
+        profile (FieldProfile, optional): Fields to request. Defaults to "card".
 
     Returns:
-        tuple[list[Paper], int]: List of papers and total count.
+        tuple[list[PaperRecord], int]: List of papers and total count.
     """
+    if CONFIG.corpus.search == "local":
+        filter = corpus.build_filter(
+            "" if query == MATCH_ALL_QUERY else query,
+            publication_types,
+            open_access_pdf,
+            venues,
+            [__FIELD_OF_STUDY_MAP[field] for field in fields_of_study or []],
+            publication_date_start,
+            publication_date_end,
+            min_citation_count,
+        )
+        records, total = await corpus.find_many(
+            filter, FIELD_PROFILES[profile], limit, offset
+        )
+
+        # Searches the local corpus cannot answer go upstream
+        if total > 0 or not CONFIG.corpus.fallback:
+            METRICS.increment("corpus.search.local")
+            return [build_paper(record) for record in records], total
+
+        METRICS.increment("corpus.search.fallback")
+
     query = __build_query(
         query,
         publication_types,
@@ -175,19 +540,19 @@ async def find_many(
     url = SCHOLAR.api_url + SCHOLAR.BASE_PATH_GRAPH + "/paper/search"
     pagination = PaginatedResults(
         requester=SCHOLAR._requester,
-        data_type=Paper,
+        data_type=build_paper,
         url=url,
         query=query,
-        fields=Paper.SEARCH_FIELDS,
+        fields=FIELD_PROFILES[profile],
         headers=SCHOLAR.auth_header,
         limit=limit,
     )
 
     pagination._offset = offset - limit + 1
     pagination._next = pagination._offset + limit
-    papers: list[Paper] = await pagination._async_get_next_page()
+    papers: list[PaperRecord] = await pagination._async_get_next_page()
 
-    return [__sanitize_paper(paper) for paper in papers], pagination._total
+    return papers, pagination._total
 
 
 async def get_autocomplete(query: str) -> list[Autocomplete]:
@@ -202,17 +567,29 @@ async def get_autocomplete(query: str) -> list[Autocomplete]:
     return await SCHOLAR.get_autocomplete(query)
 
 
-def __sanitize_paper(paper: Paper) -> Paper:
+def build_paper(data: dict) -> PaperRecord:
+    """Build a paper from a raw Semantic Scholar record.
+
+    Args:
+        data (dict): Raw paper record.
+
+    Returns:
+        PaperRecord: Sanitized paper.
+    """
+    return __sanitize_paper(PaperRecord(data))
+
+
+def __sanitize_paper(paper: PaperRecord) -> PaperRecord:
     """Sanitize paper object.
 
     Args:
-        paper (Paper): Paper object.
+        paper (PaperRecord): Paper object.
 
     Returns:
-        Paper: Sanitized paper object.
+        PaperRecord: Sanitized paper object.
     """
     if not paper.openAccessPdf and paper.externalIds and paper.externalIds.get("ArXiv"):
-        paper._openAccessPdf = {
+        paper.openAccessPdf = {
             "url": f"https://arxiv.org/pdf/{paper.externalIds['ArXiv']}"
         }
 
@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+from src.monitoring.metrics import METRICS
+
+
+KeyType = TypeVar("KeyType", bound=Hashable)
+ValueType = TypeVar("ValueType")
+
+
+class TTLCache(Generic[KeyType, ValueType]):
+    """Bounded in-process LRU cache whose entries expire after a time to live.
+
+    Expired entries can be kept for a further `stale_ttl` and read with
+    `get_stale`, so callers can serve them while they refresh the value.
+    Hits, misses and the cache size are exported as metrics under
+    `cache.<name>`.
+    """
+
+    def __init__(
+        self, name: str, max_size: int, ttl: float, stale_ttl: float = 0
+    ) -> None:
+        self._name = name
+        self._max_size = max_size
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._entries: OrderedDict[KeyType, tuple[ValueType, float]] = OrderedDict()
+
+        METRICS.register_gauge(f"cache.{name}.size", lambda: len(self._entries))
+
+    def get(self, key: KeyType) -> ValueType | None:
+        """Get a value that has not expired yet.
+
+        Args:
+            key (KeyType): Cache key.
+
+        Returns:
+            ValueType | None: Cached value or None on a miss.
+        """
+        entry = self.get_stale(key)
+
+        if entry is None or not entry[1]:
+            return None
+
+        return entry[0]
+
+    def get_stale(self, key: KeyType) -> tuple[ValueType, bool] | None:
+        """Get a value that has not expired yet or is still within its stale
+        period.
+
+        Args:
+            key (KeyType): Cache key.
+
+        Returns:
+            tuple[ValueType, bool] | None: Cached value and whether it is
+                still fresh, or None on a miss.
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None and entry[1] + self._stale_ttl <= now:
+            del self._entries[key]
+            entry = None
+
+        if entry is None:
+            METRICS.increment(f"cache.{self._name}.misses")
+            return None
+
+        self._entries.move_to_end(key)
+        fresh = entry[1] > now
+        METRICS.increment(f"cache.{self._name}.{'hits' if fresh else 'stale_hits'}")
+        return entry[0], fresh
+
+    def set(self, key: KeyType, value: ValueType, ttl: float | None = None) -> None:
+        """Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key (KeyType): Cache key.
+            value (ValueType): Value to store.
+            ttl (float | None, optional): Seconds until the value expires.
+                Defaults to the TTL of the cache.
+        """
+        expires_at = time.monotonic() + (self._ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: KeyType) -> None:
+        """Remove a value.
+
+        Args:
+            key (KeyType): Cache key.
+        """
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
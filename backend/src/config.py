@@ -1,4 +1,4 @@
-import os
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import BaseModel
@@ -16,24 +16,236 @@ class MongoSettings(BaseModel):
     db_name: str = "paperhub"
 
 
+class ThumbnailRendition(BaseModel):
+
+    width: int
+    format: str
+    quality: int = 50
+
+
 class ThumbnailSettings(BaseModel):
 
+    # fallback rendition, stored under the paper ID
     width: int = 600
     format: str = "jpg"
     quality: int = 50
-    local_folder: str = "thumbnails"
+
+    # further renditions rendered from the same rasterization, formats the
+    # installed Pillow cannot encode are skipped. AVIF encodes many times
+    # slower than the page rasterizes, see benchmarks/render.py
+    renditions: list[ThumbnailRendition] = [
+        ThumbnailRendition(width=width, format="webp") for width in (200, 400, 600)
+    ]
+
+    # rasterizer of the first page: pdf2image, pdftocairo or pymupdf, see
+    # benchmarks/render.py to compare them
+    render_engine: str = "pdf2image"
+    # rasterization process pool, defaults to the number of CPUs
+    render_workers: int | None = None
+    # renders submitted to the pool at once, further renders wait for a slot
+    render_queue_size: int = 32
+    # seconds to wait for a free slot before giving up on a thumbnail
+    render_queue_timeout: float = 30
+
+    # PDFs are streamed to a temporary file and aborted beyond these limits
+    download_max_bytes: int = 50 * 1024 * 1024
+    # seconds for the whole download, including redirects
+    download_timeout: float = 60
+    download_chunk_size: int = 64 * 1024
+
+    # background workers processing the thumbnail job queue
+    job_workers: int = 10
+    job_max_attempts: int = 3
+    # seconds before the first retry, doubled on every further attempt
+    job_retry_delay: float = 60
+    # seconds a claimed job stays locked before another worker may take it
+    job_lease: float = 300
+    # seconds between lease renewals of running jobs, None lets jobs that run
+    # longer than the lease be claimed by another worker
+    job_lease_renewal: float | None = 60
+    # seconds between polls of the job queue when idle
+    job_poll_interval: float = 1
+
+    # thumbnails and failures remembered in process
+    index_size: int = 100_000
+    # seconds before a paper whose thumbnail failed is tried again
+    failure_retry_after: float = 86_400
+
+
+class HttpSettings(BaseModel):
+
+    # outbound HTTP client shared by PDF downloads and the Semantic Scholar API
+    http2: bool = True
+    max_connections: int = 100
+    # idle connections kept open for reuse, and for how many seconds
+    max_keepalive_connections: int = 40
+    keepalive_expiry: float = 60
+    connect_timeout: float = 5
+    timeout: float = 30
+    connect_retries: int = 1
+
+
+class FetchHostLimit(BaseModel):
+
+    # concurrent fetches, adapted between min and max
+    initial_concurrency: int = 2
+    min_concurrency: int = 1
+    max_concurrency: int = 6
+    # seconds between the starts of two fetches
+    min_interval: float = 0.25
+
+
+class FetchSettings(BaseModel):
+
+    # limits of hosts without an entry in hosts
+    default: FetchHostLimit = FetchHostLimit()
+    hosts: dict[str, FetchHostLimit] = {
+        "arxiv.org": FetchHostLimit(
+            initial_concurrency=1, max_concurrency=2, min_interval=1
+        ),
+    }
+
+    # concurrency is multiplied by this on 429/503 responses and slow hosts
+    backoff: float = 0.5
+    # seconds a host is paused after a 429/503 response without Retry-After
+    throttle_pause: float = 30
+    # seconds until the response headers after which a host counts as slow
+    slow_response: float = 10
+    # hosts whose limits are tracked, idle hosts are forgotten beyond this
+    max_hosts: int = 10_000
+
+
+class SemanticScholarSettings(BaseModel):
+
+    api_key: str | None = None
+    # base URL of the API, for example of a local stand-in server
+    api_url: str | None = None
+    # requests per second and burst, sized to the API quota
+    rate: float = 10
+    burst: int = 10
+    # attempts per request on 429, 5xx and connection errors
+    max_attempts: int = 4
+    # seconds before the first retry, doubled per attempt with full jitter
+    backoff: float = 0.5
+    backoff_max: float = 10
+    # consecutive failed requests that open the circuit
+    breaker_failures: int = 5
+    # seconds the circuit stays open before a request probes the upstream
+    breaker_reset: float = 30
+    # seconds before a slow request is sent again, None disables hedging
+    hedge_after: float | None = None
+
+
+class PaperCacheSettings(BaseModel):
+
+    # seconds until a field group of a cached paper is fetched again
+    metadata_ttl: float = 30 * 86_400
+    access_ttl: float = 7 * 86_400
+    counts_ttl: float = 86_400
+
+
+class SearchCacheSettings(BaseModel):
+
+    # seconds a search result is fresh
+    ttl: float = 60
+    # seconds an expired result is still served while it is refreshed
+    stale_ttl: float = 600
+    max_size: int = 10_000
+
+
+class CorpusSettings(BaseModel):
+
+    # "local" answers searches from the imported corpus instead of upstream
+    search: Literal["upstream", "local"] = "upstream"
+    # searches without local match are sent upstream
+    fallback: bool = True
+
+
+class AutocompleteSettings(BaseModel):
+
+    # suggestions per query, queries with fewer local matches go upstream
+    limit: int = 10
+    # titles kept in the prefix index, the least popular are dropped beyond
+    max_papers: int = 200_000
+    # new title keys collected before they are merged into the index
+    merge_threshold: int = 5_000
+    # index keys scanned per query
+    max_scan: int = 2_000
+
+    # suggestions remembered per prefix
+    cache_size: int = 10_000
+    cache_ttl: float = 3600
+
+
+class LikeSettings(BaseModel):
+
+    # paper IDs known to exist, likes of other papers are verified later
+    known_papers_size: int = 500_000
+    # seconds between checks of unverified likes
+    reconcile_interval: float = 60
+    # seconds a new unverified like waits for others to share its check
+    reconcile_delay: float = 1
+    # likes checked per batch request, at most 500
+    reconcile_batch_size: int = 500
+
+
+class RecommenderSettings(BaseModel):
+
+    # most recent likes of a user that count as co-likes
+    max_user_likes: int = 500
+    # co-like increments collected before they are merged into the matrix
+    merge_threshold: int = 100_000
+    # seconds between rebuilds from the like collection
+    rebuild_interval: float = 6 * 3600
+
+
+class EmbeddingSettings(BaseModel):
+
+    # directory of the memory-mapped vectors and the index
+    directory: str = "embeddings"
+    # Semantic Scholar embedding model and its dimensions
+    model: Literal["specter_v1", "specter_v2"] = "specter_v2"
+    dimensions: int = 768
+    # lists of the index scored per query
+    probes: int = 8
+    # vectors searched exactly before the index is split into lists
+    min_train_size: int = 20_000
+
+    # papers waiting for their embedding, more are dropped
+    queue_size: int = 50_000
+    # embeddings fetched per upstream request
+    fetch_batch_size: int = 100
+    # seconds new papers wait for others to share their request
+    fetch_delay: float = 2
 
 
 class FeedSettings(BaseModel):
 
     num_positive_samples: int = 50
+    # "upstream", "local" co-likes filled up from upstream, or a "blend" of both
+    source: Literal["upstream", "local", "blend"] = "blend"
+    # share of local recommendations in a blended feed
+    local_share: float = 0.5
 
 
 class S3Settings(BaseModel):
 
     thumbnails_bucket: str = "thumbnails"
-    thumbnail_content_type: str = "image/jpeg"
     presigned_url_expiry: int = 3600
+    # presigned URLs are reused until this many seconds before they expire
+    presigned_url_safety_margin: int = 300
+    presigned_url_cache_size: int = 100_000
+    thumbnail_cache_control: str = "max-age=3600"
+
+    # base URL of the thumbnails bucket if it is anonymous-readable, thumbnails
+    # are then linked directly instead of through presigned URLs
+    public_url: str | None = None
+
+    # connection pool of the shared async client
+    max_pool_connections: int = 50
+    connect_timeout: float = 5
+    read_timeout: float = 30
+    max_attempts: int = 3
 
     # only used locally because of internal presigned URL generation
     dev_endpoint: str | None = None
@@ -56,6 +268,36 @@ class Settings(BaseSettings):
     # Thumbnail settings
     thumbnail: ThumbnailSettings = ThumbnailSettings()
 
+    # Outbound HTTP settings
+    http: HttpSettings = HttpSettings()
+
+    # PDF fetch scheduling settings
+    fetch: FetchSettings = FetchSettings()
+
+    # Semantic Scholar API client settings
+    semantic_scholar: SemanticScholarSettings = SemanticScholarSettings()
+
+    # Semantic Scholar paper cache settings
+    paper_cache: PaperCacheSettings = PaperCacheSettings()
+
+    # Search result cache settings
+    search_cache: SearchCacheSettings = SearchCacheSettings()
+
+    # Local paper corpus settings
+    corpus: CorpusSettings = CorpusSettings()
+
+    # Autocomplete settings
+    autocomplete: AutocompleteSettings = AutocompleteSettings()
+
+    # Like settings
+    likes: LikeSettings = LikeSettings()
+
+    # Co-like recommender settings
+    recommender: RecommenderSettings = RecommenderSettings()
+
+    # Paper embedding settings
+    embeddings: EmbeddingSettings = EmbeddingSettings()
+
     # Feed settings
     feed: FeedSettings = FeedSettings()
 
@@ -68,7 +310,3 @@ class Settings(BaseSettings):
 
 CONFIG = Settings()
 """Global configuration object."""
-
-
-if not os.path.exists(CONFIG.thumbnail.local_folder):
-    os.makedirs(os.path.abspath(CONFIG.thumbnail.local_folder))
@@ -0,0 +1,35 @@
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config import CONFIG
+from src.likes.models import Like
+from src.libraries.models import Library
+from src.papers.corpus import CorpusPaper
+from src.papers.models import CachedPaper, ThumbnailJob
+from src.users.models import User
+
+
+DOCUMENT_MODELS = [User, Library, Like, ThumbnailJob, CachedPaper, CorpusPaper]
+
+
+async def connect() -> AsyncIOMotorClient:
+    """Connect to MongoDB and initialize Beanie.
+
+    Returns:
+        AsyncIOMotorClient: MongoDB client, to be closed by the caller.
+
+    Raises:
+        Exception: If the database does not answer the ping.
+    """
+    client = AsyncIOMotorClient(CONFIG.mongo.uri)
+    db = client.get_database(CONFIG.mongo.db_name)
+
+    ping_response = await db.command("ping")
+
+    if int(ping_response["ok"]) != 1:
+        client.close()
+        raise Exception("Problem connecting to database cluster.")
+
+    await init_beanie(db, document_models=DOCUMENT_MODELS)
+
+    return client
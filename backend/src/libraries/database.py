@@ -2,7 +2,6 @@ from datetime import datetime
 
 from beanie import PydanticObjectId
 from fastapi import HTTPException, status
-from semanticscholar.Paper import Paper
 
 from src.dependencies import Pagination
 from src.libraries.models import (
@@ -17,7 +16,11 @@ from src.libraries.models import (
 from src.adapters import semantic_scholar_adapter as ss_adapter
 from src.models import PaginatedResponse
 from src.papers.models import PaperResponse
-from src.papers.thumbnail import generate_thumbnails
+from src.papers.autocomplete import AUTOCOMPLETE_INDEX
+from src.papers.embeddings import EMBEDDINGS
+from src.papers.known_papers import KNOWN_PAPERS
+from src.papers.paper_cache import PAPER_CACHE
+from src.papers.thumbnail import get_thumbnails
 from src.util import get_pagination_aggregation
 from src.likes import database as likes_db
 
@@ -85,7 +88,7 @@ async def get_one(
 
 async def get_papers(
     library_id: PydanticObjectId, pagination: Pagination, uid: str | None = None
-) -> PaginatedResponse[PaperResponse]:
+) -> tuple[int, list[dict]]:
     query = [Library.id == library_id]
 
     if uid is not None:
@@ -99,30 +102,31 @@ async def get_papers(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
     if len(library.papers) == 0:
-        return PaginatedResponse[PaperResponse](data=[], total=0)
+        return 0, []
 
     paper_ids = library.papers[pagination.offset : pagination.offset + pagination.limit]
-    papers = await ss_adapter.find_many_by_ids(paper_ids)
+    papers = await PAPER_CACHE.find_many_by_ids(paper_ids)
+    AUTOCOMPLETE_INDEX.add_papers(papers)
+    KNOWN_PAPERS.add_papers(papers)
+    EMBEDDINGS.add_papers(papers)
 
     like_counts = await likes_db.get_paper_like_counts([p.paperId for p in papers])
 
     thumbnail_urls = [
         (p.openAccessPdf["url"], p.paperId) for p in papers if p.openAccessPdf
     ]
-    presigned_urls = (
-        await generate_thumbnails(thumbnail_urls) if len(thumbnail_urls) > 0 else {}
-    )
+    thumbnails = await get_thumbnails(thumbnail_urls)
 
     papers = [
-        PaperResponse.from_semantic_scholar(
+        PaperResponse.serialize(
             p,
             like_counts[p.paperId],
-            presigned_urls[p.paperId] if p.paperId in presigned_urls else None,
+            thumbnails.get(p.paperId),
         )
         for p in papers
     ]
 
-    return PaginatedResponse[PaperResponse](data=papers, total=len(library.papers))
+    return len(library.papers), papers
 
 
 async def update(
@@ -180,6 +184,7 @@ async def add_papers(
     library.papers = new_papers
     library.updated_at = datetime.now()
     library = await library.save()
+    EMBEDDINGS.enqueue(valid_paper_ids)
 
     return library
 
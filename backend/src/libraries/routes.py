@@ -2,6 +2,7 @@ from typing import Annotated
 
 from beanie import PydanticObjectId
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
 
 from src.auth.dependencies import current_user_id
 from src.dependencies import Pagination
@@ -78,12 +79,12 @@ async def get_library(
     return LibraryResponse(**library.model_dump())
 
 
-@router.get("/{library_id}/papers")
+@router.get("/{library_id}/papers", response_model=PaginatedResponse[PaperResponse])
 async def get_library_papers(
     library_id: PydanticObjectId,
     pagination: Annotated[Pagination, Depends(Pagination)],
     uid: Annotated[str, Depends(current_user_id)],
-) -> PaginatedResponse[PaperResponse]:
+) -> JSONResponse:
     """Get all papers in a library.
 
     Args:
@@ -94,7 +95,8 @@ async def get_library_papers(
     Returns:
         PaginatedResponse[PaperResponse]: The papers in the library.
     """
-    return await libraries_db.get_papers(library_id, pagination, uid)
+    total, papers = await libraries_db.get_papers(library_id, pagination, uid)
+    return JSONResponse({"data": papers, "total": total})
 
 
 @router.get("/public/{library_id}")
@@ -114,11 +116,13 @@ async def get_public_library(library_id: PydanticObjectId) -> LibraryResponse:
     return LibraryResponse(**library.model_dump())
 
 
-@router.get("/public/{library_id}/papers")
+@router.get(
+    "/public/{library_id}/papers", response_model=PaginatedResponse[PaperResponse]
+)
 async def get_public_library_papers(
     library_id: PydanticObjectId,
     pagination: Annotated[Pagination, Depends(Pagination)],
-) -> PaginatedResponse[PaperResponse]:
+) -> JSONResponse:
     """Get all papers in a library.
 
     Args:
@@ -128,7 +132,8 @@ async def get_public_library_papers(
     Returns:
         PaginatedResponse[PaperResponse]: The papers in the library.
     """
-    return await libraries_db.get_papers(library_id, pagination)
+    total, papers = await libraries_db.get_papers(library_id, pagination)
+    return JSONResponse({"data": papers, "total": total})
 
 
 @router.patch("/{library_id}")
@@ -3,27 +3,44 @@ from fastapi import HTTPException, status
 from beanie.operators import In
 from pymongo.errors import DuplicateKeyError
 
+from src.adapters import semantic_scholar_adapter as ss_adapter
 from src.dependencies import Pagination
 from src.likes.models import Like
-from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.likes.reconciler import LIKE_RECONCILER
+from src.likes.recommender import RECOMMENDER
+from src.monitoring.metrics import METRICS
 from src.models import PaginatedResponse
 from src.papers.models import PaperResponse
-from src.papers.thumbnail import generate_thumbnails
+from src.papers.autocomplete import AUTOCOMPLETE_INDEX
+from src.papers.embeddings import EMBEDDINGS
+from src.papers.known_papers import KNOWN_PAPERS
+from src.papers.paper_cache import PAPER_CACHE
+from src.papers.thumbnail import get_thumbnails
 from src.users.models import User, UserLeanView
 from src.util import get_pagination_aggregation
 
 
 async def create(paper_id: str, uid: str):
-    paper_exists = await ss_adapter.exists(paper_id)
-
-    if not paper_exists:
+    if not ss_adapter.is_paper_id(paper_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
+    # Likes of unknown papers are inserted now and verified in the background
+    verified = paper_id in KNOWN_PAPERS
+
     try:
-        await Like(paper_id=paper_id, user_id=uid).create()
+        await Like(paper_id=paper_id, user_id=uid, verified=verified).create()
     except DuplicateKeyError:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT)
 
+    # External IDs are counted once the reconciler resolved them
+    if ss_adapter.PAPER_ID_PATTERN.fullmatch(paper_id):
+        RECOMMENDER.add(uid, paper_id)
+        EMBEDDINGS.enqueue([paper_id])
+
+    if not verified:
+        METRICS.increment("likes.unverified")
+        LIKE_RECONCILER.wake()
+
 
 async def get_likes_for_paper(
     paper_id: str, pagination: Pagination
@@ -53,7 +70,7 @@ async def get_likes_for_paper(
 
 async def get_likes_for_user(
     uid: str, pagination: Pagination
-) -> tuple[int, list[PaperResponse]]:
+) -> tuple[int, list[dict]]:
     likes = (
         await Like.find(Like.user_id == uid)
         .aggregate(
@@ -68,20 +85,23 @@ async def get_likes_for_user(
     if total_likes == 0:
         return total_likes, []
 
-    papers = await ss_adapter.find_many_by_ids([l.paper_id for l in likes])
+    papers = await PAPER_CACHE.find_many_by_ids([l.paper_id for l in likes])
+    AUTOCOMPLETE_INDEX.add_papers(papers)
+    KNOWN_PAPERS.add_papers(papers)
+    EMBEDDINGS.add_papers(papers)
 
     thumbnail_urls = [
         (p.openAccessPdf["url"], p.paperId) for p in papers if p.openAccessPdf
     ]
-    presigned_urls = await generate_thumbnails(thumbnail_urls)
+    thumbnails = await get_thumbnails(thumbnail_urls)
 
     like_counts = await get_paper_like_counts([p.paperId for p in papers])
 
     papers = [
-        PaperResponse.from_semantic_scholar(
+        PaperResponse.serialize(
             p,
             like_counts[p.paperId],
-            presigned_urls[p.paperId] if p.paperId in presigned_urls else None,
+            thumbnails.get(p.paperId),
         )
         for p in papers
     ]
@@ -121,14 +141,18 @@ async def get_paper_like_counts(paper_ids: list[str]) -> dict[str, int]:
 
 
 async def delete(like_id: PydanticObjectId, uid: str):
-    result = await Like.find_one(Like.id == like_id, Like.user_id == uid).delete()
+    like = await Like.find_one(Like.id == like_id, Like.user_id == uid)
 
-    if result is None:
+    if like is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
-    if result.deleted_count == 0:
+    result = await like.delete()
+
+    if result is None or result.deleted_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
+    RECOMMENDER.remove(uid, like.paper_id)
+
 
 async def delete_by_paper_id(paper_id: str, uid: str):
     result = await Like.find_one(
@@ -140,3 +164,5 @@ async def delete_by_paper_id(paper_id: str, uid: str):
 
     if result.deleted_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    RECOMMENDER.remove(uid, paper_id)
@@ -8,11 +8,16 @@ class Like(Document):
     paper_id: str
     user_id: str
     created_at: datetime = Field(default_factory=datetime.now)
+    # False until the paper was checked to exist upstream
+    verified: bool = True
 
     # TODO: Add info for recommendation system here?
 
     class Settings:
-        indexes = [IndexModel([("paper_id", 1), ("user_id", 1)], unique=True)]
+        indexes = [
+            IndexModel([("paper_id", 1), ("user_id", 1)], unique=True),
+            IndexModel([("verified", 1)], partialFilterExpression={"verified": False}),
+        ]
 
 
 class LikePaperView(BaseModel):
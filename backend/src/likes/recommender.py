@@ -0,0 +1,419 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Iterable
+
+import numpy as np
+from scipy import sparse
+
+from src.config import CONFIG
+from src.likes.models import Like
+from src.monitoring.metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_co_likes(
+    user_codes: np.ndarray, paper_codes: np.ndarray, num_papers: int
+) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """Build the co-like matrix of likes.
+
+    Args:
+        user_codes (np.ndarray): User index of every like.
+        paper_codes (np.ndarray): Paper index of every like.
+        num_papers (int): Number of papers.
+
+    Returns:
+        tuple[sparse.csr_matrix, np.ndarray]: Symmetric paper by paper matrix
+            of the number of users who liked both papers, with an empty
+            diagonal, and the number of likes of every paper.
+    """
+    num_users = int(user_codes.max()) + 1 if user_codes.size else 0
+    likes = sparse.csr_matrix(
+        (np.ones(user_codes.size, dtype=np.float32), (user_codes, paper_codes)),
+        shape=(num_users, num_papers),
+    )
+    # Duplicate likes count once
+    likes.sum_duplicates()
+    likes.data[:] = 1
+
+    counts = np.asarray(likes.sum(axis=0), dtype=np.float32).ravel()
+    co_likes = (likes.T @ likes).tocsr()
+    co_likes = (co_likes - sparse.diags(co_likes.diagonal())).tocsr()
+    co_likes.eliminate_zeros()
+
+    return co_likes, counts
+
+
+def merge_co_likes(
+    co_likes: sparse.csr_matrix,
+    num_papers: int,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    data: np.ndarray,
+) -> sparse.csr_matrix:
+    """Add co-like increments to a co-like matrix.
+
+    Args:
+        co_likes (sparse.csr_matrix): Co-like matrix, left unchanged.
+        num_papers (int): Number of papers, the matrix is grown to it.
+        rows (np.ndarray): Paper index of every increment.
+        cols (np.ndarray): Index of the other paper of every increment.
+        data (np.ndarray): Increments.
+
+    Returns:
+        sparse.csr_matrix: New co-like matrix.
+    """
+    co_likes = co_likes.copy()
+    co_likes.resize((num_papers, num_papers))
+    co_likes = (
+        co_likes + sparse.csr_matrix((data, (rows, cols)), shape=co_likes.shape)
+    ).tocsr()
+    co_likes.eliminate_zeros()
+
+    return co_likes
+
+
+def get_like_codes(user_likes: dict[str, deque[int]]) -> tuple[np.ndarray, np.ndarray]:
+    """Get the user and paper index of every like.
+
+    Args:
+        user_likes (dict[str, deque[int]]): Paper indexes liked by every user.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: User indexes and paper indexes.
+    """
+    user_codes = np.repeat(
+        np.arange(len(user_likes)), [len(likes) for likes in user_likes.values()]
+    )
+    paper_codes = np.fromiter(
+        (paper for likes in user_likes.values() for paper in likes),
+        dtype=np.int64,
+        count=user_codes.size,
+    )
+
+    return user_codes, paper_codes
+
+
+class CoLikeRecommender:
+    """Item-to-item recommender built from the likes of all users.
+
+    Two papers are similar when the same users liked them, scored with the
+    cosine of their like vectors. The co-like counts are kept in a sparse
+    matrix that is rebuilt from the like collection in the background. New
+    likes and unlikes are collected as increments and merged into the matrix
+    in a thread once there are enough of them, so recommendations stay
+    current without a rebuild. Until the merged matrix is swapped in, the
+    old one and the increments are served. Only the most recent likes of a
+    user count.
+    """
+
+    def __init__(self) -> None:
+        self._paper_index: dict[str, int] = {}
+        self._paper_ids: list[str] = []
+        self._user_likes: dict[str, deque[int]] = {}
+        self._co_likes = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._counts = np.zeros(0, dtype=np.float32)
+        # co-like increments not merged into the matrix yet
+        self._delta: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        # increments being merged in a thread, served until the swap
+        self._merging: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._delta_size = 0
+        # changes with every rebuild, so a merge of an old matrix is dropped
+        self._version = 0
+        self._ready = False
+        self._task: asyncio.Task | None = None
+        self._merge_task: asyncio.Task | None = None
+
+        METRICS.register_gauge("recommender.papers", lambda: len(self._paper_ids))
+        METRICS.register_gauge(
+            "recommender.co_likes", lambda: self._co_likes.nnz + self._delta_size
+        )
+
+    def add(self, user_id: str, paper_id: str) -> None:
+        """Count a new like.
+
+        Args:
+            user_id (str): ID of the user who liked the paper.
+            paper_id (str): Paper ID.
+        """
+        if not self._ready:
+            return
+
+        paper = self._get_paper(paper_id)
+        likes = self._user_likes.setdefault(user_id, deque())
+
+        if paper in likes:
+            return
+
+        # The oldest like no longer counts
+        if len(likes) >= CONFIG.recommender.max_user_likes:
+            self._link(likes.popleft(), likes, -1)
+
+        self._link(paper, likes, 1)
+        likes.append(paper)
+        self._merge_if_full()
+
+    def remove(self, user_id: str, paper_id: str) -> None:
+        """Count a removed like.
+
+        Args:
+            user_id (str): ID of the user who liked the paper.
+            paper_id (str): Paper ID.
+        """
+        if not self._ready:
+            return
+
+        likes = self._user_likes.get(user_id)
+        paper = self._paper_index.get(paper_id)
+
+        if likes is None or paper not in likes:
+            return
+
+        likes.remove(paper)
+        self._link(paper, likes, -1)
+        self._merge_if_full()
+
+    def recommend(self, user_id: str, paper_ids: list[str], limit: int) -> list[str]:
+        """Get the papers most similar to papers a user liked.
+
+        Args:
+            user_id (str): User ID, papers the user liked are left out.
+            paper_ids (list[str]): Liked papers to find similar papers for.
+            limit (int): Number of recommendations.
+
+        Returns:
+            list[str]: Recommended paper IDs, best first. Fewer than the limit,
+                or none while the recommender is loading, if too few papers
+                were liked together with the given ones.
+        """
+        METRICS.increment("recommender.queries")
+        liked = np.unique(
+            [self._paper_index[p_id] for p_id in paper_ids if p_id in self._paper_index]
+        ).astype(np.int64)
+
+        if not self._ready or liked.size == 0:
+            METRICS.increment("recommender.empty")
+            return []
+
+        # Cosine of like vectors: co-likes / sqrt(likes of both papers)
+        weights = 1 / np.sqrt(np.maximum(self._counts[liked], 1))
+
+        scores = np.zeros(len(self._paper_ids))
+        merged = self._co_likes.shape[0]
+        base = liked[liked < merged]
+        # The matrix is symmetric, so its rows of the liked papers are columns
+        scores[:merged] = self._co_likes[base].T @ weights[: base.size]
+
+        if self._delta_size:
+            delta_rows, delta_cols, delta_data = self._consolidate_delta()
+            mask = np.isin(delta_rows, liked)
+            positions = np.searchsorted(liked, delta_rows[mask])
+            scores += np.bincount(
+                delta_cols[mask],
+                weights=delta_data[mask] * weights[positions],
+                minlength=scores.size,
+            )
+
+        candidates = np.flatnonzero(scores > 1e-6)
+        scores = scores[candidates] / np.sqrt(np.maximum(self._counts[candidates], 1))
+
+        excluded = np.concatenate(
+            [liked, np.fromiter(self._user_likes.get(user_id, ()), dtype=np.int64)]
+        )
+        keep = ~np.isin(candidates, excluded)
+        candidates, scores = candidates[keep], scores[keep]
+
+        if candidates.size > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            candidates, scores = candidates[top], scores[top]
+
+        order = np.argsort(-scores, kind="stable")
+        if candidates.size == 0:
+            METRICS.increment("recommender.empty")
+
+        return [self._paper_ids[i] for i in candidates[order]]
+
+    def start(self) -> None:
+        """Build the recommender from the like collection in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop rebuilding the recommender."""
+        for task in (self._task, self._merge_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+        self._task = None
+        self._merge_task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.exception(f"Recommender rebuild failed: {e}")
+
+            await asyncio.sleep(CONFIG.recommender.rebuild_interval)
+
+    async def rebuild(self) -> None:
+        """Rebuild the co-like matrix from the like collection.
+
+        Likes and unlikes during the rebuild may be missed until the next one.
+        """
+        start = time.perf_counter()
+        paper_index: dict[str, int] = {}
+        user_likes: dict[str, deque[int]] = {}
+        count = 0
+
+        # Natural order is about insertion order, so the most recent likes of
+        # a user are kept without sorting the whole collection
+        cursor = Like.get_motor_collection().find({}, {"paper_id": 1, "user_id": 1})
+        async for like in cursor:
+            self._collect(paper_index, user_likes, like["user_id"], like["paper_id"])
+            count += 1
+
+            if count % 1000 == 0:
+                await asyncio.sleep(0)
+
+        co_likes, counts = await asyncio.to_thread(
+            build_co_likes, *get_like_codes(user_likes), len(paper_index)
+        )
+        self._set(paper_index, user_likes, co_likes, counts)
+
+        METRICS.increment("recommender.rebuilds")
+        logger.info(
+            f"Recommender built from {count} likes of {len(paper_index)} papers "
+            f"with {co_likes.nnz} co-likes in {time.perf_counter() - start:.1f}s"
+        )
+
+    def load(self, likes: Iterable[tuple[str, str]]) -> None:
+        """Build the co-like matrix from likes, without the like collection.
+
+        Args:
+            likes (Iterable[tuple[str, str]]): User and paper IDs of the likes,
+                oldest first.
+        """
+        paper_index: dict[str, int] = {}
+        user_likes: dict[str, deque[int]] = {}
+
+        for user_id, paper_id in likes:
+            self._collect(paper_index, user_likes, user_id, paper_id)
+
+        co_likes, counts = build_co_likes(*get_like_codes(user_likes), len(paper_index))
+        self._set(paper_index, user_likes, co_likes, counts)
+
+    @staticmethod
+    def _collect(
+        paper_index: dict[str, int],
+        user_likes: dict[str, deque[int]],
+        user_id: str,
+        paper_id: str,
+    ) -> None:
+        paper = paper_index.setdefault(paper_id, len(paper_index))
+        likes = user_likes.setdefault(
+            user_id, deque(maxlen=CONFIG.recommender.max_user_likes)
+        )
+        likes.append(paper)
+
+    def _set(
+        self,
+        paper_index: dict[str, int],
+        user_likes: dict[str, deque[int]],
+        co_likes: sparse.csr_matrix,
+        counts: np.ndarray,
+    ) -> None:
+        self._paper_index = paper_index
+        self._paper_ids = list(paper_index)
+        self._user_likes = user_likes
+        self._co_likes = co_likes
+        self._counts = counts
+        self._delta = []
+        self._merging = None
+        self._delta_size = 0
+        self._version += 1
+        self._ready = True
+
+    def _get_paper(self, paper_id: str) -> int:
+        paper = self._paper_index.get(paper_id)
+
+        if paper is None:
+            paper = self._paper_index[paper_id] = len(self._paper_ids)
+            self._paper_ids.append(paper_id)
+
+            if paper >= self._counts.size:
+                self._counts = np.concatenate(
+                    [self._counts, np.zeros(max(paper, 1024), dtype=np.float32)]
+                )
+
+        return paper
+
+    def _link(self, paper: int, others: deque[int], sign: int) -> None:
+        self._counts[paper] += sign
+
+        if not others:
+            return
+
+        others = np.fromiter(others, dtype=np.int64, count=len(others))
+        this = np.full(others.size, paper, dtype=np.int64)
+        data = np.full(2 * others.size, sign, dtype=np.float32)
+        self._delta.append(
+            (np.concatenate([this, others]), np.concatenate([others, this]), data)
+        )
+        self._delta_size += data.size
+
+    def _consolidate_delta(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if len(self._delta) > 1:
+            self._delta = [tuple(np.concatenate(parts) for parts in zip(*self._delta))]
+
+        parts = self._delta if self._merging is None else [self._merging, *self._delta]
+        if len(parts) == 1:
+            return parts[0]
+
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    def _merge_if_full(self) -> None:
+        merging = self._merge_task is not None and not self._merge_task.done()
+        if merging or self._delta_size < CONFIG.recommender.merge_threshold:
+            return
+
+        self._merge_task = asyncio.create_task(self._merge())
+
+    async def _merge(self) -> None:
+        # New increments are collected apart while these are merged
+        self._consolidate_delta()
+        self._merging, self._delta = self._delta[0], []
+        version = self._version
+        rows, cols, data = self._merging
+
+        try:
+            co_likes = await asyncio.to_thread(
+                merge_co_likes,
+                self._co_likes,
+                len(self._paper_ids),
+                rows,
+                cols,
+                data,
+            )
+        except BaseException:
+            if self._version == version:
+                self._delta.insert(0, self._merging)
+                self._merging = None
+            raise
+
+        # A rebuild replaced the matrix and the increments meanwhile
+        if self._version != version:
+            return
+
+        self._co_likes = co_likes
+        self._delta_size -= data.size
+        self._merging = None
+        METRICS.increment("recommender.merges")
+
+
+RECOMMENDER = CoLikeRecommender()
+"""Global co-like recommender."""
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+
+from beanie.operators import In, Set
+from pymongo.errors import DuplicateKeyError
+
+from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.config import CONFIG
+from src.likes.models import Like
+from src.likes.recommender import RECOMMENDER
+from src.monitoring.metrics import METRICS
+from src.papers.embeddings import EMBEDDINGS
+from src.papers.known_papers import KNOWN_PAPERS
+
+
+logger = logging.getLogger(__name__)
+
+
+class LikeReconciler:
+    """Background task that verifies optimistically inserted likes.
+
+    Likes of papers not known to exist are inserted unverified. The
+    reconciler checks their paper IDs with one batch request, marks the
+    likes of existing papers as verified and deletes the others, including
+    likes of IDs the API rejects. Likes of external IDs, e.g. "DOI:...", are
+    moved to the paper ID they resolve to.
+    """
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+    def start(self) -> None:
+        """Start the reconciler."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the reconciler."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def wake(self) -> None:
+        """Reconcile soon, instead of waiting for the next interval."""
+        self._wake.set()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                # A full batch means more likes are waiting
+                while await self.reconcile() == CONFIG.likes.reconcile_batch_size:
+                    pass
+            except Exception as e:
+                logger.warning(f"Like reconciliation failed: {e}")
+
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(), timeout=CONFIG.likes.reconcile_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            # Let likes of the same burst gather into one batch
+            await asyncio.sleep(CONFIG.likes.reconcile_delay)
+            self._wake.clear()
+
+    async def reconcile(self) -> int:
+        """Verify one batch of unverified likes.
+
+        Returns:
+            int: Number of likes checked.
+        """
+        likes = (
+            await Like.find(Like.verified == False)
+            .limit(CONFIG.likes.reconcile_batch_size)
+            .to_list()
+        )
+
+        if len(likes) == 0:
+            return 0
+
+        paper_ids = list({like.paper_id for like in likes})
+        records = await ss_adapter.get_checked_batch_data(paper_ids, profile="id-only")
+
+        resolved = {
+            p_id: record["paperId"]
+            for p_id, record in zip(paper_ids, records)
+            if record and record["paperId"] != p_id
+        }
+        found = [
+            p_id
+            for p_id, record in zip(paper_ids, records)
+            if record and p_id not in resolved
+        ]
+        missing = [p_id for p_id, record in zip(paper_ids, records) if not record]
+
+        for paper_id in found + list(resolved.values()):
+            KNOWN_PAPERS.add(paper_id)
+
+        for like in likes:
+            if like.paper_id in resolved:
+                await self._resolve(like, resolved[like.paper_id])
+
+        if found:
+            await Like.find(In(Like.paper_id, found), Like.verified == False).update(
+                Set({Like.verified: True})
+            )
+
+        if missing:
+            result = await Like.find(
+                In(Like.paper_id, missing), Like.verified == False
+            ).delete()
+            METRICS.increment("likes.reconciler.deleted", result.deleted_count)
+
+            for like in likes:
+                if like.paper_id in missing:
+                    RECOMMENDER.remove(like.user_id, like.paper_id)
+
+            logger.info(f"Deleted likes of unknown papers {missing}")
+
+        METRICS.increment("likes.reconciler.checked", len(likes))
+        return len(likes)
+
+    async def _resolve(self, like: Like, paper_id: str) -> None:
+        # Merged papers resolve to another paper ID as well
+        RECOMMENDER.remove(like.user_id, like.paper_id)
+
+        try:
+            await Like.find_one(Like.id == like.id).update(
+                Set({Like.paper_id: paper_id, Like.verified: True})
+            )
+        except DuplicateKeyError:
+            # The user liked the paper under its paper ID as well
+            await like.delete()
+            return
+
+        RECOMMENDER.add(like.user_id, paper_id)
+        EMBEDDINGS.enqueue([paper_id])
+        METRICS.increment("likes.reconciler.resolved")
+
+
+LIKE_RECONCILER = LikeReconciler()
+"""Global like reconciler."""
@@ -1,6 +1,7 @@
 from typing import Annotated
 from beanie import PydanticObjectId
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
 
 from src.auth.dependencies import current_user_id
 from src.dependencies import Pagination
@@ -43,11 +44,11 @@ async def get_likes_for_paper(
     return PaginatedResponse[UserLeanView](total=total, data=users)
 
 
-@router.get("")
+@router.get("", response_model=PaginatedResponse[PaperResponse])
 async def get_likes_for_user(
     pagination: Annotated[Pagination, Depends(Pagination)],
     uid: Annotated[str, Depends(current_user_id)],
-) -> PaginatedResponse[PaperResponse]:
+) -> JSONResponse:
     """Get likes for a user.
 
     Args:
@@ -58,7 +59,7 @@ async def get_likes_for_user(
         PaginatedResponse[PaperResponse]: Paginated response with papers.
     """
     total, papers = await likes_db.get_likes_for_user(uid, pagination)
-    return PaginatedResponse[PaperResponse](total=total, data=papers)
+    return JSONResponse({"data": papers, "total": total})
 
 
 @router.delete("/{like_id}", status_code=status.HTTP_204_NO_CONTENT)
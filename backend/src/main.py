@@ -1,21 +1,29 @@
 import logging
+import math
 from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI
-from beanie import init_beanie
+from fastapi import Depends, FastAPI, Request, status
+from fastapi.responses import JSONResponse
 import firebase_admin
-from motor.motor_asyncio import AsyncIOMotorClient
 from starlette.middleware.cors import CORSMiddleware
 
+from src import database
+from src.adapters import http_client, s3_adapter
+from src.adapters.resilience import CircuitOpenError, UpstreamThrottledError
 from src.auth.dependencies import current_user
 from src.config import CONFIG
-from src.users.models import User
 from src.users.routes import router as UsersRouter
-from src.libraries.models import Library
 from src.libraries.routes import router as LibrariesRouter
 from src.papers.routes import router as PapersRouter
-from src.likes.models import Like
 from src.likes.routes import router as LikesRouter
+from src.monitoring.routes import router as MonitoringRouter
+from src.likes.reconciler import LIKE_RECONCILER
+from src.likes.recommender import RECOMMENDER
+from src.papers.autocomplete import AUTOCOMPLETE_INDEX
+from src.papers.embeddings import EMBEDDINGS
+from src.papers.known_papers import KNOWN_PAPERS
+from src.papers.render import RENDER_POOL
+from src.papers.thumbnail import THUMBNAIL_WORKERS
 
 
 logging.basicConfig(level=logging.INFO)
@@ -31,25 +39,64 @@ This API powers paperhub.
 async def lifespan(app: FastAPI):
     """Initializes application services."""
 
-    app.mongodb_client = AsyncIOMotorClient(CONFIG.mongo.uri)
+    app.mongodb_client = await database.connect()
     app.db = app.mongodb_client.get_database(CONFIG.mongo.db_name)
+    __logger.info("MongoDB connection and Beanie initialized successfully")
 
-    ping_response = await app.db.command("ping")
+    AUTOCOMPLETE_INDEX.start()
+    KNOWN_PAPERS.start()
+    __logger.info("Autocomplete index and known papers loading")
 
-    if int(ping_response["ok"]) != 1:
-        raise Exception("Problem connecting to database cluster.")
-
-    __logger.info("MongoDB connection initialized successfully")
-
-    await init_beanie(app.db, document_models=[User, Library, Like])
-    __logger.info("Beanie initialized successfully")
+    await http_client.start()
+    __logger.info("HTTP client initialized successfully")
 
     credential = firebase_admin.credentials.Certificate(CONFIG.firebase_cert_path)
     firebase_admin.initialize_app(credential=credential)
     __logger.info("Firebase app initialized successfully")
 
+    await s3_adapter.start()
+    __logger.info("S3 client initialized successfully")
+
+    RENDER_POOL.start()
+    __logger.info("Render pool initialized successfully")
+
+    THUMBNAIL_WORKERS.start()
+    __logger.info("Thumbnail workers started")
+
+    LIKE_RECONCILER.start()
+    __logger.info("Like reconciler started")
+
+    RECOMMENDER.start()
+    __logger.info("Recommender loading")
+
+    EMBEDDINGS.start()
+    __logger.info("Embedding index loading")
+
     yield
 
+    await RECOMMENDER.stop()
+
+    await EMBEDDINGS.stop()
+    __logger.info("Embedding index closed")
+
+    await LIKE_RECONCILER.stop()
+    __logger.info("Like reconciler stopped")
+
+    await THUMBNAIL_WORKERS.stop()
+    __logger.info("Thumbnail workers stopped")
+
+    RENDER_POOL.shutdown()
+    __logger.info("Render pool shut down")
+
+    await s3_adapter.close()
+    __logger.info("S3 client closed")
+
+    await AUTOCOMPLETE_INDEX.stop()
+    await KNOWN_PAPERS.stop()
+
+    await http_client.close()
+    __logger.info("HTTP client closed")
+
     app.mongodb_client.close()
     __logger.info("MongoDB connection closed")
 
@@ -69,7 +116,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    """Answers requests that need a failing upstream without waiting for it."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Upstream service unavailable"},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+@app.exception_handler(UpstreamThrottledError)
+async def upstream_throttled_handler(request: Request, exc: UpstreamThrottledError):
+    """Passes the throttling of an upstream on to the client."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Upstream service busy"},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 app.include_router(UsersRouter)
 app.include_router(PapersRouter, dependencies=[Depends(current_user)])
 app.include_router(LibrariesRouter, dependencies=[Depends(current_user)])
 app.include_router(LikesRouter, dependencies=[Depends(current_user)])
+app.include_router(MonitoringRouter, dependencies=[Depends(current_user)])
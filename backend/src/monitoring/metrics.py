@@ -0,0 +1,48 @@
+from collections import defaultdict
+from typing import Callable
+
+
+Gauge = Callable[[], int | float | dict]
+
+
+class MetricsRegistry:
+    """In-process registry of counters and gauges."""
+
+    def __init__(self) -> None:
+        self._counters: dict[str, int | float] = defaultdict(int)
+        self._gauges: dict[str, Gauge] = {}
+
+    def increment(self, name: str, value: int | float = 1) -> None:
+        """Increment a counter.
+
+        Args:
+            name (str): Counter name.
+            value (int | float, optional): Value to add. Defaults to 1.
+        """
+        self._counters[name] += value
+
+    def register_gauge(self, name: str, gauge: Gauge) -> None:
+        """Register a gauge that is evaluated on every snapshot.
+
+        Args:
+            name (str): Gauge name.
+            gauge (Gauge): Callable returning the current value.
+        """
+        self._gauges[name] = gauge
+
+    def snapshot(self) -> dict[str, int | float | dict]:
+        """Get the current value of all counters and gauges.
+
+        Returns:
+            dict[str, int | float | dict]: Metric names and values.
+        """
+        metrics = dict(self._counters)
+
+        for name, gauge in self._gauges.items():
+            metrics[name] = gauge()
+
+        return dict(sorted(metrics.items()))
+
+
+METRICS = MetricsRegistry()
+"""Global metrics registry."""
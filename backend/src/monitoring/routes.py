@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+
+from src.monitoring.metrics import METRICS
+
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+
+@router.get("/metrics")
+async def get_metrics() -> dict[str, int | float | dict]:
+    """Get a snapshot of the in-process metrics.
+
+    Returns:
+        dict[str, int | float | dict]: Metric names and values.
+    """
+    return METRICS.snapshot()
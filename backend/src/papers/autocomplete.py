@@ -0,0 +1,276 @@
+import asyncio
+import heapq
+import logging
+import re
+from bisect import bisect_left, insort
+from typing import NamedTuple
+
+
+from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.adapters.paper_record import PaperRecord
+from src.adapters.semantic_scholar_adapter import Autocomplete
+from src.cache import TTLCache
+from src.config import CONFIG
+from src.monitoring.metrics import METRICS
+from src.papers.models import CachedPaper
+
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_WORDS = 8
+"""Words of a title that suggestions may start at."""
+
+MAX_KEY_LENGTH = 64
+"""Characters of a title suffix that are indexed."""
+
+__NON_ALPHANUMERIC = re.compile(r"[^\w]+")
+
+
+class IndexedPaper(NamedTuple):
+    title: str
+    authors_year: str
+    popularity: int
+
+
+def normalize(text: str) -> str:
+    """Normalize a title or query for prefix matching.
+
+    Args:
+        text (str): Title or query.
+
+    Returns:
+        str: Lowercase words separated by single spaces.
+    """
+    return " ".join(__NON_ALPHANUMERIC.sub(" ", text.lower()).split())
+
+
+def get_authors_year(paper: PaperRecord) -> str:
+    """Format authors and year like the Semantic Scholar autocomplete.
+
+    Args:
+        paper (PaperRecord): Paper.
+
+    Returns:
+        str: For example "Vaswani et al., 2017".
+    """
+    parts = []
+
+    if paper.authors:
+        name = paper.authors[0].split()[-1]
+        parts.append(f"{name} et al." if len(paper.authors) > 1 else name)
+
+    if paper.year:
+        parts.append(str(paper.year))
+
+    return ", ".join(part for part in parts if part)
+
+
+class AutocompleteIndex:
+    """Memory-bounded prefix index of paper titles.
+
+    Titles are indexed by the suffixes starting at each of their first words
+    in a sorted array, searched with bisection. New titles are collected in a
+    small sorted pending list and merged into the array once it grows, and
+    the least popular papers are dropped as soon as the index is full.
+    """
+
+    def __init__(self, max_papers: int) -> None:
+        self._max_papers = max_papers
+        self._papers: dict[str, IndexedPaper] = {}
+        self._keys: list[tuple[str, str]] = []
+        self._pending: list[tuple[str, str]] = []
+        self._load_task: asyncio.Task | None = None
+
+        METRICS.register_gauge("autocomplete.index.papers", lambda: len(self._papers))
+        METRICS.register_gauge(
+            "autocomplete.index.keys", lambda: len(self._keys) + len(self._pending)
+        )
+
+    def add(self, paper_id: str, title: str, authors_year: str) -> None:
+        """Add a paper or count another sighting of a known one.
+
+        Args:
+            paper_id (str): Paper ID.
+            title (str): Paper title.
+            authors_year (str): Authors and year.
+        """
+        known = self._papers.get(paper_id)
+
+        if known is not None:
+            self._papers[paper_id] = known._replace(popularity=known.popularity + 1)
+            return
+
+        words = normalize(title).split()
+        if not words:
+            return
+
+        self._papers[paper_id] = IndexedPaper(title, authors_year, 1)
+        for i in range(min(len(words), MAX_KEY_WORDS)):
+            insort(self._pending, (" ".join(words[i:])[:MAX_KEY_LENGTH], paper_id))
+
+        if (
+            len(self._pending) > CONFIG.autocomplete.merge_threshold
+            or len(self._papers) > self._max_papers
+        ):
+            self._merge()
+
+    def add_papers(self, papers: list[PaperRecord]) -> None:
+        """Add served papers.
+
+        Args:
+            papers (list[PaperRecord]): Papers.
+        """
+        for paper in papers:
+            if paper.paperId and paper.title:
+                self.add(paper.paperId, paper.title, get_authors_year(paper))
+
+    def add_suggestions(self, suggestions: list[Autocomplete]) -> None:
+        """Add upstream autocomplete suggestions.
+
+        Args:
+            suggestions (list[Autocomplete]): Suggestions.
+        """
+        for suggestion in suggestions:
+            if suggestion.id and suggestion.title:
+                self.add(suggestion.id, suggestion.title, suggestion.authors_year)
+
+    def search(self, query: str, limit: int) -> list[Autocomplete]:
+        """Find the most popular papers with a title word starting with the query.
+
+        Args:
+            query (str): Normalized query.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            list[Autocomplete]: Suggestions, titles starting with the query
+                first.
+        """
+        matches = set()
+
+        for keys in (self._keys, self._pending):
+            start = bisect_left(keys, (query,))
+            for key, paper_id in keys[start : start + CONFIG.autocomplete.max_scan]:
+                if not key.startswith(query):
+                    break
+                matches.add(paper_id)
+
+        ranked = heapq.nlargest(
+            limit,
+            (paper_id for paper_id in matches if paper_id in self._papers),
+            key=lambda paper_id: (
+                normalize(self._papers[paper_id].title).startswith(query),
+                self._papers[paper_id].popularity,
+            ),
+        )
+
+        return [
+            Autocomplete(
+                {
+                    "id": paper_id,
+                    "title": self._papers[paper_id].title,
+                    "authorsYear": self._papers[paper_id].authors_year,
+                }
+            )
+            for paper_id in ranked
+        ]
+
+    def _merge(self) -> None:
+        evicted = set()
+
+        if len(self._papers) > self._max_papers:
+            # Shrink below the bound, so merges don't evict on every call
+            target = int(self._max_papers * 0.9)
+            evicted = set(
+                heapq.nsmallest(
+                    len(self._papers) - target,
+                    self._papers,
+                    key=lambda paper_id: self._papers[paper_id].popularity,
+                )
+            )
+            for paper_id in evicted:
+                del self._papers[paper_id]
+
+        keys = self._keys + self._pending
+        if evicted:
+            keys = [key for key in keys if key[1] not in evicted]
+
+        # Both lists are sorted runs, which Timsort merges in linear time
+        keys.sort()
+        self._keys = keys
+        self._pending = []
+
+    def start(self) -> None:
+        """Load the titles of cached papers in the background."""
+        if self._load_task is None:
+            self._load_task = asyncio.create_task(self._load())
+
+    async def stop(self) -> None:
+        """Stop loading titles."""
+        if self._load_task is not None:
+            self._load_task.cancel()
+            await asyncio.gather(self._load_task, return_exceptions=True)
+            self._load_task = None
+
+    async def _load(self) -> None:
+        count = 0
+
+        async for entry in CachedPaper.find({"data.title": {"$ne": None}}).limit(
+            self._max_papers
+        ):
+            paper = ss_adapter.build_paper(entry.data)
+            self.add_papers([paper])
+            count += 1
+
+            # Yield to requests between batches
+            if count % 1000 == 0:
+                await asyncio.sleep(0)
+
+        self._merge()
+        logger.info(f"Autocomplete index loaded {count} papers")
+
+
+AUTOCOMPLETE_INDEX = AutocompleteIndex(CONFIG.autocomplete.max_papers)
+"""Global autocomplete index."""
+
+__suggestions: TTLCache[str, list[Autocomplete]] = TTLCache(
+    "autocomplete",
+    max_size=CONFIG.autocomplete.cache_size,
+    ttl=CONFIG.autocomplete.cache_ttl,
+)
+
+
+async def get_autocomplete(query: str) -> list[Autocomplete]:
+    """Get autocomplete suggestions, going upstream only if the index and the
+    prefix cache cannot answer the query.
+
+    Args:
+        query (str): Query.
+
+    Returns:
+        list[Autocomplete]: Suggestions.
+    """
+    limit = CONFIG.autocomplete.limit
+    prefix = normalize(query)
+
+    suggestions = __suggestions.get(prefix)
+    if suggestions is not None:
+        return suggestions
+
+    suggestions = AUTOCOMPLETE_INDEX.search(prefix, limit) if prefix else []
+
+    if len(suggestions) >= limit:
+        METRICS.increment("autocomplete.local")
+        __suggestions.set(prefix, suggestions)
+        return suggestions
+
+    METRICS.increment("autocomplete.upstream")
+    upstream = await ss_adapter.get_autocomplete(query)
+    AUTOCOMPLETE_INDEX.add_suggestions(upstream)
+
+    # Upstream ranks first, local matches fill up the rest
+    known = {suggestion.id for suggestion in upstream}
+    suggestions = upstream + [s for s in suggestions if s.id not in known]
+    suggestions = suggestions[: max(limit, len(upstream))]
+
+    __suggestions.set(prefix, suggestions)
+    return suggestions
@@ -0,0 +1,272 @@
+from datetime import datetime
+
+from beanie import Document
+from pymongo import DESCENDING, IndexModel, UpdateOne
+
+
+MAX_TOTAL = 1000
+"""Largest total count of a search, upstream search pages end there too."""
+
+
+class CorpusPaper(Document):
+    paper_id: str
+    # raw record in the shape of the Graph API
+    data: dict = {}
+    # filters of the search, taken from the record on import
+    title: str
+    abstract: str | None = None
+    year: int | None = None
+    publication_date: datetime | None = None
+    publication_types: list[str] = []
+    fields_of_study: list[str] = []
+    # venue name and its alternate names
+    venues: list[str] = []
+    citation_count: int = 0
+    open_access_pdf: bool = False
+
+    class Settings:
+        indexes = [
+            IndexModel([("paper_id", 1)], unique=True),
+            IndexModel(
+                [("title", "text"), ("abstract", "text")],
+                weights={"title": 10, "abstract": 1},
+                name="text",
+            ),
+            IndexModel(
+                [
+                    ("fields_of_study", 1),
+                    ("year", DESCENDING),
+                    ("citation_count", DESCENDING),
+                ]
+            ),
+            IndexModel(
+                [("venues", 1), ("year", DESCENDING), ("citation_count", DESCENDING)]
+            ),
+            IndexModel([("year", DESCENDING), ("citation_count", DESCENDING)]),
+            IndexModel([("publication_date", DESCENDING)]),
+            IndexModel([("citation_count", DESCENDING)]),
+        ]
+
+
+def normalize_record(record: dict) -> dict | None:
+    """Bring a paper record into the shape of the Graph API.
+
+    Records of the Graph API are kept as they are. Records of the Semantic
+    Scholar dataset dumps have lowercase keys and no paper ID, it is taken
+    from their URL.
+
+    Args:
+        record (dict): Paper record of the Graph API or of a dataset dump.
+
+    Returns:
+        dict | None: Paper record, None without paper ID or title.
+    """
+    if "paperId" in record:
+        paper = dict(record)
+    else:
+        url = record.get("url") or ""
+        venue = record.get("venue")
+        venue_id = record.get("publicationvenueid")
+        fields_of_study = [
+            field["category"]
+            for field in record.get("s2fieldsofstudy") or []
+            if field.get("category")
+        ]
+        paper = {
+            "paperId": url.rsplit("/", 1)[-1] or None,
+            "title": record.get("title"),
+            "abstract": record.get("abstract"),
+            "authors": record.get("authors") or [],
+            "year": record.get("year"),
+            "publicationDate": record.get("publicationdate"),
+            "publicationTypes": record.get("publicationtypes"),
+            "citationCount": record.get("citationcount"),
+            "externalIds": record.get("externalids"),
+            "openAccessPdf": record.get("openaccesspdf"),
+            "publicationVenue": (
+                {"id": venue_id, "name": venue} if venue and venue_id else None
+            ),
+            "fieldsOfStudy": list(dict.fromkeys(fields_of_study)) or None,
+        }
+
+    if not paper.get("paperId") or not paper.get("title"):
+        return None
+
+    return paper
+
+
+def build_corpus_paper(paper: dict) -> dict:
+    """Build the stored document of a normalized paper record.
+
+    Args:
+        paper (dict): Paper record in the shape of the Graph API.
+
+    Returns:
+        dict: Document to store in the corpus collection.
+    """
+    venue = paper.get("publicationVenue") or {}
+    venues = [venue.get("name"), *(venue.get("alternate_names") or [])]
+    fields_of_study = paper.get("fieldsOfStudy") or [
+        field["category"]
+        for field in paper.get("s2FieldsOfStudy") or []
+        if field.get("category")
+    ]
+
+    try:
+        publication_date = datetime.fromisoformat(paper["publicationDate"])
+    except (KeyError, TypeError, ValueError):
+        publication_date = None
+
+    return {
+        "paper_id": paper["paperId"],
+        "data": paper,
+        "title": paper["title"],
+        "abstract": paper.get("abstract"),
+        "year": paper.get("year"),
+        "publication_date": publication_date,
+        "publication_types": paper.get("publicationTypes") or [],
+        "fields_of_study": list(dict.fromkeys(fields_of_study)),
+        "venues": [name for name in venues if name],
+        "citation_count": paper.get("citationCount") or 0,
+        "open_access_pdf": bool(paper.get("openAccessPdf")),
+    }
+
+
+async def store(papers: list[dict]) -> int:
+    """Insert or replace papers of the corpus.
+
+    Args:
+        papers (list[dict]): Paper records in the shape of the Graph API.
+
+    Returns:
+        int: Number of stored papers.
+    """
+    if len(papers) == 0:
+        return 0
+
+    operations = [
+        UpdateOne(
+            {"paper_id": paper["paperId"]},
+            {"$set": build_corpus_paper(paper)},
+            upsert=True,
+        )
+        for paper in papers
+    ]
+    result = await CorpusPaper.get_motor_collection().bulk_write(
+        operations, ordered=False
+    )
+
+    return result.upserted_count + result.matched_count
+
+
+def build_filter(
+    query: str,
+    publication_types: list[str] | None,
+    open_access_pdf: bool,
+    venues: list[str] | None,
+    fields_of_study: list[str] | None,
+    publication_date_start: datetime | None,
+    publication_date_end: datetime | None,
+    min_citation_count: int | None,
+) -> dict:
+    """Build the Mongo filter of a search, matching the Graph API filters.
+
+    Args:
+        query (str): Query to search for, all papers if empty.
+        publication_types (list[str] | None): Any of the publication types.
+        open_access_pdf (bool): Only papers with open access PDF.
+        venues (list[str] | None): Any of the venues.
+        fields_of_study (list[str] | None): Any of the fields of study, by
+            Semantic Scholar name.
+        publication_date_start (datetime | None): Start date of publication.
+        publication_date_end (datetime | None): End date of publication.
+        min_citation_count (int | None): Minimum citation count.
+
+    Returns:
+        dict: Mongo filter.
+    """
+    conditions = []
+
+    if query.strip():
+        conditions.append({"$text": {"$search": query}})
+
+    if publication_types:
+        conditions.append({"publication_types": {"$in": publication_types}})
+
+    if open_access_pdf:
+        conditions.append({"open_access_pdf": True})
+
+    if venues:
+        conditions.append({"venues": {"$in": venues}})
+
+    if fields_of_study:
+        conditions.append({"fields_of_study": {"$in": fields_of_study}})
+
+    if publication_date_start or publication_date_end:
+        dates, years = {}, {}
+
+        if publication_date_start:
+            dates["$gte"] = publication_date_start.replace(
+                hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+            )
+            years["$gte"] = publication_date_start.year
+
+        if publication_date_end:
+            dates["$lte"] = publication_date_end.replace(
+                hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+            )
+            years["$lte"] = publication_date_end.year
+
+        # Like upstream, papers without publication date are matched by year
+        conditions.append(
+            {
+                "$or": [
+                    {"publication_date": dates},
+                    {"publication_date": None, "year": years},
+                ]
+            }
+        )
+
+    if min_citation_count:
+        conditions.append({"citation_count": {"$gte": min_citation_count}})
+
+    if len(conditions) == 0:
+        return {}
+
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+async def find_many(
+    filter: dict, fields: list[str], limit: int, offset: int
+) -> tuple[list[dict], int]:
+    """Find a page of corpus papers, ordered like upstream results.
+
+    Text searches are ordered by relevance, all others by citation count. The
+    total is only counted if the page is full, and at most up to `MAX_TOTAL`.
+
+    Args:
+        filter (dict): Mongo filter, see `build_filter`.
+        fields (list[str]): Fields of the records to return.
+        limit (int): Limit of results.
+        offset (int): Offset of results.
+
+    Returns:
+        tuple[list[dict], int]: Paper records and total count.
+    """
+    collection = CorpusPaper.get_motor_collection()
+    projection = {"_id": 0, **{f"data.{field}": 1 for field in fields}}
+    sort = [("citation_count", DESCENDING), ("paper_id", 1)]
+
+    if any("$text" in condition for condition in filter.get("$and", [filter])):
+        projection["score"] = {"$meta": "textScore"}
+        sort.insert(0, ("score", {"$meta": "textScore"}))
+
+    cursor = collection.find(filter, projection).sort(sort).skip(offset).limit(limit)
+    records = [entry["data"] async for entry in cursor]
+
+    if len(records) < limit and (records or offset == 0):
+        total = offset + len(records)
+    else:
+        total = await collection.count_documents(filter, limit=MAX_TOTAL)
+
+    return records, total
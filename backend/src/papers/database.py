@@ -1,20 +1,35 @@
+import asyncio
+import logging
+from collections.abc import Awaitable
 from datetime import datetime, timedelta
 
-from semanticscholar.Paper import Paper as SSPaper
 
 from src.dependencies import Pagination
 from src.likes import database as likes_db
 from src.likes.models import Like, LikePaperView
+from src.likes.recommender import RECOMMENDER
+from src.monitoring.metrics import METRICS
 from src.users import database as users_db
+from src.users.models import UserFieldOfStudy
+from src.papers import autocomplete
+from src.papers.autocomplete import AUTOCOMPLETE_INDEX
+from src.papers.embeddings import EMBEDDINGS
+from src.papers.known_papers import KNOWN_PAPERS
 from src.papers.models import PaperSearchInput
+from src.papers.paper_cache import PAPER_CACHE
+from src.papers.search_cache import SEARCH_CACHE
 from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.adapters.paper_record import PaperRecord
 from src.adapters.semantic_scholar_adapter import Autocomplete
 from src.config import CONFIG
 
 
+__logger = logging.getLogger(__name__)
+
+
 async def get_feed(
     uid: str, pagination: Pagination
-) -> tuple[list[SSPaper], dict[str, int]]:
+) -> tuple[list[PaperRecord], dict[str, int]]:
     likes = (
         await Like.find(Like.user_id == uid)
         .project(LikePaperView)
@@ -30,53 +45,162 @@ async def get_feed(
             # Subtract the limit because we started with recommendations
             pagination.offset -= pagination.limit
 
-        papers, _ = await ss_adapter.find_many(
-            query="n",
-            limit=pagination.limit,
-            offset=pagination.offset,
-            fields_of_study=user.fields or None,
-            publication_date_start=datetime.now() - timedelta(days=30),
+        papers, _ = await SEARCH_CACHE.find_many(
+            __recent_papers_search(user.fields), pagination
         )
 
     else:
-        papers = await ss_adapter.get_recommendations(
-            [l.paper_id for l in likes], limit=pagination.limit
+        papers = await __get_recommendations(
+            uid, [l.paper_id for l in likes], pagination.limit
         )
 
         if len(papers) == 0:
             user = await users_db.get_by_id(uid)
-            papers, _ = await ss_adapter.find_many(
-                query="n",
-                limit=pagination.limit,
-                fields_of_study=user.fields or None,
-                publication_date_start=datetime.now() - timedelta(days=30),
+            papers, _ = await SEARCH_CACHE.find_many(
+                __recent_papers_search(user.fields), Pagination(limit=pagination.limit)
             )
 
+    AUTOCOMPLETE_INDEX.add_papers(papers)
+    KNOWN_PAPERS.add_papers(papers)
+    EMBEDDINGS.add_papers(papers)
     like_counts = await likes_db.get_paper_like_counts([p.paperId for p in papers])
 
     return papers, like_counts
 
 
+async def __get_recommendations(
+    uid: str, paper_ids: list[str], limit: int
+) -> list[PaperRecord]:
+    source = CONFIG.feed.source
+
+    if source == "upstream":
+        return await __get_or_empty(
+            ss_adapter.get_recommendations(paper_ids, limit=limit)
+        )
+
+    if source == "local":
+        papers = await __get_or_empty(
+            __get_local_recommendations(uid, paper_ids, limit)
+        )
+
+        # Upstream only fills up what the community likes cannot
+        if len(papers) < limit:
+            upstream = await __get_or_empty(
+                ss_adapter.get_recommendations(paper_ids, limit=limit)
+            )
+            papers = blend(papers, upstream, limit, 1)
+
+        return papers
+
+    local, upstream = await asyncio.gather(
+        __get_or_empty(__get_local_recommendations(uid, paper_ids, limit)),
+        __get_or_empty(ss_adapter.get_recommendations(paper_ids, limit=limit)),
+    )
+
+    return blend(local, upstream, limit, CONFIG.feed.local_share)
+
+
+async def __get_local_recommendations(
+    uid: str, paper_ids: list[str], limit: int
+) -> list[PaperRecord]:
+    recommended = RECOMMENDER.recommend(uid, paper_ids, limit)
+
+    # Papers close to the user's taste fill up what too few co-likes lack
+    if len(recommended) < limit:
+        similar = EMBEDDINGS.recommend(paper_ids, limit + len(recommended))
+        recommended += [p_id for p_id in similar if p_id not in recommended]
+        recommended = recommended[:limit]
+
+    papers = await PAPER_CACHE.find_many_by_ids(recommended)
+    METRICS.increment("feed.local_recommendations", len(papers))
+
+    return papers
+
+
+async def __get_or_empty(
+    recommendations: Awaitable[list[PaperRecord]],
+) -> list[PaperRecord]:
+    try:
+        return await recommendations
+    except Exception as e:
+        # Recent papers are often cached, so the feed survives an outage
+        __logger.warning(f"Recommendations failed: {e}")
+        return []
+
+
+def blend(
+    local: list[PaperRecord],
+    upstream: list[PaperRecord],
+    limit: int,
+    local_share: float,
+) -> list[PaperRecord]:
+    """Interleave local and upstream recommendations.
+
+    Local papers take their share of the limit, either source fills up what
+    the other lacks, and both are spread evenly over the result.
+
+    Args:
+        local (list[PaperRecord]): Local recommendations, best first.
+        upstream (list[PaperRecord]): Upstream recommendations, best first.
+        limit (int): Number of papers.
+        local_share (float): Share of local papers, between 0 and 1.
+
+    Returns:
+        list[PaperRecord]: Recommended papers.
+    """
+    local_ids = {paper.paperId for paper in local}
+    upstream = [paper for paper in upstream if paper.paperId not in local_ids]
+
+    num_local = min(len(local), round(limit * local_share))
+    num_upstream = min(len(upstream), limit - num_local)
+    num_local = min(len(local), limit - num_upstream)
+
+    ranked = [((i + 0.5) / num_local, 0, p) for i, p in enumerate(local[:num_local])]
+    ranked += [
+        ((i + 0.5) / num_upstream, 1, p) for i, p in enumerate(upstream[:num_upstream])
+    ]
+
+    return [paper for *_, paper in sorted(ranked, key=lambda r: r[:2])]
+
+
+def __recent_papers_search(
+    fields_of_study: list[UserFieldOfStudy],
+) -> PaperSearchInput:
+    return PaperSearchInput(
+        query=ss_adapter.MATCH_ALL_QUERY,
+        fields_of_study=fields_of_study or None,
+        publication_date_start=datetime.now() - timedelta(days=30),
+    )
+
+
 async def get_autocomplete(query: str) -> list[Autocomplete]:
-    return await ss_adapter.get_autocomplete(query)
+    return await autocomplete.get_autocomplete(query)
 
 
 async def search_papers(
     body: PaperSearchInput, pagination: Pagination
-) -> tuple[list[SSPaper], dict[str, int], int]:
-    papers, total = await ss_adapter.find_many(
-        query=body.query,
-        publication_types=body.publication_types,
-        open_access_pdf=body.open_access_pdf,
-        venues=body.venues,
-        fields_of_study=body.fields_of_study,
-        publication_date_start=body.publication_date_start,
-        publication_date_end=body.publication_date_end,
-        min_citation_count=body.min_citation_count,
-        limit=pagination.limit,
-        offset=pagination.offset,
-    )
+) -> tuple[list[PaperRecord], dict[str, int], int]:
+    papers, total = await SEARCH_CACHE.find_many(body, pagination)
+    AUTOCOMPLETE_INDEX.add_papers(papers)
+    KNOWN_PAPERS.add_papers(papers)
+    EMBEDDINGS.add_papers(papers)
 
     like_counts = await likes_db.get_paper_like_counts([p.paperId for p in papers])
 
     return papers, like_counts, total
+
+
+async def get_similar_papers(
+    paper_id: str, limit: int
+) -> tuple[list[PaperRecord], dict[str, int]] | None:
+    similar = EMBEDDINGS.get_similar(paper_id, limit)
+
+    if similar is None:
+        return None
+
+    papers = await PAPER_CACHE.find_many_by_ids(similar)
+    AUTOCOMPLETE_INDEX.add_papers(papers)
+    KNOWN_PAPERS.add_papers(papers)
+    like_counts = await likes_db.get_paper_like_counts([p.paperId for p in papers])
+
+    return papers, like_counts
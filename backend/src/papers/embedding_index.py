@@ -0,0 +1,363 @@
+import logging
+import os
+import threading
+from array import array
+from collections.abc import Iterable
+
+import numpy as np
+from scipy import sparse
+
+from src.monitoring.metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+ASSIGN_CHUNK_SIZE = 8192
+"""Vectors assigned to lists per matrix product, bounding its memory."""
+
+SAMPLES_PER_LIST = 64
+"""Training vectors per list of the index."""
+
+TRAIN_ITERATIONS = 10
+"""Rounds of k-means when training the index."""
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors to unit length, so dot products are cosines.
+
+    Args:
+        vectors (np.ndarray): Vector or matrix of row vectors.
+
+    Returns:
+        np.ndarray: Float32 unit vectors, zero vectors are kept.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def get_num_lists(size: int) -> int:
+    """Get the number of lists of an index, about four per square root.
+
+    Args:
+        size (int): Number of vectors.
+
+    Returns:
+        int: Number of lists.
+    """
+    return int(min(max(4 * np.sqrt(size), 16), 4096))
+
+
+def assign(
+    vectors: np.ndarray, start: int, end: int, centroids: np.ndarray
+) -> np.ndarray:
+    """Assign vectors to the list of their closest centroid.
+
+    Args:
+        vectors (np.ndarray): Matrix of unit row vectors.
+        start (int): First row to assign.
+        end (int): Row after the last one to assign.
+        centroids (np.ndarray): Unit centroids of the lists.
+
+    Returns:
+        np.ndarray: List of every row.
+    """
+    lists = np.empty(end - start, dtype=np.int32)
+
+    for chunk in range(start, end, ASSIGN_CHUNK_SIZE):
+        stop = min(chunk + ASSIGN_CHUNK_SIZE, end)
+        lists[chunk - start : stop - start] = np.argmax(
+            vectors[chunk:stop] @ centroids.T, axis=1
+        )
+
+    return lists
+
+
+def train(vectors: np.ndarray, size: int, num_lists: int, seed: int = 0) -> np.ndarray:
+    """Train the centroids of the lists with spherical k-means on a sample.
+
+    Args:
+        vectors (np.ndarray): Matrix of unit row vectors.
+        size (int): Number of rows to sample from.
+        num_lists (int): Number of lists.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        np.ndarray: Unit centroids of the lists.
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(size, num_lists * SAMPLES_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(size, sample_size, replace=False))])
+    centroids = sample[rng.choice(sample_size, num_lists, replace=False)]
+
+    for _ in range(TRAIN_ITERATIONS):
+        lists = assign(sample, 0, sample_size, centroids)
+        # Sum the members of every list with a sparse one-hot product
+        members = sparse.csr_matrix(
+            (np.ones(sample_size, dtype=np.float32), (lists, np.arange(sample_size))),
+            shape=(num_lists, sample_size),
+        )
+        sums = members @ sample
+
+        # Lists that lost all members start over at a random vector
+        empty = np.flatnonzero(members.getnnz(axis=1) == 0)
+        sums[empty] = sample[rng.choice(sample_size, empty.size)]
+        centroids = normalize(sums)
+
+    return centroids
+
+
+class EmbeddingIndex:
+    """Approximate nearest neighbor index of paper embeddings on disk.
+
+    Vectors are kept as unit float32 rows of a memory-mapped matrix, with the
+    paper IDs in a line per row, both append-only. Small indexes are searched
+    exactly. Larger ones are split into lists around k-means centroids, and a
+    query only scores the rows of the lists closest to it (IVF). The lists are
+    trained again in a background thread whenever the index has grown
+    fourfold, meanwhile the old ones are searched.
+    """
+
+    def __init__(
+        self, directory: str, dimensions: int, probes: int, min_train_size: int
+    ) -> None:
+        self._directory = directory
+        self._dimensions = dimensions
+        self._probes = probes
+        self._min_train_size = min_train_size
+        self._ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self._ids_file = None
+        self._centroids: np.ndarray | None = None
+        self._lists: list[array] = []
+        # size of the index when the lists were trained
+        self._trained_size = 0
+        self._training: threading.Thread | None = None
+        self._trained: tuple[np.ndarray, np.ndarray, int] | None = None
+
+        METRICS.register_gauge("embeddings.vectors", lambda: len(self._ids))
+        METRICS.register_gauge("embeddings.lists", lambda: len(self._lists))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._rows
+
+    def open(self) -> None:
+        """Open the files of the index, blocking until they are loaded."""
+        os.makedirs(self._directory, exist_ok=True)
+        ids_path = os.path.join(self._directory, "ids.txt")
+
+        if os.path.exists(ids_path):
+            with open(ids_path) as file:
+                self._ids = file.read().split()
+
+        self._rows = {paper_id: row for row, paper_id in enumerate(self._ids)}
+        self._ids_file = open(ids_path, "a")
+        self._map(max(len(self._ids), 1024))
+
+        index_path = os.path.join(self._directory, "index.npz")
+        if os.path.exists(index_path):
+            with np.load(index_path) as index:
+                centroids, lists = index["centroids"], index["lists"][: len(self)]
+                self._trained_size = int(index["trained_size"])
+
+            # Rows added after the index was saved are assigned anew
+            lists = np.concatenate(
+                [lists, assign(self._vectors, lists.size, len(self), centroids)]
+            )
+            self._set_lists(centroids, lists)
+
+        logger.info(f"Embedding index opened with {len(self)} vectors")
+
+    def close(self) -> None:
+        """Save the lists and close the files."""
+        if self._ids_file is None:
+            return
+
+        if self._training is not None:
+            self._training.join()
+            self._swap_lists()
+
+        if self._centroids is not None:
+            lists = np.empty(len(self), dtype=np.int32)
+            for i, rows in enumerate(self._lists):
+                lists[np.frombuffer(rows, dtype=np.int32)] = i
+
+            self._save_lists(self._centroids, lists, self._trained_size)
+
+        self._ids_file.close()
+        self._ids_file = None
+        self._vectors.flush()
+
+    def get(self, paper_id: str) -> np.ndarray | None:
+        """Get the unit vector of a paper.
+
+        Args:
+            paper_id (str): Paper ID.
+
+        Returns:
+            np.ndarray | None: Vector or None if the paper has none.
+        """
+        row = self._rows.get(paper_id)
+        return None if row is None else np.array(self._vectors[row])
+
+    def add(self, paper_ids: list[str], vectors: list[list[float]]) -> None:
+        """Add the embeddings of papers, known papers are skipped.
+
+        Args:
+            paper_ids (list[str]): Paper IDs.
+            vectors (list[list[float]]): Embedding of every paper.
+        """
+        new = {}
+        for paper_id, vector in zip(paper_ids, vectors):
+            if paper_id not in self._rows and len(vector) == self._dimensions:
+                new[paper_id] = vector
+
+        if len(new) == 0:
+            return
+
+        start = len(self._ids)
+        end = start + len(new)
+        if end > self._vectors.shape[0]:
+            self._map(max(end, 2 * self._vectors.shape[0]))
+
+        # The vectors are written before their IDs, a crash leaves spare rows
+        self._vectors[start:end] = normalize(list(new.values()))
+        self._ids_file.write("".join(f"{paper_id}\n" for paper_id in new))
+        self._ids_file.flush()
+
+        for row, paper_id in enumerate(new, start):
+            self._ids.append(paper_id)
+            self._rows[paper_id] = row
+
+        if self._centroids is not None:
+            lists = assign(self._vectors, start, end, self._centroids)
+            for row, i in enumerate(lists.tolist(), start):
+                self._lists[i].append(row)
+
+        self._swap_lists()
+        self._train_if_grown()
+
+    def search(
+        self, vector: np.ndarray, limit: int, exclude: Iterable[str] = ()
+    ) -> list[tuple[str, float]]:
+        """Find the papers closest to a vector.
+
+        Args:
+            vector (np.ndarray): Query vector.
+            limit (int): Number of papers.
+            exclude (Iterable[str], optional): Paper IDs to leave out. Defaults
+                to none.
+
+        Returns:
+            list[tuple[str, float]]: Paper IDs and cosine similarities, most
+                similar first.
+        """
+        self._swap_lists()
+        query = normalize(vector)
+
+        if self._centroids is None:
+            rows = np.arange(len(self), dtype=np.int64)
+        else:
+            closest = self._centroids @ query
+            probes = min(self._probes, closest.size)
+            lists = np.argpartition(-closest, probes - 1)[:probes]
+            # Sorted rows read the memory map in order
+            rows = np.sort(
+                np.concatenate(
+                    [np.frombuffer(self._lists[i], dtype=np.int32) for i in lists]
+                )
+            )
+
+        excluded = [self._rows[p_id] for p_id in exclude if p_id in self._rows]
+        rows = rows[~np.isin(rows, excluded)]
+        scores = self._vectors[rows] @ query
+
+        if rows.size > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            rows, scores = rows[top], scores[top]
+
+        order = np.argsort(-scores, kind="stable")
+        METRICS.increment("embeddings.searches")
+        METRICS.increment("embeddings.scored", rows.size)
+
+        return [
+            (self._ids[row], float(score))
+            for row, score in zip(rows[order], scores[order])
+        ]
+
+    def _map(self, capacity: int) -> None:
+        path = os.path.join(self._directory, "vectors.f32")
+        size = capacity * self._dimensions * np.dtype(np.float32).itemsize
+
+        with open(path, "ab") as file:
+            if file.tell() < size:
+                file.truncate(size)
+
+        self._vectors = np.memmap(
+            path, dtype=np.float32, mode="r+", shape=(capacity, self._dimensions)
+        )
+
+    def _set_lists(self, centroids: np.ndarray, lists: np.ndarray) -> None:
+        order = np.argsort(lists, kind="stable")
+        bounds = np.searchsorted(lists[order], np.arange(centroids.shape[0] + 1))
+
+        self._centroids = centroids
+        self._lists = [
+            array("i", order[start:end].astype(np.int32).tobytes())
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def _save_lists(
+        self, centroids: np.ndarray, lists: np.ndarray, trained_size: int
+    ) -> None:
+        path = os.path.join(self._directory, "index.npz")
+
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez(file, centroids=centroids, lists=lists, trained_size=trained_size)
+
+        os.replace(f"{path}.tmp", path)
+
+    def _train_if_grown(self) -> None:
+        size = len(self)
+        grown = size >= max(self._min_train_size, 4 * self._trained_size)
+
+        if self._training is not None or not grown:
+            return
+
+        def run() -> None:
+            try:
+                centroids = train(self._vectors, size, get_num_lists(size))
+                lists = assign(self._vectors, 0, size, centroids)
+                # Saved here, rows added meanwhile are assigned when opened
+                self._save_lists(centroids, lists, size)
+                self._trained = (centroids, lists, size)
+            except Exception as e:
+                logger.exception(f"Embedding index training failed: {e}")
+
+        self._trained_size = size
+        self._training = threading.Thread(target=run, daemon=True)
+        self._training.start()
+        logger.info(f"Training embedding index of {size} vectors")
+
+    def _swap_lists(self) -> None:
+        if self._training is None or self._training.is_alive():
+            return
+
+        self._training = None
+        if self._trained is None:
+            return
+
+        centroids, lists, size = self._trained
+        # Rows added during the training are assigned to the new lists
+        lists = np.concatenate(
+            [lists, assign(self._vectors, size, len(self), centroids)]
+        )
+        self._set_lists(centroids, lists)
+
+        self._trained = None
+        METRICS.increment("embeddings.trainings")
+        logger.info(f"Embedding index trained with {len(self._lists)} lists")
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.adapters.paper_record import PaperRecord
+from src.config import CONFIG
+from src.libraries.models import Library
+from src.likes.models import Like
+from src.monitoring.metrics import METRICS
+from src.papers.embedding_index import EmbeddingIndex
+
+
+logger = logging.getLogger(__name__)
+
+_MAX_MISSING = 100_000
+
+
+class Embeddings:
+    """SPECTER embeddings of the papers users saw, liked or saved.
+
+    Embeddings are fetched once from Semantic Scholar by a background task,
+    which collects the papers of many requests into one batch request, and
+    kept in an `EmbeddingIndex`. Papers similar to a paper or to the taste of
+    a user, the mean of their liked papers, are found locally.
+    """
+
+    def __init__(self) -> None:
+        self._index = EmbeddingIndex(
+            CONFIG.embeddings.directory,
+            CONFIG.embeddings.dimensions,
+            CONFIG.embeddings.probes,
+            CONFIG.embeddings.min_train_size,
+        )
+        self._field = f"embedding.{CONFIG.embeddings.model}"
+        self._queue: OrderedDict[str, None] = OrderedDict()
+        # papers Semantic Scholar has no embedding of
+        self._missing: OrderedDict[str, None] = OrderedDict()
+        self._ready = False
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        METRICS.register_gauge("embeddings.queue", lambda: len(self._queue))
+
+    def enqueue(self, paper_ids: list[str]) -> None:
+        """Fetch the embeddings of papers in the background, unless known.
+
+        Args:
+            paper_ids (list[str]): Paper IDs.
+        """
+        for paper_id in paper_ids:
+            if (
+                paper_id in self._index
+                or paper_id in self._queue
+                or paper_id in self._missing
+            ):
+                continue
+
+            if len(self._queue) >= CONFIG.embeddings.queue_size:
+                METRICS.increment("embeddings.dropped")
+                continue
+
+            self._queue[paper_id] = None
+            self._wake.set()
+
+    def add_papers(self, papers: list[PaperRecord]) -> None:
+        """Fetch the embeddings of served papers in the background.
+
+        Args:
+            papers (list[PaperRecord]): Papers.
+        """
+        self.enqueue([paper.paperId for paper in papers if paper.paperId])
+
+    def get_similar(self, paper_id: str, limit: int) -> list[str] | None:
+        """Get the papers most similar to a paper.
+
+        Args:
+            paper_id (str): Paper ID.
+            limit (int): Number of papers.
+
+        Returns:
+            list[str] | None: Paper IDs, most similar first, or None if the
+                paper has no embedding yet, which is then fetched in the
+                background.
+        """
+        if not self._ready:
+            return None
+
+        vector = self._index.get(paper_id)
+        if vector is None:
+            self.enqueue([paper_id])
+            return None
+
+        found = self._index.search(vector, limit, exclude=[paper_id])
+        return [p_id for p_id, _ in found]
+
+    def recommend(self, paper_ids: list[str], limit: int) -> list[str]:
+        """Get the papers closest to the mean of liked papers.
+
+        Args:
+            paper_ids (list[str]): Liked paper IDs, left out of the result.
+            limit (int): Number of papers.
+
+        Returns:
+            list[str]: Paper IDs, most similar first. Empty while the index is
+                loading or without embeddings of the liked papers.
+        """
+        if not self._ready:
+            return []
+
+        vectors = [self._index.get(p_id) for p_id in paper_ids]
+        vectors = [vector for vector in vectors if vector is not None]
+        self.enqueue(paper_ids)
+
+        if len(vectors) == 0:
+            return []
+
+        taste = np.mean(vectors, axis=0)
+        found = self._index.search(taste, limit, exclude=paper_ids)
+        return [p_id for p_id, _ in found]
+
+    def start(self) -> None:
+        """Open the index and fetch embeddings in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop fetching embeddings and close the index."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self._ready:
+            self._ready = False
+            await asyncio.to_thread(self._index.close)
+
+    async def _loop(self) -> None:
+        try:
+            await asyncio.to_thread(self._index.open)
+        except Exception as e:
+            logger.exception(f"Opening the embedding index failed: {e}")
+            return
+
+        self._ready = True
+
+        # Liked and saved papers are fetched even if nobody saw them since
+        self.enqueue(await Like.distinct("paper_id"))
+        self.enqueue(await Library.distinct("papers"))
+
+        while True:
+            if len(self._queue) == 0:
+                self._wake.clear()
+                await self._wake.wait()
+                # Let papers of the same burst gather into one batch
+                await asyncio.sleep(CONFIG.embeddings.fetch_delay)
+
+            size = min(len(self._queue), CONFIG.embeddings.fetch_batch_size)
+            paper_ids = [self._queue.popitem(last=False)[0] for _ in range(size)]
+
+            try:
+                await self._fetch(paper_ids)
+            except Exception as e:
+                logger.warning(f"Fetching embeddings failed: {e}")
+                # Try again later, after papers that are waiting
+                for paper_id in paper_ids:
+                    self._queue[paper_id] = None
+                await asyncio.sleep(CONFIG.embeddings.fetch_delay)
+
+    async def _fetch(self, paper_ids: list[str]) -> None:
+        records = await ss_adapter.get_batch_data(
+            paper_ids, fields=["paperId", self._field]
+        )
+        METRICS.increment("embeddings.fetched", len(paper_ids))
+
+        found, vectors = [], []
+        for paper_id, record in zip(paper_ids, records):
+            embedding = (record or {}).get("embedding") or {}
+
+            if embedding.get("vector"):
+                found.append(paper_id)
+                vectors.append(embedding["vector"])
+                continue
+
+            self._missing[paper_id] = None
+            if len(self._missing) > _MAX_MISSING:
+                self._missing.popitem(last=False)
+
+        self._index.add(found, vectors)
+
+
+EMBEDDINGS = Embeddings()
+"""Global paper embeddings."""
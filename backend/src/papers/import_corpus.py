@@ -0,0 +1,98 @@
+"""Import papers into the local corpus.
+
+Usage:
+    python -m src.papers.import_corpus FILE [FILE ...] [--batch-size N]
+
+Files hold one JSON paper per line, gzipped or not: records of the Graph API,
+for example the stand-in server corpus, or files of the Semantic Scholar
+`papers` dataset. Dataset records carry no abstract, it is only searchable
+when merged in from the `abstracts` dataset beforehand. Papers are upserted
+by ID, so files can be imported again to update the corpus.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+from collections.abc import Iterator
+
+from src import database
+from src.papers import corpus
+
+
+logger = logging.getLogger(__name__)
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """Read the JSON records of a file.
+
+    Args:
+        path (str): Path of a JSON lines file, gzipped if it ends with .gz.
+
+    Yields:
+        dict: Paper record.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+
+    with opener(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def import_file(path: str, batch_size: int, counts: dict[str, int]) -> None:
+    """Import the papers of a file in batches.
+
+    Args:
+        path (str): Path of a JSON lines file.
+        batch_size (int): Papers written per bulk write.
+        counts (dict[str, int]): Counts of stored and skipped records, updated
+            in place.
+    """
+    batch = []
+
+    for record in read_records(path):
+        paper = corpus.normalize_record(record)
+
+        if paper is None:
+            counts["skipped"] += 1
+            continue
+
+        batch.append(paper)
+
+        if len(batch) >= batch_size:
+            counts["stored"] += await corpus.store(batch)
+            batch = []
+            logger.info(f"Imported {counts['stored']} papers")
+
+    counts["stored"] += await corpus.store(batch)
+
+
+async def main(args: argparse.Namespace) -> None:
+    client = await database.connect()
+    counts = {"stored": 0, "skipped": 0}
+
+    try:
+        for path in args.files:
+            await import_file(path, args.batch_size, counts)
+            logger.info(f"Imported {path}")
+
+        logger.info(f"Import finished: {counts}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="JSON lines files of papers")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="papers written per bulk write",
+    )
+
+    asyncio.run(main(parser.parse_args()))
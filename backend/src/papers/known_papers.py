@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+
+from src.adapters.paper_record import PaperRecord
+from src.config import CONFIG
+from src.monitoring.metrics import METRICS
+from src.papers.models import CachedPaper
+
+
+logger = logging.getLogger(__name__)
+
+
+class KnownPapers:
+    """Bounded set of paper IDs known to exist upstream.
+
+    IDs are added from papers Semantic Scholar returned, so checking them
+    needs no upstream call. The set is exact, an unknown ID is never reported
+    as known, and evicts the least recently seen IDs when full.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._ids: OrderedDict[str, None] = OrderedDict()
+        self._load_task: asyncio.Task | None = None
+
+        METRICS.register_gauge("known_papers.size", lambda: len(self._ids))
+
+    def __contains__(self, paper_id: str) -> bool:
+        if paper_id not in self._ids:
+            METRICS.increment("known_papers.misses")
+            return False
+
+        METRICS.increment("known_papers.hits")
+        self._ids.move_to_end(paper_id)
+        return True
+
+    def add(self, paper_id: str) -> None:
+        """Record a paper ID that exists upstream.
+
+        Args:
+            paper_id (str): Paper ID.
+        """
+        self._ids[paper_id] = None
+        self._ids.move_to_end(paper_id)
+
+        if len(self._ids) > self._max_size:
+            self._ids.popitem(last=False)
+
+    def add_papers(self, papers: list[PaperRecord]) -> None:
+        """Record the IDs of papers returned by Semantic Scholar.
+
+        Args:
+            papers (list[PaperRecord]): Papers.
+        """
+        for paper in papers:
+            if paper.paperId:
+                self.add(paper.paperId)
+
+    def start(self) -> None:
+        """Load the IDs of cached papers in the background."""
+        if self._load_task is None:
+            self._load_task = asyncio.create_task(self._load())
+
+    async def stop(self) -> None:
+        """Stop loading IDs."""
+        if self._load_task is not None:
+            self._load_task.cancel()
+            await asyncio.gather(self._load_task, return_exceptions=True)
+            self._load_task = None
+
+    async def _load(self) -> None:
+        count = 0
+        cursor = CachedPaper.get_motor_collection().find(
+            {"data.paperId": {"$ne": None}}, {"paper_id": 1}
+        )
+
+        async for entry in cursor.limit(self._max_size):
+            # Papers seen since startup are more recent, keep them
+            if entry["paper_id"] not in self._ids:
+                self._ids[entry["paper_id"]] = None
+                self._ids.move_to_end(entry["paper_id"], last=False)
+            count += 1
+
+            if count % 1000 == 0:
+                await asyncio.sleep(0)
+
+        while len(self._ids) > self._max_size:
+            self._ids.popitem(last=False)
+
+        logger.info(f"Known papers loaded {count} IDs")
+
+
+KNOWN_PAPERS = KnownPapers(CONFIG.likes.known_papers_size)
+"""Global set of paper IDs known to exist."""
@@ -2,9 +2,10 @@ from datetime import datetime
 from enum import Enum
 from typing import Literal
 
-from pydantic import BaseModel, HttpUrl
-from semanticscholar.Paper import Paper as SSPaper
-from semanticscholar.PublicationVenue import PublicationVenue
+from beanie import Document
+from pydantic import BaseModel, Field, HttpUrl
+from pymongo import IndexModel
+from src.adapters.paper_record import PaperRecord
 from src.adapters.semantic_scholar_adapter import Autocomplete
 
 from src.config import CONFIG
@@ -38,70 +39,161 @@ class PublicationType(str, Enum):
     BOOK_SECTION = "BookSection"
 
 
+EXTERNAL_ID_KEYS = list(ExternalIds.model_fields)
+
+PUBLICATION_TYPES = {pt.value for pt in PublicationType}
+
+VENUE_TYPES = ("journal", "conference")
+
+
 class Venue(BaseModel):
-    id: str
-    name: str
+    id: str | None = None
+    name: str | None = None
     alternate_names: list[str] = []
-    alternate_urls: list[HttpUrl] = []
+    alternate_urls: list[str] = []
     issn: str | None = None
     type: Literal["journal", "conference"] | None = None
+    url: str | None = None
+
+    @staticmethod
+    def serialize(v: dict) -> dict:
+        """Build the JSON of a venue straight from a raw Semantic Scholar venue.
+
+        Args:
+            v (dict): Raw publication venue.
+
+        Returns:
+            dict: Venue as returned by the API.
+        """
+        return {
+            "id": v.get("id"),
+            "name": v.get("name"),
+            "alternate_names": v.get("alternate_names") or [],
+            "alternate_urls": v.get("alternate_urls") or [],
+            "issn": v.get("issn"),
+            "type": v.get("type") if v.get("type") in VENUE_TYPES else None,
+            "url": v.get("url"),
+        }
+
+
+class ThumbnailStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ThumbnailJob(Document):
+    paper_id: str
+    pdf_url: str
+    status: ThumbnailStatus = ThumbnailStatus.PENDING
+    attempts: int = 0
+    renditions: list[str] = []
+    error: str | None = None
+    retry_after: datetime | None = None
+    next_attempt_at: datetime = Field(default_factory=datetime.now)
+    locked_until: datetime | None = None
+    # token of the current claim, updates of stale claims are rejected
+    lease_id: str | None = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        indexes = [
+            IndexModel([("paper_id", 1)], unique=True),
+            IndexModel([("status", 1), ("next_attempt_at", 1)]),
+        ]
+
+
+class CachedPaper(Document):
+    paper_id: str
+    # raw Semantic Scholar record, merged from the fetched field groups
+    data: dict = {}
+    # fetch time of every field group
+    fetched_at: dict[str, datetime] = {}
+    # removed by Mongo once even the longest lived field group is stale
+    expires_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        indexes = [
+            IndexModel([("paper_id", 1)], unique=True),
+            IndexModel([("expires_at", 1)], expireAfterSeconds=0),
+        ]
+
+
+class ThumbnailResponse(BaseModel):
+    paper_id: str
+    status: ThumbnailStatus
     url: HttpUrl | None = None
-
-    @classmethod
-    def from_semantic_scholar(cls, v: PublicationVenue) -> "Venue":
-        return cls(
-            id=v.id,
-            name=v.name,
-            alternate_names=v.alternate_names or [],
-            alternate_urls=v.alternate_urls or [],
-            issn=v.issn,
-            type=v.type,
-            url=v.url,
-        )
+    # srcset of the renditions by MIME type
+    srcset: dict[str, str] = {}
+    error: str | None = None
+    retry_after: datetime | None = None
 
 
 class PaperResponse(BaseModel):
+    # serialized from upstream records without validation, so the schema
+    # allows whatever Semantic Scholar may leave out, see serialize
     id: str
     external_ids: ExternalIds
-    title: str
+    title: str | None = None
     authors: list[str]
     citations: int
     publication_types: list[PublicationType] = []
     published_at: datetime | None = None
     abstract: str | None = None
     likes: int = 0
-    open_pdf_url: HttpUrl | None = None
+    open_pdf_url: str | None = None
     venue: Venue | None = None
-    thumbnail_url: HttpUrl | None = None
+    thumbnail_url: str | None = None
+    thumbnail_status: ThumbnailStatus | None = None
+    thumbnail_srcset: dict[str, str] = {}
     bibtex: str | None = None
 
-    @classmethod
-    def from_semantic_scholar(
-        cls, p: SSPaper, likes: int, thumbnail_url: str | None
-    ) -> "PaperResponse":
-        publication_types = []
-        if p.publicationTypes:
-            publication_types = [PublicationType(pt) for pt in p.publicationTypes]
-
-        return cls(
-            id=p.paperId,
-            external_ids=ExternalIds(**p.externalIds),
-            title=p.title,
-            published_at=p.publicationDate,
-            authors=[a.name for a in p.authors],
-            publication_types=publication_types,
-            abstract=p.abstract,
-            citations=p.citationCount,
-            likes=likes,
-            open_pdf_url=p.openAccessPdf["url"] if p.openAccessPdf else None,
-            venue=(
-                Venue.from_semantic_scholar(p.publicationVenue)
-                if p.publicationVenue
-                else None
+    @staticmethod
+    def serialize(
+        p: PaperRecord, likes: int, thumbnail: ThumbnailResponse | None
+    ) -> dict:
+        """Build the JSON of a paper straight from its record.
+
+        Skips model validation, the record fields are copied as they came
+        from Semantic Scholar.
+
+        Args:
+            p (PaperRecord): Paper.
+            likes (int): Number of likes.
+            thumbnail (ThumbnailResponse | None): Thumbnail of the paper.
+
+        Returns:
+            dict: Paper as returned by the API.
+        """
+        external_ids = p.externalIds or {}
+
+        return {
+            "id": p.paperId,
+            "external_ids": {key: external_ids.get(key) for key in EXTERNAL_ID_KEYS},
+            "title": p.title,
+            "authors": p.authors,
+            "citations": p.citationCount or 0,
+            "publication_types": [
+                pt for pt in p.publicationTypes or [] if pt in PUBLICATION_TYPES
+            ],
+            "published_at": (
+                f"{p.publicationDate}T00:00:00" if p.publicationDate else None
             ),
-            thumbnail_url=thumbnail_url,
-            bibtex=p.citationStyles["bibtex"] if p.citationStyles else None,
-        )
+            "abstract": p.abstract,
+            "likes": likes,
+            "open_pdf_url": p.openAccessPdf["url"] if p.openAccessPdf else None,
+            "venue": (
+                Venue.serialize(p.publicationVenue) if p.publicationVenue else None
+            ),
+            "thumbnail_url": (
+                str(thumbnail.url) if thumbnail and thumbnail.url else None
+            ),
+            "thumbnail_status": thumbnail.status.value if thumbnail else None,
+            "thumbnail_srcset": thumbnail.srcset if thumbnail else {},
+            "bibtex": p.citationStyles.get("bibtex") if p.citationStyles else None,
+        }
 
 
 class PaperAutocompleteResponse(BaseModel):
@@ -0,0 +1,183 @@
+import logging
+from datetime import datetime, timedelta
+
+from beanie.operators import In
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.adapters.paper_record import PaperRecord
+from src.config import CONFIG
+from src.monitoring.metrics import METRICS
+from src.papers.models import CachedPaper
+
+
+logger = logging.getLogger(__name__)
+
+_DUPLICATE_KEY_ERROR = 11000
+
+FIELD_GROUPS: dict[str, list[str]] = {
+    "metadata": [
+        "abstract",
+        "authors",
+        "citationStyles",
+        "externalIds",
+        "publicationDate",
+        "publicationTypes",
+        "publicationVenue",
+        "title",
+        "year",
+    ],
+    "access": ["openAccessPdf"],
+    "counts": ["citationCount"],
+}
+"""Cached fields of the card profile by group, every group expires on its own."""
+
+
+def get_ttl(group: str) -> float:
+    """Get the time to live of a field group.
+
+    Args:
+        group (str): Field group.
+
+    Returns:
+        float: Seconds until the group is fetched again.
+    """
+    return getattr(CONFIG.paper_cache, f"{group}_ttl")
+
+
+class PaperCache:
+    """Read-through cache of Semantic Scholar papers stored in Mongo.
+
+    Only the stale field groups of a paper are fetched again, so citation
+    counts are refreshed more often than titles or abstracts. Papers are
+    read in bulk and a page only sends its misses upstream.
+    """
+
+    def __init__(self) -> None:
+        self._hits = 0
+        self._misses = 0
+
+        METRICS.register_gauge("paper_cache.hit_ratio", self.hit_ratio)
+
+    def hit_ratio(self) -> float:
+        """Get the share of papers that were served without upstream call.
+
+        Returns:
+            float: Hit ratio between 0 and 1.
+        """
+        total = self._hits + self._misses
+        return self._hits / total if total else 0.0
+
+    async def find_many_by_ids(self, ids: list[str]) -> list[PaperRecord]:
+        """Find many papers by IDs, fetching stale field groups upstream.
+
+        Args:
+            ids (list[str]): List of paper IDs.
+
+        Returns:
+            list[PaperRecord]: Papers in the order of the IDs, unknown papers are
+                left out.
+        """
+        if len(ids) == 0:
+            return []
+
+        cached = await CachedPaper.find(In(CachedPaper.paper_id, ids)).to_list()
+        entries = {entry.paper_id: entry for entry in cached}
+
+        now = datetime.now()
+        stale: dict[tuple[str, ...], list[str]] = {}
+
+        for paper_id in ids:
+            entry = entries.get(paper_id)
+            groups = tuple(
+                group
+                for group in FIELD_GROUPS
+                if entry is None
+                or group not in entry.fetched_at
+                or entry.fetched_at[group] + timedelta(seconds=get_ttl(group)) <= now
+            )
+
+            if groups:
+                stale.setdefault(groups, []).append(paper_id)
+                for group in groups:
+                    METRICS.increment(f"paper_cache.stale.{group}")
+
+        misses = sum(len(paper_ids) for paper_ids in stale.values())
+        self._hits += len(ids) - misses
+        self._misses += misses
+        METRICS.increment("paper_cache.hits", len(ids) - misses)
+        METRICS.increment("paper_cache.misses", misses)
+
+        # One upstream call per combination of stale groups, usually one
+        for groups, paper_ids in stale.items():
+            try:
+                fetched = await self._fetch(groups, paper_ids, now)
+            except Exception as e:
+                # Stale papers beat an error page, unknown papers cannot wait
+                if any(paper_id not in entries for paper_id in paper_ids):
+                    raise
+
+                logger.warning(f"Serving stale papers, upstream failed: {e}")
+                METRICS.increment("paper_cache.stale_served", len(paper_ids))
+                continue
+
+            for paper_id, data in fetched.items():
+                entry = entries.setdefault(paper_id, CachedPaper(paper_id=paper_id))
+                entry.data.update(data)
+
+        return [
+            ss_adapter.build_paper(entries[paper_id].data)
+            for paper_id in ids
+            if paper_id in entries and entries[paper_id].data.get("paperId")
+        ]
+
+    async def _fetch(
+        self, groups: tuple[str, ...], paper_ids: list[str], now: datetime
+    ) -> dict[str, dict]:
+        fields = ["paperId"] + [
+            field for group in groups for field in FIELD_GROUPS[group]
+        ]
+
+        METRICS.increment("paper_cache.upstream_calls")
+        METRICS.increment("paper_cache.upstream_papers", len(paper_ids))
+        papers = await ss_adapter.find_many_by_ids(paper_ids, fields=fields)
+
+        fetched = {
+            paper.paperId: {field: paper.raw_data.get(field) for field in fields}
+            for paper in papers
+        }
+
+        if len(fetched) == 0:
+            return fetched
+
+        longest_ttl = max(get_ttl(group) for group in FIELD_GROUPS)
+        operations = [
+            UpdateOne(
+                {"paper_id": paper_id},
+                {
+                    "$set": {
+                        **{f"data.{field}": value for field, value in data.items()},
+                        **{f"fetched_at.{group}": now for group in groups},
+                        "expires_at": now + timedelta(seconds=longest_ttl),
+                    },
+                    "$setOnInsert": {"paper_id": paper_id},
+                },
+                upsert=True,
+            )
+            for paper_id, data in fetched.items()
+        ]
+        try:
+            await CachedPaper.get_motor_collection().bulk_write(
+                operations, ordered=False
+            )
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(err["code"] != _DUPLICATE_KEY_ERROR for err in errors):
+                raise
+
+        return fetched
+
+
+PAPER_CACHE = PaperCache()
+"""Global paper cache."""
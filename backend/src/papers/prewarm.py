@@ -0,0 +1,245 @@
+"""Pre-generate the thumbnails of all papers in libraries and likes.
+
+Usage:
+    python -m src.papers.prewarm [--progress-file FILE] [--workers N]
+        [--batch-timeout SECONDS]
+
+Papers are processed in batches and every finished batch is recorded in the
+progress file, so an interrupted run continues where it stopped. Papers whose
+thumbnail exists or failed recently are skipped, and papers still waiting when
+a batch times out are counted as timed out.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+
+from src import database
+from src.adapters import http_client, s3_adapter
+from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.config import CONFIG
+from src.libraries.models import Library
+from src.likes.models import Like
+from src.papers import thumbnail_jobs
+from src.papers.models import ThumbnailStatus
+from src.papers.render import RENDER_POOL
+from src.papers.thumbnail import THUMBNAIL_WORKERS, get_thumbnails
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+"""Largest batch accepted by the Semantic Scholar batch endpoint."""
+
+BATCH_TIMEOUT = 1800
+"""Default seconds to wait for the thumbnails of a batch to settle."""
+
+
+async def collect_paper_ids() -> list[str]:
+    """Collect the distinct IDs of all papers in libraries and likes.
+
+    Returns:
+        list[str]: Sorted list of paper IDs.
+    """
+    library_ids = await Library.distinct("papers")
+    like_ids = await Like.distinct("paper_id")
+
+    return sorted(set(library_ids) | set(like_ids))
+
+
+def load_progress(path: str) -> dict:
+    """Load the progress of a previous run.
+
+    Args:
+        path (str): Path of the progress file.
+
+    Returns:
+        dict: Progress, empty if there was no previous run.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_progress(path: str, progress: dict) -> None:
+    """Save the progress atomically, so an interrupted write keeps the old one.
+
+    Args:
+        path (str): Path of the progress file.
+        progress (dict): Progress to save.
+    """
+    progress["updated_at"] = datetime.now().isoformat()
+
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(progress, file, indent=2)
+
+    os.replace(f"{path}.tmp", path)
+
+
+async def prewarm_batch(
+    paper_ids: list[str], counts: dict[str, int], timeout: float = BATCH_TIMEOUT
+) -> None:
+    """Enqueue the missing thumbnails of a batch and wait until they settle.
+
+    A thumbnail is settled once it is done, failed for good or waits for a
+    retry, which is then left to the API workers. Thumbnails that have not
+    settled after the timeout, e.g. because their job is gone or no worker
+    runs, are counted as timed out.
+
+    Args:
+        paper_ids (list[str]): Batch of paper IDs.
+        counts (dict[str, int]): Counts of the outcomes, updated in place.
+        timeout (float, optional): Seconds to wait for the batch to settle.
+            Defaults to BATCH_TIMEOUT.
+    """
+    # Malformed IDs in likes or libraries count as not found, instead of
+    # failing the batch on every resume
+    records = await ss_adapter.get_checked_batch_data(paper_ids, profile="pdf")
+    papers = [ss_adapter.build_paper(record) for record in records if record]
+    url_names = [(p.openAccessPdf["url"], p.paperId) for p in papers if p.openAccessPdf]
+
+    counts["not_found"] += len(paper_ids) - len(papers)
+    counts["no_pdf"] += len(papers) - len(url_names)
+
+    thumbnails = await get_thumbnails(url_names)
+    waiting = [
+        paper_id
+        for paper_id, thumbnail in thumbnails.items()
+        if thumbnail.status in (ThumbnailStatus.PENDING, ThumbnailStatus.RUNNING)
+    ]
+
+    counts["skipped"] += len(thumbnails) - len(waiting)
+    deadline = asyncio.get_running_loop().time() + timeout
+
+    while waiting:
+        if asyncio.get_running_loop().time() >= deadline:
+            logger.warning(f"{len(waiting)} thumbnails did not settle in time")
+            counts["timed_out"] += len(waiting)
+            break
+
+        await asyncio.sleep(CONFIG.thumbnail.job_poll_interval)
+
+        jobs = await thumbnail_jobs.find_many(waiting)
+        settled = [
+            job
+            for job in jobs.values()
+            if job.status in (ThumbnailStatus.DONE, ThumbnailStatus.FAILED)
+            or (job.status == ThumbnailStatus.PENDING and job.attempts > 0)
+        ]
+
+        for job in settled:
+            key = "failed" if job.status != ThumbnailStatus.DONE else "generated"
+            counts[key] += 1
+
+        settled_ids = {job.paper_id for job in settled}
+        waiting = [paper_id for paper_id in waiting if paper_id not in settled_ids]
+
+
+async def prewarm(
+    progress_file: str, restart: bool, batch_timeout: float = BATCH_TIMEOUT
+) -> dict:
+    """Pre-generate the thumbnails of all papers in libraries and likes.
+
+    Args:
+        progress_file (str): Path of the progress file.
+        restart (bool): Ignore the progress of an interrupted run.
+        batch_timeout (float, optional): Seconds to wait for a batch to
+            settle. Defaults to BATCH_TIMEOUT.
+
+    Returns:
+        dict: Final progress report.
+    """
+    paper_ids = await collect_paper_ids()
+    progress = {} if restart else load_progress(progress_file)
+
+    # A finished run leaves nothing to resume, the next run starts over
+    if "finished_at" in progress:
+        progress = {}
+
+    done_batches = progress.get("batches_done", 0)
+    counts = {
+        "generated": 0,
+        "skipped": 0,
+        "failed": 0,
+        "timed_out": 0,
+        "no_pdf": 0,
+        "not_found": 0,
+        **progress.get("counts", {}),
+    }
+    batches = [
+        paper_ids[i : i + BATCH_SIZE] for i in range(0, len(paper_ids), BATCH_SIZE)
+    ]
+
+    progress = {
+        "started_at": progress.get("started_at", datetime.now().isoformat()),
+        "papers": len(paper_ids),
+        "batches": len(batches),
+        "batches_done": done_batches,
+        "counts": counts,
+    }
+
+    # Papers are sorted, so batches stay stable between runs. Papers added to
+    # finished batches in the meantime are picked up by the next run.
+    for index in range(done_batches, len(batches)):
+        await prewarm_batch(batches[index], counts, batch_timeout)
+
+        progress["batches_done"] = index + 1
+        save_progress(progress_file, progress)
+        logger.info(f"Batch {index + 1}/{len(batches)} done: {counts}")
+
+    progress["finished_at"] = datetime.now().isoformat()
+    save_progress(progress_file, progress)
+
+    return progress
+
+
+async def main(args: argparse.Namespace) -> None:
+    # The workers of this process render the enqueued thumbnails
+    CONFIG.thumbnail.job_workers = args.workers
+
+    client = await database.connect()
+    await http_client.start()
+    await s3_adapter.start()
+    RENDER_POOL.start()
+    THUMBNAIL_WORKERS.start()
+
+    try:
+        progress = await prewarm(args.progress_file, args.restart, args.batch_timeout)
+        logger.info(f"Prewarming finished: {progress['counts']}")
+    finally:
+        await THUMBNAIL_WORKERS.stop()
+        RENDER_POOL.shutdown()
+        await s3_adapter.close()
+        await http_client.close()
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--progress-file", default="prewarm-progress.json")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=CONFIG.thumbnail.job_workers,
+        help="thumbnails generated in parallel",
+    )
+    parser.add_argument(
+        "--batch-timeout",
+        type=float,
+        default=BATCH_TIMEOUT,
+        help="seconds to wait for the thumbnails of a batch",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="ignore the progress of an interrupted run",
+    )
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,205 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from src.config import CONFIG, ThumbnailRendition
+from src.monitoring.metrics import METRICS
+from src.papers.render_engines import get_engine
+
+
+logger = logging.getLogger(__name__)
+
+
+class RenderQueueFullError(Exception):
+    """Raised when no render slot became free within the configured timeout."""
+
+
+FALLBACK_RENDITION = "fallback"
+
+
+def get_renditions() -> dict[str, ThumbnailRendition]:
+    """Get the configured renditions the installed Pillow can encode.
+
+    Returns:
+        dict[str, ThumbnailRendition]: Renditions by name, starting with the
+            fallback rendition.
+    """
+    renditions = {
+        FALLBACK_RENDITION: ThumbnailRendition(
+            width=CONFIG.thumbnail.width,
+            format=CONFIG.thumbnail.format,
+            quality=CONFIG.thumbnail.quality,
+        )
+    }
+
+    for rendition in CONFIG.thumbnail.renditions:
+        if get_pil_format(rendition) in Image.SAVE:
+            renditions[f"{rendition.width}.{rendition.format}"] = rendition
+
+    return renditions
+
+
+def get_pil_format(rendition: ThumbnailRendition) -> str | None:
+    """Get the Pillow format of a rendition.
+
+    Args:
+        rendition (ThumbnailRendition): Rendition.
+
+    Returns:
+        str | None: Pillow format or None if the extension is unknown.
+    """
+    return Image.registered_extensions().get("." + rendition.format)
+
+
+def render_first_page(pdf_path: str, engine: str | None = None) -> dict[str, bytes]:
+    """Rasterize the first page of a PDF into all thumbnail renditions.
+
+    Runs inside a worker process of the render pool. The page is rasterized
+    once at the largest width, every rendition is scaled down from it and
+    encoded exactly once.
+
+    Args:
+        pdf_path (str): Path of the PDF.
+        engine (str | None, optional): Render engine. Defaults to the
+            configured engine.
+
+    Returns:
+        dict[str, bytes]: Encoded renditions by name, empty if nothing was
+            rendered.
+    """
+    renditions = get_renditions()
+    render_engine = get_engine(engine or CONFIG.thumbnail.render_engine)
+
+    page = render_engine.rasterize(pdf_path, max(r.width for r in renditions.values()))
+
+    if page is None:
+        return {}
+
+    return encode_renditions(page, renditions)
+
+
+def encode_renditions(
+    page: Image.Image, renditions: dict[str, ThumbnailRendition]
+) -> dict[str, bytes]:
+    """Scale and encode a page raster into thumbnail renditions.
+
+    Args:
+        page (Image.Image): Page raster.
+        renditions (dict[str, ThumbnailRendition]): Renditions by name.
+
+    Returns:
+        dict[str, bytes]: Encoded renditions by name.
+    """
+    encoded = {}
+
+    for name, rendition in renditions.items():
+        image = page
+        if rendition.width < page.width:
+            height = round(page.height * rendition.width / page.width)
+            image = page.resize((rendition.width, height), Image.Resampling.LANCZOS)
+
+        file_obj = io.BytesIO()
+        image.save(
+            file_obj, format=get_pil_format(rendition), quality=rendition.quality
+        )
+        encoded[name] = file_obj.getvalue()
+
+    return encoded
+
+
+class RenderPool:
+    """Process pool that keeps PDF rasterization off the event loop.
+
+    At most `render_queue_size` renders are submitted to the pool at once,
+    further callers wait for a free slot until `render_queue_timeout`.
+    """
+
+    def __init__(self) -> None:
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._waiting = 0
+        self._running = 0
+
+        METRICS.register_gauge("thumbnail.render.queue_depth", self.queue_depth)
+        METRICS.register_gauge("thumbnail.render.waiting", lambda: self._waiting)
+        METRICS.register_gauge("thumbnail.render.running", lambda: self._running)
+
+    def start(self) -> None:
+        """Start the worker processes."""
+        if self._executor is not None:
+            return
+
+        # Fails at startup instead of on every render if the engine is missing
+        get_engine(CONFIG.thumbnail.render_engine)
+
+        workers = CONFIG.thumbnail.render_workers or os.cpu_count() or 1
+
+        # Spawn instead of fork so workers don't inherit the event loop and
+        # the threads of the Mongo client
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._slots = asyncio.Semaphore(CONFIG.thumbnail.render_queue_size)
+
+        logger.info(f"Render pool started with {workers} workers")
+
+    def shutdown(self) -> None:
+        """Stop the worker processes and drop pending renders."""
+        if self._executor is None:
+            return
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._slots = None
+
+    def queue_depth(self) -> int:
+        """Get the number of renders that are waiting for or occupying a slot.
+
+        Returns:
+            int: Queue depth.
+        """
+        return self._waiting + self._running
+
+    async def render(self, pdf_path: str) -> dict[str, bytes]:
+        """Render the thumbnail renditions in the process pool.
+
+        Args:
+            pdf_path (str): Path of the PDF.
+
+        Returns:
+            dict[str, bytes]: Encoded renditions by name.
+
+        Raises:
+            RenderQueueFullError: If no slot became free in time.
+        """
+        self.start()
+        executor, slots = self._executor, self._slots
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(
+                slots.acquire(), CONFIG.thumbnail.render_queue_timeout
+            )
+        except TimeoutError:
+            METRICS.increment("thumbnail.render.rejected")
+            raise RenderQueueFullError()
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, render_first_page, pdf_path)
+        finally:
+            self._running -= 1
+            slots.release()
+            METRICS.increment("thumbnail.render.completed")
+
+
+RENDER_POOL = RenderPool()
+"""Global thumbnail render pool."""
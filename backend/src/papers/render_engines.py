@@ -0,0 +1,122 @@
+import io
+import subprocess
+from abc import ABC, abstractmethod
+
+from pdf2image import convert_from_path
+from PIL import Image
+
+
+class RenderEngine(ABC):
+    """Rasterizes the first page of a PDF.
+
+    Engines run inside the worker processes of the render pool, so they may
+    block and hold the GIL.
+    """
+
+    name: str
+
+    @abstractmethod
+    def rasterize(self, pdf_path: str, width: int) -> Image.Image | None:
+        """Rasterize the first page of a PDF.
+
+        Args:
+            pdf_path (str): Path of the PDF.
+            width (int): Width of the raster in pixels, the height keeps the
+                aspect ratio of the page.
+
+        Returns:
+            Image.Image | None: RGB raster or None if the PDF has no pages.
+        """
+
+
+class Pdf2ImageEngine(RenderEngine):
+    """Poppler `pdftoppm` through pdf2image, streaming a PPM raster."""
+
+    name = "pdf2image"
+
+    def rasterize(self, pdf_path: str, width: int) -> Image.Image | None:
+        images = convert_from_path(
+            pdf_path, first_page=1, last_page=1, fmt="ppm", size=(width, None)
+        )
+        return images[0] if images else None
+
+
+class PdfToCairoEngine(RenderEngine):
+    """Poppler `pdftocairo`, writing a single PNG to stdout."""
+
+    name = "pdftocairo"
+
+    def rasterize(self, pdf_path: str, width: int) -> Image.Image | None:
+        result = subprocess.run(
+            [
+                "pdftocairo",
+                "-png",
+                "-singlefile",
+                "-f",
+                "1",
+                "-l",
+                "1",
+                "-scale-to-x",
+                str(width),
+                "-scale-to-y",
+                "-1",
+                pdf_path,
+                "-",
+            ],
+            capture_output=True,
+            check=True,
+        )
+
+        if not result.stdout:
+            return None
+
+        return Image.open(io.BytesIO(result.stdout)).convert("RGB")
+
+
+class PyMuPDFEngine(RenderEngine):
+    """MuPDF in process through PyMuPDF, which must be installed separately."""
+
+    name = "pymupdf"
+
+    def __init__(self) -> None:
+        # Optional dependency, only needed when this engine is configured
+        import pymupdf
+
+        self._pymupdf = pymupdf
+
+    def rasterize(self, pdf_path: str, width: int) -> Image.Image | None:
+        with self._pymupdf.open(pdf_path) as document:
+            if document.page_count == 0:
+                return None
+
+            page = document[0]
+            zoom = width / page.rect.width
+            pixmap = page.get_pixmap(
+                matrix=self._pymupdf.Matrix(zoom, zoom), alpha=False
+            )
+
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+
+ENGINES: dict[str, type[RenderEngine]] = {
+    engine.name: engine for engine in (Pdf2ImageEngine, PdfToCairoEngine, PyMuPDFEngine)
+}
+"""Available render engines by name."""
+
+
+def get_engine(name: str) -> RenderEngine:
+    """Create a render engine.
+
+    Args:
+        name (str): Engine name.
+
+    Returns:
+        RenderEngine: Render engine.
+
+    Raises:
+        ValueError: If there is no engine with this name.
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unknown render engine {name}, use one of {list(ENGINES)}")
+
+    return ENGINES[name]()
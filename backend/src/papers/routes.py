@@ -1,23 +1,29 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 
 from src.auth.dependencies import current_user_id
 from src.dependencies import Pagination
 from src.models import PaginatedResponse
 from src.papers import database as papers_db
-from src.papers.models import PaperAutocompleteResponse, PaperResponse, PaperSearchInput
-from src.papers.thumbnail import generate_thumbnails
+from src.papers.models import (
+    PaperAutocompleteResponse,
+    PaperResponse,
+    PaperSearchInput,
+    ThumbnailResponse,
+)
+from src.papers.thumbnail import get_thumbnail, get_thumbnails
 
 
 router = APIRouter(prefix="/papers", tags=["Paper"])
 
 
-@router.get("")
+@router.get("", response_model=list[PaperResponse])
 async def get_feed(
     uid: Annotated[str, Depends(current_user_id)],
     pagination: Annotated[Pagination, Depends(Pagination)],
-) -> list[PaperResponse]:
+) -> JSONResponse:
     """Get a feed of papers based on user research interests.
 
     Args:
@@ -32,16 +38,18 @@ async def get_feed(
     thumbnail_urls = [
         (p.openAccessPdf["url"], p.paperId) for p in papers if p.openAccessPdf
     ]
-    presigned_urls = await generate_thumbnails(thumbnail_urls)
+    thumbnails = await get_thumbnails(thumbnail_urls)
 
-    return [
-        PaperResponse.from_semantic_scholar(
-            paper,
-            like_counts[paper.paperId],
-            presigned_urls[paper.paperId] if paper.paperId in presigned_urls else None,
-        )
-        for paper in papers
-    ]
+    return JSONResponse(
+        [
+            PaperResponse.serialize(
+                paper,
+                like_counts[paper.paperId],
+                thumbnails.get(paper.paperId),
+            )
+            for paper in papers
+        ]
+    )
 
 
 @router.get("/autocomplete")
@@ -58,11 +66,11 @@ async def get_autocomplete(query: str) -> list[PaperAutocompleteResponse]:
     return [PaperAutocompleteResponse.from_semantic_scholar(s) for s in suggestions]
 
 
-@router.post("/search")
+@router.post("/search", response_model=PaginatedResponse[PaperResponse])
 async def search_papers(
     body: PaperSearchInput,
     pagination: Annotated[Pagination, Depends(Pagination)],
-) -> PaginatedResponse[PaperResponse]:
+) -> JSONResponse:
     """Search for papers.
 
     Args:
@@ -77,15 +85,76 @@ async def search_papers(
     thumbnail_urls = [
         (p.openAccessPdf["url"], p.paperId) for p in papers if p.openAccessPdf
     ]
-    presigned_urls = await generate_thumbnails(thumbnail_urls)
+    thumbnails = await get_thumbnails(thumbnail_urls)
 
     papers = [
-        PaperResponse.from_semantic_scholar(
+        PaperResponse.serialize(
             paper,
             like_counts[paper.paperId],
-            presigned_urls[paper.paperId] if paper.paperId in presigned_urls else None,
+            thumbnails.get(paper.paperId),
         )
         for paper in papers
     ]
 
-    return PaginatedResponse[PaperResponse](data=papers, total=total)
+    return JSONResponse({"data": papers, "total": total})
+
+
+@router.get("/{paper_id}/similar", response_model=list[PaperResponse])
+async def get_similar_papers(
+    paper_id: str,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> JSONResponse:
+    """Get the papers with the most similar embeddings to a paper.
+
+    Args:
+        paper_id (str): Paper ID.
+        limit (int, optional): Number of papers. Defaults to 10.
+
+    Returns:
+        list[PaperResponse]: List of papers, most similar first.
+
+    Raises:
+        HTTPException: If the paper has no embedding (yet).
+    """
+    result = await papers_db.get_similar_papers(paper_id, limit)
+
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    papers, like_counts = result
+    thumbnail_urls = [
+        (p.openAccessPdf["url"], p.paperId) for p in papers if p.openAccessPdf
+    ]
+    thumbnails = await get_thumbnails(thumbnail_urls)
+
+    return JSONResponse(
+        [
+            PaperResponse.serialize(
+                paper,
+                like_counts[paper.paperId],
+                thumbnails.get(paper.paperId),
+            )
+            for paper in papers
+        ]
+    )
+
+
+@router.get("/{paper_id}/thumbnail")
+async def get_paper_thumbnail(paper_id: str) -> ThumbnailResponse:
+    """Get the thumbnail status of a paper.
+
+    Args:
+        paper_id (str): Paper ID.
+
+    Returns:
+        ThumbnailResponse: Thumbnail status and URL once it is generated.
+
+    Raises:
+        HTTPException: If no thumbnail was requested for the paper.
+    """
+    thumbnail = await get_thumbnail(paper_id)
+
+    if thumbnail is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    return thumbnail
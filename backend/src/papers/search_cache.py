@@ -0,0 +1,133 @@
+import asyncio
+import logging
+
+
+from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.adapters.paper_record import PaperRecord
+from src.cache import TTLCache
+from src.config import CONFIG
+from src.dependencies import Pagination
+from src.papers.models import PaperSearchInput
+from src.singleflight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+SearchKey = tuple
+SearchResult = tuple[list[PaperRecord], int]
+
+
+def get_search_key(body: PaperSearchInput, pagination: Pagination) -> SearchKey:
+    """Get the canonical cache key of a search.
+
+    Searches that send the same upstream query get the same key: the query is
+    case- and whitespace-normalized, filter lists are sorted, dates are cut to
+    the day and empty filters equal missing ones.
+
+    Args:
+        body (PaperSearchInput): Search parameters.
+        pagination (Pagination): Pagination parameters.
+
+    Returns:
+        SearchKey: Cache key.
+    """
+    return (
+        " ".join(body.query.split()).lower(),
+        tuple(sorted(body.publication_types or [])),
+        body.open_access_pdf,
+        tuple(sorted(body.venues or [])),
+        tuple(sorted(body.fields_of_study or [])),
+        (
+            body.publication_date_start.date().isoformat()
+            if body.publication_date_start
+            else None
+        ),
+        (
+            body.publication_date_end.date().isoformat()
+            if body.publication_date_end
+            else None
+        ),
+        body.min_citation_count or None,
+        pagination.offset,
+        pagination.limit,
+    )
+
+
+class SearchCache:
+    """In-process cache of Semantic Scholar search results.
+
+    Results are fresh for a short TTL. After that they are still served for
+    the stale TTL while one background request refreshes them, so repeated
+    searches never wait on upstream. Concurrent misses of the same search
+    share one upstream request.
+    """
+
+    def __init__(self) -> None:
+        self._cache: TTLCache[SearchKey, SearchResult] = TTLCache(
+            "search",
+            max_size=CONFIG.search_cache.max_size,
+            ttl=CONFIG.search_cache.ttl,
+            stale_ttl=CONFIG.search_cache.stale_ttl,
+        )
+        self._flights: SingleFlight[SearchKey, SearchResult] = SingleFlight("search")
+        self._refreshes: dict[SearchKey, asyncio.Task] = {}
+
+    async def find_many(
+        self, body: PaperSearchInput, pagination: Pagination
+    ) -> SearchResult:
+        """Search papers, served from the cache when possible.
+
+        Args:
+            body (PaperSearchInput): Search parameters.
+            pagination (Pagination): Pagination parameters.
+
+        Returns:
+            SearchResult: List of papers and total count.
+        """
+        key = get_search_key(body, pagination)
+        entry = self._cache.get_stale(key)
+
+        if entry is None:
+            return await self._flights.do(
+                key, lambda: self._fetch(key, body, pagination)
+            )
+
+        result, fresh = entry
+
+        if not fresh and key not in self._refreshes:
+            refresh = asyncio.create_task(
+                self._flights.do(key, lambda: self._fetch(key, body, pagination))
+            )
+            self._refreshes[key] = refresh
+            refresh.add_done_callback(lambda task: self._refreshed(key, task))
+
+        return result
+
+    async def _fetch(
+        self, key: SearchKey, body: PaperSearchInput, pagination: Pagination
+    ) -> SearchResult:
+        result = await ss_adapter.find_many(
+            query=body.query,
+            publication_types=body.publication_types,
+            open_access_pdf=body.open_access_pdf,
+            venues=body.venues,
+            fields_of_study=body.fields_of_study,
+            publication_date_start=body.publication_date_start,
+            publication_date_end=body.publication_date_end,
+            min_citation_count=body.min_citation_count,
+            limit=pagination.limit,
+            offset=pagination.offset,
+        )
+
+        self._cache.set(key, result)
+        return result
+
+    def _refreshed(self, key: SearchKey, task: asyncio.Task) -> None:
+        del self._refreshes[key]
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Search refresh failed: {task.exception()}")
+
+
+SEARCH_CACHE = SearchCache()
+"""Global search result cache."""
@@ -1,96 +1,460 @@
 import logging
 import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, BinaryIO
 
 import asyncio
 from httpx import AsyncClient
-from pdf2image import convert_from_bytes
-from PIL.Image import Image
+from PIL import Image
 
-from src.adapters import s3_adapter
+from src.adapters import http_client, s3_adapter
+from src.adapters.fetch_scheduler import FETCH_SCHEDULER, FetchSlot, HostPausedError
 from src.config import CONFIG
+from src.monitoring.metrics import METRICS
+from src.papers import thumbnail_jobs
+from src.papers.models import ThumbnailJob, ThumbnailResponse, ThumbnailStatus
+from src.papers.render import (
+    FALLBACK_RENDITION,
+    RENDER_POOL,
+    RenderQueueFullError,
+    get_pil_format,
+    get_renditions,
+)
+from src.papers.thumbnail_index import THUMBNAIL_INDEX
+from src.singleflight import SingleFlight
 
 
 logger = logging.getLogger(__name__)
 
+RENDITIONS = get_renditions()
 
-async def generate_thumbnail_from_url(
-    url: str, name: str, client: AsyncClient
-) -> Image | None:
-    """Generate a thumbnail image from a PDF URL.
+
+class ThumbnailError(Exception):
+    """Raised when a thumbnail cannot be generated."""
+
+
+@asynccontextmanager
+async def download_pdf(url: str, client: AsyncClient) -> AsyncIterator[str]:
+    """Stream a PDF into a temporary file that is removed on exit.
+
+    The download is aborted as soon as the response turns out not to be a PDF,
+    exceeds the configured size or runs past the configured deadline, so
+    only one chunk per download is held in memory. The deadline starts once
+    the fetch scheduler grants the slot, waiting for the host does not count.
 
     Args:
         url (str): PDF URL.
-        name (str): Thumbnail name.
         client (AsyncClient): HTTPX Async Client.
 
-    Returns:
-        Image | None: Thumbnail PIL Image or None if an error occurred.
+    Yields:
+        str: Path of the downloaded PDF.
+
+    Raises:
+        ThumbnailError: If the URL does not serve a PDF within the limits.
+        HostPausedError: If the host of the URL asked to slow down.
     """
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+
     try:
-        response = await client.get(url, follow_redirects=True, timeout=None)
+        with os.fdopen(fd, "wb") as file:
+            async with FETCH_SCHEDULER.slot(url) as slot:
+                try:
+                    async with asyncio.timeout(CONFIG.thumbnail.download_timeout):
+                        await __stream_pdf(url, client, file, slot)
+
+                except TimeoutError:
+                    METRICS.increment("thumbnail.download.aborted")
+                    raise ThumbnailError("PDF download timed out")
+
+        yield path
+
+    finally:
+        os.remove(path)
+
+
+async def __stream_pdf(
+    url: str, client: AsyncClient, file: BinaryIO, slot: FetchSlot
+) -> None:
+    max_bytes = CONFIG.thumbnail.download_max_bytes
+
+    async with client.stream(
+        "GET",
+        url,
+        follow_redirects=True,
+        timeout=CONFIG.thumbnail.download_timeout,
+    ) as response:
+        slot.report(response)
 
         if response.status_code != 200:
-            return None
-
-        if "application/pdf" not in response.headers.get("Content-Type"):
-            return None
-
-        images = convert_from_bytes(
-            response.content,
-            output_folder=CONFIG.thumbnail.local_folder,
-            single_file=True,
-            output_file=name,
-            first_page=1,
-            last_page=1,
-            fmt=CONFIG.thumbnail.format,
-            jpegopt={"quality": CONFIG.thumbnail.quality},
-            size=(CONFIG.thumbnail.width, None),
+            raise ThumbnailError(f"PDF download failed with {response.status_code}")
+
+        content_type = response.headers.get("Content-Type", "")
+        if "application/pdf" not in content_type:
+            METRICS.increment("thumbnail.download.aborted")
+            raise ThumbnailError(f"Unexpected Content-Type {content_type}")
+
+        content_length = response.headers.get("Content-Length")
+        if (
+            content_length
+            and content_length.isdigit()
+            and int(content_length) > max_bytes
+        ):
+            METRICS.increment("thumbnail.download.aborted")
+            raise ThumbnailError(f"PDF exceeds {max_bytes} bytes")
+
+        size = 0
+        header = b""
+
+        async for chunk in response.aiter_bytes(CONFIG.thumbnail.download_chunk_size):
+            if len(header) < len(__PDF_MAGIC):
+                header += chunk[: len(__PDF_MAGIC) - len(header)]
+
+                if not __PDF_MAGIC.startswith(header):
+                    METRICS.increment("thumbnail.download.aborted")
+                    raise ThumbnailError("Response is not a PDF")
+
+            size += len(chunk)
+            if size > max_bytes:
+                METRICS.increment("thumbnail.download.aborted")
+                raise ThumbnailError(f"PDF exceeds {max_bytes} bytes")
+
+            file.write(chunk)
+
+        if header != __PDF_MAGIC:
+            raise ThumbnailError("Response is not a PDF")
+
+        METRICS.increment("thumbnail.download.bytes", size)
+
+
+__PDF_MAGIC = b"%PDF-"
+
+
+async def generate_thumbnail_from_url(
+    url: str, client: AsyncClient
+) -> dict[str, bytes]:
+    """Generate the encoded thumbnail renditions from a PDF URL.
+
+    Args:
+        url (str): PDF URL.
+        client (AsyncClient): HTTPX Async Client.
+
+    Returns:
+        dict[str, bytes]: Encoded renditions by name.
+
+    Raises:
+        ThumbnailError: If the PDF cannot be downloaded or rendered.
+    """
+    async with download_pdf(url, client) as path:
+        try:
+            renditions = await RENDER_POOL.render(path)
+        except RenderQueueFullError:
+            raise ThumbnailError("Render queue full")
+
+    if not renditions:
+        raise ThumbnailError("PDF has no pages")
+
+    return renditions
+
+
+def get_thumbnail_key(paper_id: str, rendition: str) -> str:
+    """Get the S3 key of a thumbnail rendition.
+
+    The fallback rendition is stored under the paper ID, so thumbnails
+    generated before renditions existed stay valid.
+
+    Args:
+        paper_id (str): Paper ID.
+        rendition (str): Rendition name.
+
+    Returns:
+        str: S3 key.
+    """
+    if rendition == FALLBACK_RENDITION:
+        return paper_id
+
+    return f"{paper_id}/{rendition}"
+
+
+class ThumbnailWorkerPool:
+    """Workers that process the thumbnail job queue in the background.
+
+    Workers poll the queue, and are woken up right away when this process
+    enqueues new jobs. Claimed jobs keep their lease while they run, and a
+    paper that is claimed again while it is still being generated in this
+    process joins the running generation instead of starting another one.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._generations: SingleFlight[str, list[str]] = SingleFlight(
+            "thumbnail.generations"
         )
 
-        img_path = os.path.join(
-            CONFIG.thumbnail.local_folder, name + "." + CONFIG.thumbnail.format
+    def start(self) -> None:
+        """Start the worker tasks."""
+        if self._tasks:
+            return
+
+        self._tasks = [
+            asyncio.create_task(self._work(worker_id))
+            for worker_id in range(CONFIG.thumbnail.job_workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks, claimed jobs are retried after their lease."""
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake up idle workers because new jobs were enqueued."""
+        self._wakeup.set()
+
+    async def _work(self, worker_id: int) -> None:
+        client = await http_client.get_client()
+
+        while True:
+            try:
+                job = await thumbnail_jobs.claim_next()
+            except Exception as e:
+                logger.error(f"Thumbnail worker {worker_id} failed to claim:\n{e}\n")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), CONFIG.thumbnail.job_poll_interval
+                    )
+                except TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(job, client)
+            except Exception as e:
+                logger.error(f"Thumbnail worker {worker_id} failed:\n{e}\n")
+
+    async def _run(self, job: ThumbnailJob, client: AsyncClient) -> None:
+        heartbeat = asyncio.create_task(self._renew_lease(job))
+
+        try:
+            renditions = await self._generations.do(
+                job.paper_id, lambda: self._generate(job.paper_id, job.pdf_url, client)
+            )
+            error = None
+        except Exception as e:
+            renditions = None
+            error = e
+        finally:
+            heartbeat.cancel()
+
+        if isinstance(error, HostPausedError):
+            # The host is not the paper's fault, the attempt does not count
+            METRICS.increment("thumbnail.jobs.postponed")
+            await thumbnail_jobs.postpone(job, error.retry_after)
+            return
+
+        if error is not None:
+            logger.warning(f"Thumbnail job {job.paper_id} failed: {error}")
+            METRICS.increment("thumbnail.jobs.failed")
+            await thumbnail_jobs.fail(job, str(error) or type(error).__name__)
+
+            if job.status == ThumbnailStatus.FAILED:
+                THUMBNAIL_INDEX.add_failure(job.paper_id, job.error, job.retry_after)
+            return
+
+        METRICS.increment("thumbnail.jobs.completed")
+        await thumbnail_jobs.complete(job, renditions)
+        THUMBNAIL_INDEX.add(job.paper_id, renditions)
+
+    async def _generate(
+        self, paper_id: str, pdf_url: str, client: AsyncClient
+    ) -> list[str]:
+        renditions = await generate_thumbnail_from_url(pdf_url, client)
+        await asyncio.gather(
+            *(
+                self._upload(paper_id, name, thumbnail)
+                for name, thumbnail in renditions.items()
+            )
         )
-        if os.path.exists(img_path):
-            os.remove(img_path)
 
-        if not images:
-            return None
+        return list(renditions)
 
-        return images[0]
+    async def _renew_lease(self, job: ThumbnailJob) -> None:
+        interval = CONFIG.thumbnail.job_lease_renewal
+        if interval is None:
+            return
 
-    except Exception as e:
-        logger.error(f"Error generating thumbnail:\n{e}\n")
-        return None
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                renewed = await thumbnail_jobs.renew_lease(job)
+            except Exception as e:
+                logger.warning(f"Thumbnail job {job.paper_id} lease renewal: {e}")
+                continue
 
+            if not renewed:
+                logger.warning(f"Thumbnail job {job.paper_id} lost its lease")
+                METRICS.increment("thumbnail.jobs.lease_lost")
+                return
+
+    async def _upload(self, paper_id: str, rendition: str, thumbnail: bytes) -> None:
+        content_type = Image.MIME[get_pil_format(RENDITIONS[rendition])]
+        key = get_thumbnail_key(paper_id, rendition)
+        await s3_adapter.upload(key, thumbnail, content_type)
+
+        METRICS.increment(f"thumbnail.rendition.{rendition}.stored")
+        METRICS.increment(
+            f"thumbnail.rendition.{rendition}.stored_bytes", len(thumbnail)
+        )
 
-async def generate_thumbnails(
+
+THUMBNAIL_WORKERS = ThumbnailWorkerPool()
+"""Global thumbnail worker pool."""
+
+
+async def get_thumbnails(
     url_names: list[tuple[str, str]]
-) -> dict[str, str | None]:
-    """Simultaneously generate thumbnail images from PDF URLs.
+) -> dict[str, ThumbnailResponse]:
+    """Get the thumbnails of papers and enqueue the missing ones.
+
+    Returns immediately, thumbnails that are not generated yet come back
+    without URL and show up on a later request. Papers in the thumbnail index
+    are answered without a database lookup.
 
     Args:
         url_names (list[tuple[str, str]]): List of PDF URLs and Thumbnail names.
 
     Returns:
-        dict[str, str | None]: Dictionary of Thumbnail names and S3 presigned URLs.
+        dict[str, ThumbnailResponse]: Dictionary of Thumbnail names and thumbnails.
     """
-    semaphore = asyncio.Semaphore(10)
+    thumbnails = {}
+    unknown = []
+
+    for url, name in url_names:
+        renditions = THUMBNAIL_INDEX.get(name)
+        if renditions is not None:
+            thumbnails[name] = await __done(name, renditions)
+            continue
+
+        failure = THUMBNAIL_INDEX.get_failure(name)
+        if failure is not None:
+            thumbnails[name] = ThumbnailResponse(
+                paper_id=name,
+                status=ThumbnailStatus.FAILED,
+                error=failure.reason,
+                retry_after=failure.retry_after,
+            )
+            continue
 
-    async with AsyncClient() as client:
+        unknown.append((url, name))
 
-        async def sem_task(url: str, name: str):
-            async with semaphore:
-                if not s3_adapter.exists(name):
-                    img = await generate_thumbnail_from_url(url, name, client)
+    METRICS.increment("thumbnail.index.hits", len(url_names) - len(unknown))
+    METRICS.increment("thumbnail.index.misses", len(unknown))
 
-                    if not img:
-                        return name, None
+    if len(unknown) == 0:
+        return thumbnails
 
-                    s3_adapter.upload_from_pil(name, img)
+    jobs = await thumbnail_jobs.find_many([name for _, name in unknown])
+    missing, retries = [], []
+    now = datetime.now()
 
-                return name, s3_adapter.get_presigned_url(name)
+    for url, name in unknown:
+        job = jobs.get(name)
+
+        if job is None:
+            missing.append((url, name))
+            status = ThumbnailStatus.PENDING
+
+        elif job.status == ThumbnailStatus.DONE:
+            THUMBNAIL_INDEX.add(name, job.renditions)
+            thumbnails[name] = await __done(name, job.renditions)
+            continue
+
+        elif job.status == ThumbnailStatus.FAILED and (
+            job.retry_after is not None and job.retry_after > now
+        ):
+            THUMBNAIL_INDEX.add_failure(name, job.error, job.retry_after)
+            thumbnails[name] = ThumbnailResponse(
+                paper_id=name,
+                status=job.status,
+                error=job.error,
+                retry_after=job.retry_after,
+            )
+            continue
+
+        elif job.status == ThumbnailStatus.FAILED:
+            retries.append(name)
+            status = ThumbnailStatus.PENDING
+
+        else:
+            status = job.status
+
+        thumbnails[name] = ThumbnailResponse(paper_id=name, status=status)
+
+    if len(missing) > 0:
+        await thumbnail_jobs.enqueue(missing)
+
+    if len(retries) > 0:
+        await thumbnail_jobs.retry(retries)
+
+    if len(missing) > 0 or len(retries) > 0:
+        THUMBNAIL_WORKERS.notify()
+
+    return thumbnails
+
+
+async def __done(paper_id: str, renditions: list[str]) -> ThumbnailResponse:
+    url = await s3_adapter.get_presigned_url(paper_id)
+    srcset: dict[str, list[str]] = {}
+
+    for name in renditions:
+        # Renditions that are no longer configured are not offered anymore
+        if name == FALLBACK_RENDITION or name not in RENDITIONS:
+            continue
+
+        rendition = RENDITIONS[name]
+        key = get_thumbnail_key(paper_id, name)
+        rendition_url = await s3_adapter.get_presigned_url(key)
+
+        mime = Image.MIME[get_pil_format(rendition)]
+        srcset.setdefault(mime, []).append(f"{rendition_url} {rendition.width}w")
+
+    return ThumbnailResponse(
+        paper_id=paper_id,
+        status=ThumbnailStatus.DONE,
+        url=url,
+        srcset={mime: ", ".join(sources) for mime, sources in srcset.items()},
+    )
+
+
+async def get_thumbnail(paper_id: str) -> ThumbnailResponse | None:
+    """Get the thumbnail status of a paper.
+
+    Args:
+        paper_id (str): Paper ID.
+
+    Returns:
+        ThumbnailResponse | None: Thumbnail or None if it was never requested.
+    """
+    job = await thumbnail_jobs.find_one(paper_id)
+
+    if job is None:
+        return None
 
-        tasks = [sem_task(url, name) for url, name in url_names]
-        results = await asyncio.gather(*tasks)
+    if job.status == ThumbnailStatus.DONE:
+        return await __done(paper_id, job.renditions)
 
-    return {name: url for name, url in results}
+    return ThumbnailResponse(
+        paper_id=paper_id,
+        status=job.status,
+        error=job.error,
+        retry_after=job.retry_after,
+    )
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple
+
+from src.config import CONFIG
+from src.monitoring.metrics import METRICS
+
+
+class ThumbnailFailure(NamedTuple):
+    reason: str | None
+    retry_after: datetime
+
+
+class ThumbnailIndex:
+    """In-process index of generated thumbnails and recently failed papers.
+
+    Known thumbnails are served without asking Mongo or S3, failed papers are
+    not downloaded again until their retry time. Both maps are bounded and
+    evict the least recently used entries.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._known: OrderedDict[str, list[str]] = OrderedDict()
+        self._failures: OrderedDict[str, ThumbnailFailure] = OrderedDict()
+
+        METRICS.register_gauge("thumbnail.index.known", lambda: len(self._known))
+        METRICS.register_gauge("thumbnail.index.failed", lambda: len(self._failures))
+
+    def get(self, paper_id: str) -> list[str] | None:
+        """Get the renditions of a thumbnail that is known to exist.
+
+        Args:
+            paper_id (str): Paper ID.
+
+        Returns:
+            list[str] | None: Names of the renditions or None if unknown.
+        """
+        renditions = self._known.get(paper_id)
+
+        if renditions is None:
+            return None
+
+        self._known.move_to_end(paper_id)
+        return renditions
+
+    def add(self, paper_id: str, renditions: list[str]) -> None:
+        """Record an existing thumbnail.
+
+        Args:
+            paper_id (str): Paper ID.
+            renditions (list[str]): Names of the renditions.
+        """
+        self._failures.pop(paper_id, None)
+        self._known[paper_id] = renditions
+        self._known.move_to_end(paper_id)
+
+        if len(self._known) > self._max_size:
+            self._known.popitem(last=False)
+
+    def get_failure(self, paper_id: str) -> ThumbnailFailure | None:
+        """Get the failure of a paper that must not be retried yet.
+
+        Args:
+            paper_id (str): Paper ID.
+
+        Returns:
+            ThumbnailFailure | None: Failure or None if the paper may be retried.
+        """
+        failure = self._failures.get(paper_id)
+
+        if failure is None:
+            return None
+
+        if failure.retry_after <= datetime.now():
+            del self._failures[paper_id]
+            return None
+
+        self._failures.move_to_end(paper_id)
+        return failure
+
+    def add_failure(
+        self, paper_id: str, reason: str | None, retry_after: datetime
+    ) -> None:
+        """Record a paper whose thumbnail could not be generated.
+
+        Args:
+            paper_id (str): Paper ID.
+            reason (str | None): Reason of the failure.
+            retry_after (datetime): Time after which the paper may be retried.
+        """
+        self._failures[paper_id] = ThumbnailFailure(reason, retry_after)
+        self._failures.move_to_end(paper_id)
+
+        if len(self._failures) > self._max_size:
+            self._failures.popitem(last=False)
+
+
+THUMBNAIL_INDEX = ThumbnailIndex(CONFIG.thumbnail.index_size)
+"""Global thumbnail existence index."""
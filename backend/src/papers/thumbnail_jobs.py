@@ -0,0 +1,278 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from beanie.operators import In
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.config import CONFIG
+from src.papers.models import ThumbnailJob, ThumbnailStatus
+
+
+__DUPLICATE_KEY_ERROR = 11000
+
+
+async def find_many(paper_ids: list[str]) -> dict[str, ThumbnailJob]:
+    """Find the thumbnail jobs of many papers.
+
+    Args:
+        paper_ids (list[str]): List of paper IDs.
+
+    Returns:
+        dict[str, ThumbnailJob]: Dictionary of paper IDs and jobs.
+    """
+    jobs = await ThumbnailJob.find(In(ThumbnailJob.paper_id, paper_ids)).to_list()
+    return {job.paper_id: job for job in jobs}
+
+
+async def find_one(paper_id: str) -> ThumbnailJob | None:
+    """Find the thumbnail job of a paper.
+
+    Args:
+        paper_id (str): Paper ID.
+
+    Returns:
+        ThumbnailJob | None: Job if the paper was ever enqueued, None otherwise.
+    """
+    return await ThumbnailJob.find_one(ThumbnailJob.paper_id == paper_id)
+
+
+async def enqueue(url_names: list[tuple[str, str]]) -> None:
+    """Enqueue thumbnail jobs, papers that already have a job are skipped.
+
+    Args:
+        url_names (list[tuple[str, str]]): List of PDF URLs and paper IDs.
+    """
+    now = datetime.now()
+    operations = [
+        UpdateOne(
+            {"paper_id": paper_id},
+            {
+                "$setOnInsert": {
+                    "paper_id": paper_id,
+                    "pdf_url": url,
+                    "status": ThumbnailStatus.PENDING.value,
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            },
+            upsert=True,
+        )
+        for url, paper_id in url_names
+    ]
+
+    try:
+        await ThumbnailJob.get_motor_collection().bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # Concurrent upserts of the same paper race on the unique index
+        errors = e.details.get("writeErrors", [])
+        if any(err["code"] != __DUPLICATE_KEY_ERROR for err in errors):
+            raise
+
+
+async def retry(paper_ids: list[str]) -> None:
+    """Put failed jobs whose retry time has passed back into the queue.
+
+    Jobs that failed before retry times were recorded have none and are
+    retried right away.
+
+    Args:
+        paper_ids (list[str]): List of paper IDs.
+    """
+    now = datetime.now()
+    await ThumbnailJob.get_motor_collection().update_many(
+        {
+            "paper_id": {"$in": paper_ids},
+            "status": ThumbnailStatus.FAILED.value,
+            # None also matches jobs without the field
+            "$or": [{"retry_after": None}, {"retry_after": {"$lte": now}}],
+        },
+        {
+            "$set": {
+                "status": ThumbnailStatus.PENDING.value,
+                "attempts": 0,
+                "retry_after": None,
+                "next_attempt_at": now,
+                "updated_at": now,
+            }
+        },
+    )
+
+
+async def claim_next() -> ThumbnailJob | None:
+    """Claim the next due job by locking it for the configured lease.
+
+    Running jobs whose lease expired are claimed again, so jobs of crashed
+    workers are not lost. Every claim gets a new lease ID, so a worker whose
+    lease expired cannot renew or fail the job anymore.
+
+    Returns:
+        ThumbnailJob | None: Claimed job or None if no job is due.
+    """
+    now = datetime.now()
+    job = await ThumbnailJob.get_motor_collection().find_one_and_update(
+        {
+            "$or": [
+                {
+                    "status": ThumbnailStatus.PENDING.value,
+                    "next_attempt_at": {"$lte": now},
+                },
+                {
+                    "status": ThumbnailStatus.RUNNING.value,
+                    "locked_until": {"$lte": now},
+                },
+            ]
+        },
+        {
+            "$set": {
+                "status": ThumbnailStatus.RUNNING.value,
+                "locked_until": now + timedelta(seconds=CONFIG.thumbnail.job_lease),
+                "lease_id": uuid4().hex,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("next_attempt_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+    if job is None:
+        return None
+
+    return ThumbnailJob.model_validate(job)
+
+
+async def renew_lease(job: ThumbnailJob) -> bool:
+    """Extend the lease of a running job.
+
+    Args:
+        job (ThumbnailJob): Claimed job.
+
+    Returns:
+        bool: True if the lease was renewed, False if it was lost.
+    """
+    now = datetime.now()
+    locked_until = now + timedelta(seconds=CONFIG.thumbnail.job_lease)
+
+    result = await ThumbnailJob.get_motor_collection().update_one(
+        {"_id": job.id, "lease_id": job.lease_id},
+        {"$set": {"locked_until": locked_until, "updated_at": now}},
+    )
+
+    if result.matched_count == 0:
+        return False
+
+    job.locked_until = locked_until
+    return True
+
+
+async def complete(job: ThumbnailJob, renditions: list[str]) -> None:
+    """Mark a job as done.
+
+    Args:
+        job (ThumbnailJob): Claimed job.
+        renditions (list[str]): Names of the generated renditions.
+    """
+    # Done is final, so the job is completed even if the lease was lost
+    await job.set(
+        {
+            ThumbnailJob.status: ThumbnailStatus.DONE,
+            ThumbnailJob.renditions: renditions,
+            ThumbnailJob.error: None,
+            ThumbnailJob.locked_until: None,
+            ThumbnailJob.lease_id: None,
+            ThumbnailJob.updated_at: datetime.now(),
+        }
+    )
+
+
+async def fail(job: ThumbnailJob, error: str) -> bool:
+    """Schedule a retry with exponential backoff or give up on the job.
+
+    Args:
+        job (ThumbnailJob): Claimed job.
+        error (str): Reason of the failure.
+
+    Returns:
+        bool: True if the job was updated, False if the lease was lost.
+    """
+    now = datetime.now()
+
+    retry_after = None
+
+    if job.attempts >= CONFIG.thumbnail.job_max_attempts:
+        status = ThumbnailStatus.FAILED
+        next_attempt_at = job.next_attempt_at
+        retry_after = now + timedelta(seconds=CONFIG.thumbnail.failure_retry_after)
+    else:
+        status = ThumbnailStatus.PENDING
+        delay = CONFIG.thumbnail.job_retry_delay * 2 ** (job.attempts - 1)
+        next_attempt_at = now + timedelta(seconds=delay)
+
+    update = {
+        "status": status.value,
+        "error": error,
+        "retry_after": retry_after,
+        "next_attempt_at": next_attempt_at,
+        "locked_until": None,
+        "lease_id": None,
+        "updated_at": now,
+    }
+
+    # Another worker may have claimed the job since, its outcome wins
+    result = await ThumbnailJob.get_motor_collection().update_one(
+        {"_id": job.id, "lease_id": job.lease_id}, {"$set": update}
+    )
+
+    if result.matched_count == 0:
+        return False
+
+    job.status = status
+    job.error = error
+    job.retry_after = retry_after
+    job.next_attempt_at = next_attempt_at
+    job.locked_until = None
+    job.lease_id = None
+    job.updated_at = now
+    return True
+
+
+async def postpone(job: ThumbnailJob, delay: float) -> bool:
+    """Put a job back into the queue without counting its attempt.
+
+    Args:
+        job (ThumbnailJob): Claimed job.
+        delay (float): Seconds until the job is due again.
+
+    Returns:
+        bool: True if the job was updated, False if the lease was lost.
+    """
+    now = datetime.now()
+    next_attempt_at = now + timedelta(seconds=delay)
+
+    result = await ThumbnailJob.get_motor_collection().update_one(
+        {"_id": job.id, "lease_id": job.lease_id},
+        {
+            "$set": {
+                "status": ThumbnailStatus.PENDING.value,
+                "next_attempt_at": next_attempt_at,
+                "locked_until": None,
+                "lease_id": None,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": -1},
+        },
+    )
+
+    if result.matched_count == 0:
+        return False
+
+    job.status = ThumbnailStatus.PENDING
+    job.attempts -= 1
+    job.next_attempt_at = next_attempt_at
+    job.locked_until = None
+    job.lease_id = None
+    job.updated_at = now
+    return True
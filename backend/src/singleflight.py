@@ -0,0 +1,60 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from src.monitoring.metrics import METRICS
+
+
+KeyType = TypeVar("KeyType", bound=Hashable)
+ValueType = TypeVar("ValueType")
+
+
+class SingleFlight(Generic[KeyType, ValueType]):
+    """Coalesces concurrent calls for the same key into one in-flight call.
+
+    Callers arriving while a call for their key runs await its result instead
+    of starting their own. Coalesced calls and calls in flight are exported
+    as metrics under `singleflight.<name>`.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._flights: dict[KeyType, asyncio.Future[ValueType]] = {}
+
+        METRICS.register_gauge(
+            f"singleflight.{name}.in_flight", lambda: len(self._flights)
+        )
+
+    async def do(
+        self, key: KeyType, call: Callable[[], Awaitable[ValueType]]
+    ) -> ValueType:
+        """Run a call, or join the call already running for the key.
+
+        The call runs in its own task, so it is not cancelled when one of
+        its callers is.
+
+        Args:
+            key (KeyType): Key of the call.
+            call (Callable[[], Awaitable[ValueType]]): Call to run.
+
+        Returns:
+            ValueType: Result of the call.
+        """
+        flight = self._flights.get(key)
+
+        if flight is not None:
+            METRICS.increment(f"singleflight.{self._name}.coalesced")
+            return await asyncio.shield(flight)
+
+        flight = asyncio.ensure_future(call())
+        self._flights[key] = flight
+        flight.add_done_callback(lambda _: self._done(key, flight))
+
+        return await asyncio.shield(flight)
+
+    def _done(self, key: KeyType, flight: asyncio.Future[ValueType]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+        # Marks the exception as retrieved when every caller was cancelled
+        if not flight.cancelled():
+            flight.exception()
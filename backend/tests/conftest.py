@@ -0,0 +1,31 @@
+import os
+
+# The settings require an S3 endpoint, tests never reach it
+os.environ.setdefault("AWS_ENDPOINT_URL", "http://localhost:9000")
+
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from src.config import CONFIG
+
+
+@pytest.fixture
+async def db():
+    """In-memory Mongo database with all document models initialized."""
+    from src.database import DOCUMENT_MODELS
+
+    database = AsyncMongoMockClient()["paperhub-test"]
+    await init_beanie(database, document_models=DOCUMENT_MODELS)
+    yield database
+
+
+@pytest.fixture
+def config(monkeypatch):
+    """Settings that a test may change, restored afterwards."""
+
+    def set(section: str, **values) -> None:
+        for name, value in values.items():
+            monkeypatch.setattr(getattr(CONFIG, section), name, value)
+
+    return set
@@ -0,0 +1,53 @@
+import time
+
+from src.cache import TTLCache
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache = TTLCache[str, int]("test", max_size=10, ttl=5)
+
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+    assert cache.get("a") == 1
+
+    now += 10
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_stale_entries_are_served_within_the_stale_ttl(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache = TTLCache[str, int]("test", max_size=10, ttl=5, stale_ttl=10)
+    cache.set("a", 1)
+
+    now += 7
+    assert cache.get("a") is None
+    assert cache.get_stale("a") == (1, False)
+
+    now += 10
+    assert cache.get_stale("a") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache[str, int]("test", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_pop_removes_an_entry():
+    cache = TTLCache[str, int]("test", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.pop("a")
+    cache.pop("missing")
+
+    assert cache.get("a") is None
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from src.papers import corpus
+from src.papers.corpus import CorpusPaper
+
+
+def build_filter(**filters) -> dict:
+    arguments = {
+        "query": "",
+        "publication_types": None,
+        "open_access_pdf": False,
+        "venues": None,
+        "fields_of_study": None,
+        "publication_date_start": None,
+        "publication_date_end": None,
+        "min_citation_count": None,
+    }
+    return corpus.build_filter(**(arguments | filters))
+
+
+async def find_ids(filter: dict) -> list[str]:
+    papers = await CorpusPaper.find(filter).sort("paper_id").to_list()
+    return [paper.paper_id for paper in papers]
+
+
+def test_empty_search_matches_everything():
+    assert build_filter() == {}
+    assert build_filter(query="   ", min_citation_count=0) == {}
+
+
+def test_query_is_a_text_search_next_to_the_filters():
+    assert build_filter(query="graph nets", min_citation_count=5) == {
+        "$and": [
+            {"$text": {"$search": "graph nets"}},
+            {"citation_count": {"$gte": 5}},
+        ]
+    }
+
+
+async def test_filters_match_like_upstream(db):
+    papers = [
+        CorpusPaper(
+            paper_id="a",
+            title="A",
+            publication_date=datetime(2021, 5, 1),
+            year=2021,
+            publication_types=["Review"],
+            fields_of_study=["Computer Science"],
+            venues=["NeurIPS"],
+            citation_count=50,
+            open_access_pdf=True,
+        ),
+        CorpusPaper(
+            paper_id="b",
+            title="B",
+            year=2021,
+            publication_types=["JournalArticle"],
+            fields_of_study=["Medicine"],
+            venues=["Nature", "Nat."],
+            citation_count=3,
+        ),
+        CorpusPaper(
+            paper_id="c",
+            title="C",
+            publication_date=datetime(2019, 12, 31),
+            year=2019,
+            publication_types=["Review", "JournalArticle"],
+            fields_of_study=["Medicine", "Biology"],
+            citation_count=200,
+        ),
+    ]
+    for paper in papers:
+        await paper.insert()
+
+    assert await find_ids(build_filter()) == ["a", "b", "c"]
+    assert await find_ids(build_filter(publication_types=["Review"])) == ["a", "c"]
+    assert await find_ids(build_filter(open_access_pdf=True)) == ["a"]
+    assert await find_ids(build_filter(venues=["Nat."])) == ["b"]
+    assert await find_ids(build_filter(fields_of_study=["Medicine"])) == ["b", "c"]
+    assert await find_ids(build_filter(min_citation_count=50)) == ["a", "c"]
+
+    # Papers without publication date are matched by their year
+    assert await find_ids(
+        build_filter(publication_date_start=datetime(2021, 1, 1))
+    ) == ["a", "b"]
+    assert await find_ids(
+        build_filter(publication_date_end=datetime(2021, 4, 30, 18, 30))
+    ) == ["b", "c"]
+    assert await find_ids(
+        build_filter(
+            publication_date_start=datetime(2020, 1, 1),
+            fields_of_study=["Medicine"],
+            min_citation_count=1,
+        )
+    ) == ["b"]
@@ -0,0 +1,82 @@
+import pytest
+from semanticscholar.SemanticScholarException import BadQueryParametersException
+
+from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.likes.models import Like
+from src.likes.reconciler import LikeReconciler
+
+PAPER = "a" * 40
+RESOLVED = "b" * 40
+UNKNOWN = "c" * 40
+
+
+class FakeUpstream:
+    """Batch endpoint that rejects batches containing a malformed ID."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    async def get_batch_data(self, ids, profile="card", fields=None):
+        self.batches.append(ids)
+
+        if any(not ss_adapter.is_paper_id(paper_id) for paper_id in ids):
+            raise BadQueryParametersException("Invalid paper ID")
+
+        papers = {PAPER: PAPER, RESOLVED: RESOLVED, "DOI:10.1000/1": RESOLVED}
+        return [
+            {"paperId": papers[paper_id]} if paper_id in papers else None
+            for paper_id in ids
+        ]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = FakeUpstream()
+    monkeypatch.setattr(ss_adapter, "get_batch_data", upstream.get_batch_data)
+    return upstream
+
+
+def test_prefixed_external_ids_are_accepted():
+    assert ss_adapter.is_paper_id(PAPER)
+    assert ss_adapter.is_paper_id("DOI:10.1145/3292500.3330701")
+    assert ss_adapter.is_paper_id("arXiv:1705.10311")
+    assert ss_adapter.is_paper_id("CorpusId:215416146")
+    assert not ss_adapter.is_paper_id("A" * 40)
+    assert not ss_adapter.is_paper_id("ISBN:123")
+    assert not ss_adapter.is_paper_id("DOI:")
+
+
+async def test_rejected_batches_are_split_down_to_the_malformed_ids(upstream):
+    ids = [PAPER, "bad", UNKNOWN, RESOLVED, "DOI:10.1000/1"]
+
+    records = await ss_adapter.get_checked_batch_data(ids, profile="id-only")
+
+    assert records == [
+        {"paperId": PAPER},
+        None,
+        None,
+        {"paperId": RESOLVED},
+        {"paperId": RESOLVED},
+    ]
+    assert [len(batch) for batch in upstream.batches] == [5, 2, 3, 1, 1]
+
+
+async def test_likes_are_verified_resolved_or_deleted(db, upstream):
+    likes = [
+        Like(paper_id=PAPER, user_id="ann", verified=False),
+        Like(paper_id="DOI:10.1000/1", user_id="ann", verified=False),
+        Like(paper_id=RESOLVED, user_id="bob"),
+        Like(paper_id="DOI:10.1000/1", user_id="bob", verified=False),
+        Like(paper_id=UNKNOWN, user_id="bob", verified=False),
+    ]
+    for like in likes:
+        await like.insert()
+
+    assert await LikeReconciler().reconcile() == 4
+
+    remaining = await Like.find_all().sort("user_id", "paper_id").to_list()
+    assert [(like.user_id, like.paper_id, like.verified) for like in remaining] == [
+        ("ann", PAPER, True),
+        ("ann", RESOLVED, True),
+        ("bob", RESOLVED, True),
+    ]
@@ -0,0 +1,57 @@
+from src.adapters.paper_record import PaperRecord
+from src.papers.models import PaperResponse, ThumbnailResponse, ThumbnailStatus
+
+
+def test_sparse_records_match_the_response_schema():
+    record = PaperRecord(
+        {
+            "paperId": "a" * 40,
+            "title": None,
+            "authors": [{"name": "Ada Lovelace"}, {"name": None}],
+            "publicationTypes": ["Review", "Unknown"],
+            "openAccessPdf": {"url": ""},
+            "publicationVenue": {"id": None, "type": "workshop", "url": "n/a"},
+        }
+    )
+
+    serialized = PaperResponse.serialize(record, 2, None)
+    response = PaperResponse.model_validate(serialized)
+
+    assert response.model_dump(mode="json") == serialized
+    assert serialized["authors"] == ["Ada Lovelace"]
+    assert serialized["publication_types"] == ["Review"]
+    assert serialized["venue"]["type"] is None
+
+
+def test_full_records_match_the_response_schema():
+    record = PaperRecord(
+        {
+            "paperId": "b" * 40,
+            "title": "Attention Is All You Need",
+            "authors": [{"name": "Ashish Vaswani"}],
+            "publicationDate": "2017-06-12",
+            "citationCount": 100,
+            "externalIds": {"ArXiv": "1706.03762", "CorpusId": 13756489},
+            "openAccessPdf": {"url": "https://arxiv.org/pdf/1706.03762"},
+            "publicationVenue": {
+                "id": "v",
+                "name": "NeurIPS",
+                "alternate_urls": ["https://nips.cc"],
+                "type": "conference",
+            },
+            "citationStyles": {"bibtex": "@article{}"},
+        }
+    )
+    thumbnail = ThumbnailResponse(
+        paper_id="b" * 40,
+        status=ThumbnailStatus.DONE,
+        url="https://cdn.example.org/b",
+        srcset={"image/webp": "https://cdn.example.org/b-w200.webp 200w"},
+    )
+
+    serialized = PaperResponse.serialize(record, 0, thumbnail)
+    response = PaperResponse.model_validate(serialized)
+
+    assert response.model_dump(mode="json") == serialized
+    assert serialized["external_ids"]["ArXiv"] == "1706.03762"
+    assert serialized["published_at"] == "2017-06-12T00:00:00"
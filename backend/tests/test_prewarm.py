@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.adapters import semantic_scholar_adapter as ss_adapter
+from src.papers import prewarm
+from src.papers.models import ThumbnailJob, ThumbnailResponse, ThumbnailStatus
+
+
+@pytest.fixture(autouse=True)
+def papers(monkeypatch, config):
+    config("thumbnail", job_poll_interval=0.01)
+
+    async def get_checked_batch_data(paper_ids, profile):
+        return [{"paperId": paper_id} for paper_id in paper_ids if paper_id != "gone"]
+
+    async def get_thumbnails(url_names):
+        return {
+            name: ThumbnailResponse(
+                paper_id=name,
+                status=(
+                    ThumbnailStatus.DONE
+                    if name == "cached"
+                    else ThumbnailStatus.PENDING
+                ),
+            )
+            for _, name in url_names
+        }
+
+    monkeypatch.setattr(ss_adapter, "get_checked_batch_data", get_checked_batch_data)
+    monkeypatch.setattr(
+        ss_adapter,
+        "build_paper",
+        lambda record: SimpleNamespace(
+            paperId=record["paperId"],
+            openAccessPdf={"url": "https://example.org/pdf"},
+        ),
+    )
+    monkeypatch.setattr(prewarm, "get_thumbnails", get_thumbnails)
+
+
+async def test_unsettled_thumbnails_time_out(db):
+    await ThumbnailJob(
+        paper_id="done", pdf_url="", status=ThumbnailStatus.DONE
+    ).insert()
+    await ThumbnailJob(
+        paper_id="stuck", pdf_url="", status=ThumbnailStatus.RUNNING
+    ).insert()
+    counts = dict.fromkeys(
+        ["generated", "skipped", "failed", "timed_out", "no_pdf", "not_found"], 0
+    )
+
+    # The job of "lost" is missing and would be waited for forever
+    await prewarm.prewarm_batch(
+        ["cached", "done", "gone", "lost", "stuck"], counts, timeout=0.1
+    )
+
+    assert counts == {
+        "generated": 1,
+        "skipped": 1,
+        "failed": 0,
+        "timed_out": 2,
+        "no_pdf": 0,
+        "not_found": 1,
+    }
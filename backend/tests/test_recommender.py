@@ -0,0 +1,117 @@
+import asyncio
+import math
+import random
+from collections import defaultdict
+
+import pytest
+
+from src.likes.recommender import CoLikeRecommender
+from src.monitoring.metrics import METRICS
+
+
+def score_brute_force(
+    likes: set[tuple[str, str]], user_id: str, paper_ids: list[str]
+) -> dict[str, float]:
+    """Score papers with the cosine of their like vectors, one by one."""
+    users = defaultdict(set)
+    for user, paper in likes:
+        users[user].add(paper)
+
+    counts, co_likes = defaultdict(int), defaultdict(int)
+    for papers in users.values():
+        for paper in papers:
+            counts[paper] += 1
+            for other in papers - {paper}:
+                co_likes[paper, other] += 1
+
+    scores = defaultdict(float)
+    for (paper, other), count in co_likes.items():
+        if paper in paper_ids:
+            scores[other] += count / math.sqrt(counts[paper] * counts[other])
+
+    excluded = set(paper_ids) | users[user_id]
+    return {
+        other: score
+        for other, score in scores.items()
+        if other not in excluded and score > 1e-6
+    }
+
+
+def assert_matches(recommender, likes, user_id, limit=10):
+    paper_ids = sorted(paper for user, paper in likes if user == user_id)[:10]
+    scores = score_brute_force(likes, user_id, paper_ids)
+    recommended = recommender.recommend(user_id, paper_ids, limit)
+
+    # Ties may be broken differently, the scores must match
+    assert [scores.get(paper, -1) for paper in recommended] == pytest.approx(
+        sorted(scores.values(), reverse=True)[:limit], rel=1e-5
+    )
+
+
+def generate_likes(seed: int) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    likes = {
+        (f"u{rng.randrange(60)}", f"p{int(rng.paretovariate(1.2)) % 120}")
+        for _ in range(800)
+    }
+    return sorted(likes)
+
+
+def test_recommendations_match_brute_force():
+    likes = generate_likes(1)
+    recommender = CoLikeRecommender()
+    recommender.load(likes)
+
+    for user_id in ["u1", "u7", "u30"]:
+        assert_matches(recommender, set(likes), user_id)
+
+
+async def test_added_and_removed_likes_count_before_and_after_merges(config):
+    config("recommender", merge_threshold=200)
+    merges = METRICS.snapshot().get("recommender.merges", 0)
+    rng = random.Random(2)
+    likes = set(generate_likes(2))
+    recommender = CoLikeRecommender()
+    recommender.load(sorted(likes))
+
+    for step in range(400):
+        user, paper = f"u{rng.randrange(70)}", f"p{rng.randrange(140)}"
+        if (user, paper) in likes:
+            recommender.remove(user, paper)
+            likes.discard((user, paper))
+        else:
+            recommender.add(user, paper)
+            likes.add((user, paper))
+
+        # Merges run in a thread, some are checked while still running
+        if step % 100 == 0:
+            assert_matches(recommender, likes, "u3")
+            await asyncio.sleep(0)
+        if recommender._merge_task is not None and step % 50 == 0:
+            await recommender._merge_task
+
+    for user_id in ["u3", "u11", "u65"]:
+        assert_matches(recommender, likes, user_id)
+
+    if recommender._merge_task is not None:
+        await recommender._merge_task
+    assert METRICS.snapshot()["recommender.merges"] > merges
+    for user_id in ["u3", "u11", "u65"]:
+        assert_matches(recommender, likes, user_id)
+
+
+def test_liked_papers_and_unknown_papers_are_left_out():
+    recommender = CoLikeRecommender()
+    recommender.load([("a", "p1"), ("a", "p2"), ("b", "p1"), ("b", "p3")])
+
+    assert recommender.recommend("a", ["p1"], 10) == ["p3"]
+    assert recommender.recommend("c", ["unknown"], 10) == []
+
+
+def test_only_the_most_recent_likes_of_a_user_count(config):
+    config("recommender", max_user_likes=2)
+    recommender = CoLikeRecommender()
+    recommender.load([("a", "p1"), ("a", "p2"), ("a", "p3"), ("b", "p4")])
+
+    assert recommender.recommend("b", ["p3"], 10) == ["p2"]
+    assert recommender.recommend("b", ["p1"], 10) == []
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from src.adapters.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    TokenBucket,
+    get_backoff,
+)
+
+
+class Clock:
+    def __init__(self, monkeypatch) -> None:
+        self.now = 1000.0
+        monkeypatch.setattr(time, "monotonic", lambda: self.now)
+
+
+async def test_token_bucket_hands_out_the_burst_then_refills(monkeypatch):
+    clock = Clock(monkeypatch)
+    bucket = TokenBucket(rate=2, burst=3)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+async def test_token_bucket_pause_holds_back_tokens(monkeypatch):
+    clock = Clock(monkeypatch)
+    bucket = TokenBucket(rate=10, burst=10)
+
+    bucket.pause(5)
+    assert not bucket.try_acquire()
+
+    clock.now += 5
+    assert bucket.try_acquire()
+
+
+async def test_token_bucket_acquire_waits_for_a_token():
+    bucket = TokenBucket(rate=100, burst=1)
+    await bucket.acquire()
+
+    start = time.monotonic()
+    await asyncio.wait_for(bucket.acquire(), timeout=1)
+
+    assert time.monotonic() - start >= 0.005
+
+
+def test_circuit_opens_after_consecutive_failures(monkeypatch):
+    Clock(monkeypatch)
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.check()
+    assert not breaker.is_open
+
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.check()
+    assert error.value.retry_after == pytest.approx(30)
+
+
+def test_circuit_lets_one_probe_through_after_the_reset_timeout(monkeypatch):
+    clock = Clock(monkeypatch)
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    clock.now += 30
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    # A failed probe keeps the circuit open for another reset timeout
+    breaker.record_failure()
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    clock.now += 1
+    breaker.check()
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.check()
+
+
+def test_backoff_grows_exponentially_up_to_the_maximum(monkeypatch):
+    monkeypatch.setattr("random.uniform", lambda low, high: high)
+
+    assert [get_backoff(attempt, 0.5, 3) for attempt in range(5)] == [
+        0.5,
+        1,
+        2,
+        3,
+        3,
+    ]
+
+
+def test_backoff_is_jittered_from_zero():
+    delays = [get_backoff(3, 1, 100) for _ in range(200)]
+
+    assert all(0 <= delay <= 8 for delay in delays)
+    assert min(delays) < 2 < max(delays)
@@ -0,0 +1,67 @@
+import httpx
+import pytest
+from moto.server import ThreadedMotoServer
+
+from src.adapters import s3_adapter
+from src.config import CONFIG
+
+
+@pytest.fixture(scope="module")
+def moto_server():
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    url = f"http://{host}:{port}"
+    httpx.put(f"{url}/thumbnails-test").raise_for_status()
+    yield url
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+async def s3(moto_server, monkeypatch, config):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setattr(CONFIG, "aws_endpoint_url", moto_server)
+    config("s3", thumbnails_bucket="thumbnails-test", max_attempts=1)
+    yield
+    await s3_adapter.close()
+
+
+async def test_uploaded_thumbnails_are_served_by_presigned_urls():
+    await s3_adapter.upload("upload-w200.webp", b"thumbnail", "image/webp")
+    url = await s3_adapter.get_presigned_url("upload-w200.webp")
+
+    async with httpx.AsyncClient() as client:
+        response = await client.get(url)
+
+    assert "Signature=" in url
+    assert response.content == b"thumbnail"
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["cache-control"] == CONFIG.s3.thumbnail_cache_control
+
+
+async def test_presigned_urls_are_reused(config):
+    first = await s3_adapter.get_presigned_url("reused")
+    assert await s3_adapter.get_presigned_url("reused") is first
+
+    config("s3", public_url="https://cdn.example.org/thumbnails/")
+    assert (
+        await s3_adapter.get_presigned_url("public")
+        == "https://cdn.example.org/thumbnails/public"
+    )
+
+
+async def test_client_is_reopened_after_close():
+    await s3_adapter.start()
+    await s3_adapter.start()
+    await s3_adapter.upload("before", b"before", "image/webp")
+
+    await s3_adapter.close()
+    await s3_adapter.close()
+
+    # Uploads open the client again on first use
+    await s3_adapter.upload("after", b"after", "image/webp")
+    url = await s3_adapter.get_presigned_url("after")
+    async with httpx.AsyncClient() as client:
+        assert (await client.get(url)).content == b"after"
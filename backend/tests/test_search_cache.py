@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from src.dependencies import Pagination
+from src.papers.models import PaperSearchInput, PublicationType
+from src.papers.search_cache import get_search_key
+from src.users.models import UserFieldOfStudy
+
+
+def test_equivalent_searches_get_the_same_key():
+    first = PaperSearchInput(
+        query="  Graph  Neural Networks ",
+        publication_types=[PublicationType.REVIEW, PublicationType.CONFERENCE],
+        fields_of_study=[UserFieldOfStudy.MD, UserFieldOfStudy.CS],
+        venues=[],
+        publication_date_start=datetime(2020, 1, 1, 13, 45),
+        min_citation_count=0,
+    )
+    second = PaperSearchInput(
+        query="graph neural networks",
+        publication_types=[PublicationType.CONFERENCE, PublicationType.REVIEW],
+        fields_of_study=[UserFieldOfStudy.CS, UserFieldOfStudy.MD],
+        publication_date_start=datetime(2020, 1, 1),
+    )
+
+    assert get_search_key(first, Pagination()) == get_search_key(second, Pagination())
+
+
+def test_different_searches_get_different_keys():
+    body = PaperSearchInput(query="graph neural networks")
+    key = get_search_key(body, Pagination())
+
+    assert key != get_search_key(
+        PaperSearchInput(query="graph neural network"), Pagination()
+    )
+    assert key != get_search_key(
+        PaperSearchInput(query="graph neural networks", open_access_pdf=True),
+        Pagination(),
+    )
+    assert key != get_search_key(
+        PaperSearchInput(query="graph neural networks", min_citation_count=5),
+        Pagination(),
+    )
+    assert key != get_search_key(body, Pagination(offset=100))
+    assert key != get_search_key(body, Pagination(limit=10))
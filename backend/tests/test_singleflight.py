@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from src.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_of_a_key_run_once():
+    flight = SingleFlight[str, int]("test")
+    calls = []
+
+    async def call() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    results = await asyncio.gather(*(flight.do("key", call) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert len(calls) == 1
+
+
+async def test_keys_run_apart_and_again_after_finishing():
+    flight = SingleFlight[str, str]("test")
+
+    async def call(value: str) -> str:
+        await asyncio.sleep(0)
+        return value
+
+    assert await asyncio.gather(
+        flight.do("a", lambda: call("a")), flight.do("b", lambda: call("b"))
+    ) == ["a", "b"]
+    assert await flight.do("a", lambda: call("again")) == "again"
+
+
+async def test_errors_reach_every_caller():
+    flight = SingleFlight[str, None]("test")
+
+    async def call() -> None:
+        await asyncio.sleep(0)
+        raise ValueError("failed")
+
+    results = await asyncio.gather(
+        flight.do("key", call), flight.do("key", call), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_cancelled_caller_does_not_cancel_the_call():
+    flight = SingleFlight[str, str]("test")
+    started = asyncio.Event()
+
+    async def call() -> str:
+        started.set()
+        await asyncio.sleep(0.01)
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", call))
+    await started.wait()
+    second = asyncio.create_task(flight.do("key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.papers import thumbnail_jobs
+from src.papers.models import ThumbnailJob, ThumbnailStatus
+
+
+@pytest.fixture(autouse=True)
+def settings(config):
+    config(
+        "thumbnail",
+        job_lease=60,
+        job_max_attempts=3,
+        job_retry_delay=10,
+        failure_retry_after=3600,
+    )
+
+
+async def insert_job(paper_id: str, **fields) -> ThumbnailJob:
+    job = ThumbnailJob(paper_id=paper_id, pdf_url=f"https://example.org/{paper_id}")
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+    return await job.insert()
+
+
+async def test_claims_due_jobs_oldest_first(db):
+    now = datetime.now()
+    await insert_job("later", next_attempt_at=now + timedelta(minutes=5))
+    await insert_job("second", next_attempt_at=now - timedelta(minutes=1))
+    await insert_job("first", next_attempt_at=now - timedelta(minutes=2))
+    await insert_job("done", status=ThumbnailStatus.DONE)
+
+    first = await thumbnail_jobs.claim_next()
+    second = await thumbnail_jobs.claim_next()
+
+    assert (first.paper_id, second.paper_id) == ("first", "second")
+    assert first.status == ThumbnailStatus.RUNNING
+    assert first.attempts == 1
+    assert first.locked_until > now
+    assert await thumbnail_jobs.claim_next() is None
+
+
+async def test_expired_leases_are_claimed_again_with_a_new_lease_id(db):
+    now = datetime.now()
+    await insert_job("running", status=ThumbnailStatus.RUNNING, locked_until=now)
+    await insert_job(
+        "locked",
+        status=ThumbnailStatus.RUNNING,
+        locked_until=now + timedelta(minutes=1),
+    )
+
+    stale = await thumbnail_jobs.claim_next()
+    assert stale.paper_id == "running"
+
+    await ThumbnailJob.find_one(ThumbnailJob.id == stale.id).set(
+        {ThumbnailJob.locked_until: now - timedelta(seconds=1)}
+    )
+    claimed = await thumbnail_jobs.claim_next()
+
+    assert claimed.paper_id == "running"
+    assert claimed.lease_id != stale.lease_id
+    assert await thumbnail_jobs.claim_next() is None
+
+    # The worker whose lease expired can neither renew nor fail the job
+    assert not await thumbnail_jobs.renew_lease(stale)
+    assert not await thumbnail_jobs.fail(stale, "stale")
+    assert await thumbnail_jobs.renew_lease(claimed)
+
+
+async def test_failures_back_off_then_give_up(db):
+    await insert_job("paper")
+
+    job = await thumbnail_jobs.claim_next()
+    assert await thumbnail_jobs.fail(job, "timeout")
+    stored = await thumbnail_jobs.find_one("paper")
+
+    assert stored.status == ThumbnailStatus.PENDING
+    assert stored.error == "timeout"
+    assert stored.lease_id is None
+    delay = stored.next_attempt_at - datetime.now()
+    assert timedelta(seconds=8) < delay <= timedelta(seconds=10)
+
+    for attempt in range(2):
+        await ThumbnailJob.find_one(ThumbnailJob.id == job.id).set(
+            {ThumbnailJob.next_attempt_at: datetime.now()}
+        )
+        job = await thumbnail_jobs.claim_next()
+        await thumbnail_jobs.fail(job, "timeout")
+
+    stored = await thumbnail_jobs.find_one("paper")
+    assert stored.attempts == 3
+    assert stored.status == ThumbnailStatus.FAILED
+    assert stored.retry_after > datetime.now() + timedelta(minutes=59)
+    assert await thumbnail_jobs.claim_next() is None
+
+
+async def test_postponed_jobs_keep_their_attempts(db):
+    await insert_job("paper", attempts=1)
+
+    job = await thumbnail_jobs.claim_next()
+    stale = job.model_copy()
+    assert await thumbnail_jobs.postpone(job, 120)
+    stored = await thumbnail_jobs.find_one("paper")
+
+    assert stored.status == ThumbnailStatus.PENDING
+    assert stored.attempts == 1
+    assert stored.next_attempt_at > datetime.now() + timedelta(seconds=110)
+    assert not await thumbnail_jobs.postpone(stale, 120)
+
+
+async def test_failed_jobs_are_retried_once_due(db):
+    now = datetime.now()
+    await insert_job("legacy", status=ThumbnailStatus.FAILED, attempts=3)
+    await insert_job(
+        "due",
+        status=ThumbnailStatus.FAILED,
+        attempts=3,
+        retry_after=now - timedelta(seconds=1),
+    )
+    await insert_job(
+        "waiting",
+        status=ThumbnailStatus.FAILED,
+        attempts=3,
+        retry_after=now + timedelta(hours=1),
+    )
+
+    await thumbnail_jobs.retry(["legacy", "due", "waiting"])
+    jobs = await thumbnail_jobs.find_many(["legacy", "due", "waiting"])
+
+    assert jobs["legacy"].status == ThumbnailStatus.PENDING
+    assert jobs["due"].status == ThumbnailStatus.PENDING
+    assert jobs["due"].attempts == 0
+    assert jobs["waiting"].status == ThumbnailStatus.FAILED
@@ -93,6 +93,8 @@ type Venue = {
   url: string | null;
 };
 
+export type ThumbnailStatus = "pending" | "running" | "done" | "failed";
+
 export type Paper = {
   id: string;
   external_ids: ExternalIds;
@@ -104,6 +106,8 @@ export type Paper = {
   abstract: string | null;
   likes: number;
   thumbnail_url: string | null;
+  thumbnail_status: ThumbnailStatus | null;
+  thumbnail_srcset: Record<string, string>;
   open_pdf_url: string | null;
   venue: Venue | null;
   bibtex: string | null;